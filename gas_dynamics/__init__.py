@@ -36,7 +36,9 @@ from gas_dynamics.shocks.shocks import (
   shock_mach_given_angles, 
   shock_oblique_charts,
   shock_tables, 
-  shock_flow_deflection_from_machs)
+  shock_flow_deflection_from_machs,
+  normal_shock,
+  oblique_shock)
 
 from gas_dynamics.prandtl_meyer.prandtl_meyer import (
   prandtl_meyer_angle_from_mach, 
@@ -45,17 +47,46 @@ from gas_dynamics.prandtl_meyer.prandtl_meyer import (
 
 from gas_dynamics.fanno.fanno import (
   stagnation_enthalpy,
+  static_enthalpy,
+  stagnation_temperature_from_velocity,
+  temperature_from_velocity,
   fanno_temperature_ratio,
   fanno_pressure_ratio,
   fanno_density_ratio,
   fanno_stagnation_pressure_ratio,
+  fanno_mach_from_temperature_ratio,
+  fanno_mach_from_pressure_ratio,
+  fanno_mach_from_density_ratio,
   fanno_temperature_star_ratio,
   fanno_pressure_star_ratio,
   fanno_density_star_ratio,
   fanno_velocity_star_ratio,
+  fanno_stagnation_pressure_star_ratio,
   fanno_parameter,
   fanno_parameter_max,
-  mach_from_fanno)
+  mach_from_fanno,
+  mach_from_fanno_parameter_max,
+  fanno_tables,
+  friction_factor,
+  fanno_march)
+
+from gas_dynamics.isothermal.isothermal import (
+  isothermal_pressure_ratio,
+  isothermal_density_ratio,
+  isothermal_stagnation_pressure_ratio,
+  isothermal_stagnation_temperature_ratio,
+  isothermal_mach_from_pressure_ratio,
+  isothermal_mach_from_density_ratio,
+  isothermal_pressure_star_ratio,
+  isothermal_density_star_ratio,
+  isothermal_velocity_star_ratio,
+  isothermal_stagnation_pressure_star_ratio,
+  isothermal_stagnation_temperature_star_ratio,
+  isothermal_parameter,
+  isothermal_parameter_max,
+  mach_from_isothermal_parameter,
+  mach_from_isothermal_parameter_max,
+  isothermal_inlet_mach)
 
 from gas_dynamics.rayleigh.rayleigh import(
   rayleigh_pressure_ratio,
@@ -72,7 +103,54 @@ from gas_dynamics.rayleigh.rayleigh import(
   rayleigh_density_star_ratio,
   rayleigh_stagnation_pressure_star_ratio,
   rayleigh_stagnation_temperature_star_ratio,
-  rayleigh_heat_flux)
+  rayleigh_heat_flux,
+  rayleigh_heat_max,
+  rayleigh_heat_addition)
+
+from gas_dynamics.generalized.generalized import (
+  generalized_flow)
+
+from gas_dynamics.design.design import (
+  method_of_characteristics,
+  nozzle_sweep,
+  Nozzle)
+
+from gas_dynamics.design.analysis import (
+  method_of_characteristics_analysis,
+  FlowField)
+
+from gas_dynamics.design.export import (
+  write_vtk,
+  write_vtu,
+  write_contour_csv,
+  write_contour_dxf)
+
+from gas_dynamics.network.network import (
+  PipeNetwork)
+
+from gas_dynamics.extra import (
+  table_lookup)
 
-from gas_dynamics.fluids import fluid
+from gas_dynamics.fluids import (
+  fluid,
+  FlowState,
+  get_fluid,
+  mixture,
+  ThermallyPerfectGas,
+  thermally_perfect_gas,
+  EquilibriumAir,
+  equilibrium_air,
+  GasArray,
+  gas_array,
+  register_fluid,
+  fluid_pool,
+  TabulatedGas,
+  load_gas_table)
 
+from gas_dynamics.units import (
+  UnitSystem,
+  SI,
+  US,
+  get_units,
+  to_si,
+  from_si)
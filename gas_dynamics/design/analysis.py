@@ -0,0 +1,296 @@
+#!usr/bin/env
+#Analysis of the supersonic flow through a given wall with the method of
+#characteristics. The mesh is marched front by front from an inflow line,
+#alternating between fronts that hold the centerline and wall points and
+#fronts of interior points that lie between them, so row m of the mesh arrays
+#is front m and every column is a diamond of the characteristic lattice.
+#
+#
+#Copyright 2020 by Fernando A de la Fuente
+#All rights reserved
+
+import numpy as np
+import matplotlib.pyplot as plt
+from gas_dynamics.prandtl_meyer.prandtl_meyer import prandtl_meyer_angle_from_mach, mach_wave_angle, _prandtl_meyer_mach
+from gas_dynamics.standard.standard import stagnation_pressure_ratio
+from gas_dynamics.design.design import _unit_process
+from gas_dynamics.fluids import air
+
+
+
+#==================================================
+#flow field
+#==================================================
+class FlowField:
+    """A class to hold the characteristic mesh of the flow through a wall
+
+    Attributes
+    ----------
+    wall_x : `array`
+        The axial coordinates of the wall \n
+    wall_y : `array`
+        The radial coordinates of the wall \n
+    axisymmetric : `bool`
+        True for a round nozzle, false for a planar nozzle \n
+    gas : `fluid`
+        The fluid flowing through the wall \n
+    x : `array`
+        The axial coordinate of every mesh point, one row per front \n
+    y : `array`
+        The radial coordinate of every mesh point, one row per front \n
+    theta : `array`
+        The flow angle in degrees at every mesh point \n
+    nu : `array`
+        The Prandtl-Meyer angle in degrees at every mesh point \n
+    mach : `array`
+        The Mach number at every mesh point \n
+    mach_wave_angle : `array`
+        The Mach wave angle in degrees at every mesh point \n
+    pressure : `array`
+        The static pressure at every mesh point, a ratio to the stagnation
+        pressure unless a stagnation pressure was given \n
+    shock : `bool`
+        True if characteristics of the same family coalesced, which marks a shock \n
+    shock_x : `float`
+        The axial location of the coalescence, nan if there was none \n
+    shock_y : `float`
+        The radial location of the coalescence, nan if there was none \n
+
+    Methods
+    -------
+    plot()
+        Plot the characteristic mesh and the wall \n
+    """
+
+    def __init__(self, wall_x, wall_y, axisymmetric=False, gas=air):
+        self.wall_x = wall_x
+        self.wall_y = wall_y
+        self.axisymmetric = axisymmetric
+        self.gas = gas
+        self.shock = False
+        self.shock_x = np.nan
+        self.shock_y = np.nan
+
+    @property
+    def points(self) -> int:
+        """The number of solved mesh points"""
+
+        return int(np.count_nonzero(np.isfinite(self.mach)))
+
+    def plot(self, dark=True):
+        """Plot the characteristic mesh and the wall
+
+        Parameters
+        ----------
+        dark : `bool`
+            Dark mode for the plot. Default is true.\n
+        """
+
+        if dark == True:
+            plt.style.use('dark_background')
+            line_color = 'w'
+        else:
+            plt.style.use('default')
+            line_color = 'k'
+
+        fig, ax = plt.subplots()
+        ax.plot(self.x[::2].T, self.y[::2].T, color=line_color, alpha=0.5, linewidth=.5)
+        ax.plot(self.x[1::2].T, self.y[1::2].T, color=line_color, alpha=0.5, linewidth=.5)
+        ax.plot(self.wall_x, self.wall_y)
+        if self.shock:
+            ax.plot(self.shock_x, self.shock_y, 'rx')
+        ax.grid(which='both', axis='both', alpha=.1)
+        ax.axis('equal')
+        ax.set_xlabel(r'$x$')
+        ax.set_ylabel(r'$y$', rotation=0)
+        plt.title(r'$Method \ of \ Characteristics \ Flow \ Field$')
+        plt.show()
+
+
+
+#==================================================
+#method of characteristics analysis
+#==================================================
+def method_of_characteristics_analysis(wall_x, wall_y, inflow_mach=1.01, inflow_angle=None, characteristic_lines=100,
+    axisymmetric=False, stagnation_pressure=1, max_fronts=100000, gas=air) -> FlowField:
+    """Solve the supersonic flow through a given wall with the method of characteristics
+
+    Notes
+    -----
+    The inflow line runs from the centerline to the first point of the wall at
+    the first axial wall coordinate, split by the characteristic lines into
+    evenly spaced points. Every front of the mesh is solved at once from the
+    front before it. Fronts alternate between interior points, which lie on the
+    right running characteristic of one point and the left running
+    characteristic of its neighbour, and the centerline, interior and wall
+    points, where the left running characteristic of the last interior point
+    meets the wall and takes the angle of the wall. The march stops once no
+    point of a front lies inside the domain the wall determines.
+
+    If a new point lies upstream of either of its parents, two characteristics
+    of the same family have crossed and the isentropic solution no longer
+    holds. The march stops at the first such front and the coalescence is
+    recorded as the location of a shock.
+
+    A sonic inflow is started just above a Mach number of one, where the
+    characteristics leave the inflow line. Default fluid is air.
+
+    Parameters
+    ----------
+    wall_x : `array_like`
+        The axial coordinates of the wall, increasing \n
+    wall_y : `array_like`
+        The radial coordinates of the wall \n
+    inflow_mach : `array_like`
+        The Mach number along the inflow line, from the centerline to the wall \n
+    inflow_angle : `array_like`
+        The flow angle in degrees along the inflow line. Default turns the flow
+        linearly from zero on the centerline to the angle of the wall \n
+    characteristic_lines : `int`
+        The number of characteristic lines leaving the inflow line \n
+    axisymmetric : `bool`
+        True for a round nozzle, false for a planar nozzle. Default is false \n
+    stagnation_pressure : `float`
+        The stagnation pressure of the flow. Default gives the pressure as a
+        ratio to the stagnation pressure \n
+    max_fronts : `int`
+        The maximum number of fronts to march \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    FlowField
+        The mesh with the Mach number, pressure and flow angle at every point \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> import numpy as np
+    >>> x = np.linspace(0, 4, 101)
+    >>> y = 1 + x*np.tan(np.radians(10))
+    >>> flow = gd.method_of_characteristics_analysis(x, y, inflow_mach=1.5, characteristic_lines=50)
+    >>> flow.shock
+    False
+    >>> flow.mach.shape
+    (299, 51)
+    >>> flow.plot()
+    >>>
+    """
+
+    wall_x = np.asarray(wall_x, dtype=float)
+    wall_y = np.asarray(wall_y, dtype=float)
+    n = max(int(round(characteristic_lines)), 1)
+    delta = 1 if axisymmetric else 0
+    gamma = gas.gamma
+
+    #the inflow line
+    y = np.linspace(0, wall_y[0], n+1)
+    x = np.full(n+1, wall_x[0])
+    if inflow_angle is None:
+        inflow_angle = np.degrees(np.arctan2(wall_y[1] - wall_y[0], wall_x[1] - wall_x[0])) * y / wall_y[0]
+    theta = np.radians(np.broadcast_to(np.asarray(inflow_angle, dtype=float), (n+1,))).copy()
+    mach = np.maximum(np.broadcast_to(np.asarray(inflow_mach, dtype=float), (n+1,)), 1 + 1e-4)
+    nu = np.radians(prandtl_meyer_angle_from_mach(mach, gas=gas))
+    mu = np.radians(mach_wave_angle(mach))
+    fronts = [(x, y, theta, nu, mu, mach)]
+
+    flow = FlowField(wall_x, wall_y, axisymmetric=axisymmetric, gas=gas)
+    index = 0
+    axis = np.arange(n) == 0
+    with np.errstate(invalid='ignore'):
+        for m in range(1, max_fronts):
+            previous = fronts[-1][:5]
+            if m % 2:
+                #interior points between neighbours of the full front
+                a = tuple(v[1:] for v in previous)
+                b = tuple(v[:-1] for v in previous)
+                front = _unit_process(a, b, np.zeros(n, dtype=bool), delta, gas=gas)
+                upstream = (front[0] <= a[0]) | (front[0] <= b[0])
+            else:
+                #centerline and interior points, then the wall point
+                a = tuple(v[:n] for v in previous)
+                b = tuple(np.concatenate((v[:1], v[:n-1])) for v in previous)
+                interior = _unit_process(a, b, axis, delta, gas=gas)
+                wall, index = _wall_process(tuple(v[n-1] for v in previous), wall_x, wall_y, index, delta, gamma)
+                front = tuple(np.append(v, w) for v, w in zip(interior, wall))
+                upstream = (interior[0] <= a[0]) | ((interior[0] <= b[0]) & ~axis)
+                upstream = np.append(upstream, wall[0] <= previous[0][n-1])
+                a = tuple(np.append(v, v[-1]) for v in a)
+                b = tuple(np.append(v, v[-1]) for v in b)
+
+            #points whose parents left the domain are not solved
+            solved = np.isfinite(front[0])
+            crossed = np.flatnonzero(upstream & solved)
+            if crossed.size:
+                flow.shock = True
+                flow.shock_x = (a[0][crossed[0]] + b[0][crossed[0]]) / 2
+                flow.shock_y = (a[1][crossed[0]] + b[1][crossed[0]]) / 2
+                break
+            if not np.any(solved):
+                break
+            fronts.append(front)
+
+    #stack the fronts, leaving the wall column of the interior fronts empty
+    mesh = np.full((6, len(fronts), n+1), np.nan)
+    for m, front in enumerate(fronts):
+        for k, v in enumerate(front):
+            mesh[k, m, :len(v)] = v
+
+    flow.x, flow.y = mesh[0], mesh[1]
+    flow.theta, flow.nu = np.degrees(mesh[2]), np.degrees(mesh[3])
+    flow.mach_wave_angle, flow.mach = np.degrees(mesh[4]), mesh[5]
+    flow.pressure = stagnation_pressure * stagnation_pressure_ratio(flow.mach, gas=gas)
+    return flow
+
+
+
+#==================================================
+#wall unit process
+#==================================================
+def _wall_process(b: tuple, wall_x, wall_y, index: int, delta: int, gamma: float, tol=1e-9, maxiter=50) -> tuple:
+    """Solve the point where the left running characteristic through point b
+    meets the wall, searching the wall from the given segment onwards
+
+    Notes
+    -----
+    The point takes the angle of the wall segment it lands on and the
+    compatibility relation along the characteristic gives its Prandtl-Meyer
+    angle, corrected with the average of both end points like the interior
+    unit process. Angles are in radians. A point past the end of the wall is
+    returned as nan.
+
+    Returns
+    -------
+    tuple
+        The x, y, theta, nu, mu and mach of the wall point, and the index of the
+        wall segment it lies on \n
+    """
+
+    xb, yb, tb, nb, mb = b
+    nan = (np.nan,) * 6
+    if not np.isfinite(xb):
+        return nan, index
+    theta, mu = tb, mb
+    x = y = np.nan
+    for n in range(maxiter + 1):
+        slope = np.tan((tb + theta)/2 + (mb + mu)/2)
+        gap = wall_y[index:] - yb - slope*(wall_x[index:] - xb)
+        crossing = np.flatnonzero((gap[:-1] > 0) & (gap[1:] <= 0))
+        if crossing.size == 0:
+            return nan, index
+        k = index + crossing[0]
+        t = gap[k - index] / (gap[k - index] - gap[k - index + 1])
+        x_new = wall_x[k] + t*(wall_x[k+1] - wall_x[k])
+        y_new = wall_y[k] + t*(wall_y[k+1] - wall_y[k])
+        moved = max(abs(x_new - x), abs(y_new - y)) if n else np.inf
+        x, y = x_new, y_new
+        theta = np.arctan2(wall_y[k+1] - wall_y[k], wall_x[k+1] - wall_x[k])
+        q = delta * np.sin((mb + mu)/2) * np.sin((tb + theta)/2) / ((yb + y)/2)
+        nu = theta - tb + nb + q * np.hypot(x - xb, y - yb)
+        mach = float(_prandtl_meyer_mach(nu, gamma))
+        mu = np.radians(mach_wave_angle(mach))
+        if moved < tol:
+            break
+
+    return (x, y, theta, nu, mu, mach), k
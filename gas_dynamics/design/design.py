@@ -1,212 +1,597 @@
-from gas_dynamics.prandtl_meyer.prandtl_meyer import prandtl_meyer_mach, prandtl_meyer_turn, mach_wave_angle
-from gas_dynamics.fluids import fluid, air
-from gas_dynamics.extra import tand
+#!usr/bin/env
+#Nozzle design with the method of characteristics. The characteristic
+#mesh is held in preallocated arrays where row i is the left running
+#characteristic reflected from the centerline and column j is the right
+#running characteristic leaving the throat, so the mesh fills the upper
+#triangle of the arrays and the last column holds the wall. Planar nozzles
+#expanding from a sharp corner are solved in closed form, while axisymmetric
+#and finite throat radius nozzles march the unit processes below.
+#
+#
+#Copyright 2020 by Fernando A de la Fuente
+#All rights reserved
+
+import os
+from hashlib import sha1
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
 import numpy as np
-from scipy.optimize import fsolve
 import matplotlib.pyplot as plt
+from gas_dynamics.prandtl_meyer.prandtl_meyer import prandtl_meyer_angle_from_mach, prandtl_meyer_mach_from_angle, mach_wave_angle, \
+    _prandtl_meyer_mach
+from gas_dynamics.fluids import fluid, air
+from gas_dynamics.extra import tand
+
+
+
+#==================================================
+#nozzle
+#==================================================
+class Nozzle:
+    """A class to hold the characteristic mesh and contour of a nozzle
+
+    Attributes
+    ----------
+    exit_mach : `float`
+        The design exit Mach number \n
+    characteristic_lines : `int`
+        The number of characteristic lines in the mesh \n
+    gas : `fluid`
+        The fluid the nozzle was designed for \n
+    axisymmetric : `bool`
+        True for a round nozzle, false for a planar nozzle \n
+    throat_radius : `float`
+        The radius of the wall arc at the throat in throat half heights \n
+    x : `array`
+        The axial coordinate of every mesh point, nan outside the upper triangle \n
+    y : `array`
+        The radial coordinate of every mesh point, nan outside the upper triangle \n
+    theta : `array`
+        The flow angle in degrees at every mesh point \n
+    nu : `array`
+        The Prandtl-Meyer angle in degrees at every mesh point \n
+    mach : `array`
+        The Mach number at every mesh point \n
+    mach_wave_angle : `array`
+        The Mach wave angle in degrees at every mesh point \n
+    wall_x : `array`
+        The axial coordinates of the contour, starting at the throat \n
+    wall_y : `array`
+        The radial coordinates of the contour, starting at the throat \n
+
+    Methods
+    -------
+    plot()
+        Plot the characteristic mesh and the contour \n
+    """
+
+    def __init__(self, exit_mach: float, characteristic_lines: int, axisymmetric=False, throat_radius=0, gas=air):
+        """Preallocate the mesh arrays
+
+        Row zero of the internal arrays holds the throat, where every right
+        running characteristic starts. The public attributes are views that
+        leave it out.
+
+        """
+
+        n = characteristic_lines
+        self.exit_mach = exit_mach
+        self.characteristic_lines = n
+        self.gas = gas
+        self.axisymmetric = axisymmetric
+        self.throat_radius = throat_radius
+        self._x = np.full((n+1, n+1), np.nan)
+        self._y = np.full((n+1, n+1), np.nan)
+        self._theta = np.full((n+1, n+1), np.nan)
+        self._nu = np.full((n+1, n+1), np.nan)
+        self._mach = np.full((n+1, n+1), np.nan)
+        self._mu = np.full((n+1, n+1), np.nan)
+
+    x = property(lambda self: self._x[1:])
+    y = property(lambda self: self._y[1:])
+    theta = property(lambda self: self._theta[1:])
+    nu = property(lambda self: self._nu[1:])
+    mach = property(lambda self: self._mach[1:])
+    mach_wave_angle = property(lambda self: self._mu[1:])
+
+    @property
+    def wall_x(self):
+        if self.throat_radius == 0:
+            return self._x[:, -1]
+        return np.concatenate(([0], self._x[0, :-1], self._x[1:, -1]))
+
+    @property
+    def wall_y(self):
+        if self.throat_radius == 0:
+            return self._y[:, -1]
+        return np.concatenate(([1], self._y[0, :-1], self._y[1:, -1]))
+
+    @property
+    def area_ratio(self) -> float:
+        """The exit area over the throat area of the contour"""
+
+        ratio = self.wall_y[-1] / self.wall_y[0]
+        if self.axisymmetric:
+            return ratio**2
+        return ratio
+
+    def plot(self, dark=True):
+        """Plot the characteristic mesh and the contour
+
+        Parameters
+        ----------
+        dark : `bool`
+            Dark mode for the plot. Default is true.\n
+        """
+
+        if dark == True:
+            plt.style.use('dark_background')
+            line_color = 'w'
+        else:
+            plt.style.use('default')
+            line_color = 'k'
+
+        n = self.characteristic_lines
+        fig, ax = plt.subplots()
+        for j in range(n):
+            ax.plot(self._x[:j+2, j], self._y[:j+2, j], color=line_color, alpha=0.5, linewidth=.5)
+        for i in range(1, n+1):
+            ax.plot(self._x[i, i-1:], self._y[i, i-1:], color=line_color, alpha=0.5, linewidth=.5)
+        ax.plot(self.wall_x, self.wall_y)
+        ax.grid(which='both', axis='both', alpha=.1)
+        ax.axis('equal')
+        ax.set_xlabel(r'$x$')
+        ax.set_ylabel(r'$y$', rotation=0)
+        plt.title(r'$Method \ of \ Characteristics \ Nozzle$')
+        plt.show()
+
+
+
+#==================================================
+#unit process
+#==================================================
+def _unit_process(a: tuple, b: tuple, axis, delta: int, gas=air, tol=1e-9, maxiter=50) -> tuple:
+    """Locate and solve a front of mesh points from the points upstream of them
+
+    Notes
+    -----
+    Every point lies on the right running characteristic through point a and the
+    left running characteristic through point b, or on the centerline where axis
+    is true. The compatibility relations
+
+        d(theta + nu) =  sin(mu) sin(theta) / y ds    along C-
+        d(theta - nu) = -sin(mu) sin(theta) / y ds    along C+
 
-def method_of_characteristics(exit_mach: float, characteristic_lines: 7, gas=air):
+    carry the axisymmetric source term when delta is one. The first pass uses
+    the planar solution as the predictor, and the corrector evaluates the slopes
+    and source terms of each segment at the average of its end points until the
+    front stops moving. Averaging the end points keeps the source term finite on
+    the centerline, where sin(theta) / y tends to d(theta)/dy. Angles are in
+    radians.
+
+    Parameters
+    ----------
+    a : `tuple`
+        Arrays of x, y, theta, nu and mu at the points on the C- characteristics \n
+    b : `tuple`
+        Arrays of x, y, theta, nu and mu at the points on the C+ characteristics \n
+    axis : `array`
+        True where the point lies on the centerline \n
+    delta : `int`
+        Zero for planar flow, one for axisymmetric flow \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+    tol : `float`
+        The corrector stops once no point moves more than this \n
+    maxiter : `int`
+        The maximum number of corrector passes \n
+
+    Returns
+    -------
+    tuple
+        Arrays of x, y, theta, nu, mu and mach at the new points \n
+    """
+
+    xa, ya, ta, na, ma = a
+    xb, yb, tb, nb, mb = [np.where(axis, 0, v) for v in b]
+    theta = np.where(axis, 0, (ta + na + tb - nb) / 2)
+    nu = np.where(axis, ta + na, (ta + na - tb + nb) / 2)
+    mach = prandtl_meyer_mach_from_angle(np.degrees(nu), gas=gas)
+    mu = np.arcsin(1/mach)
+    x, y = xa, ya
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for n in range(maxiter + 1):
+            slope_a = np.tan((ta + theta)/2 - (ma + mu)/2)
+            slope_b = np.where(axis, 0, np.tan((tb + theta)/2 + (mb + mu)/2))
+            x_new = (yb - ya + slope_a*xa - slope_b*xb) / (slope_a - slope_b)
+            y_new = np.where(axis, 0, ya + slope_a*(x_new - xa))
+            moved = np.nanmax(np.abs(np.concatenate((x_new - x, y_new - y))), initial=0)
+            x, y = x_new, y_new
+            if n > 0 and moved < tol:
+                break
+
+            q_a = delta * np.sin((ma + mu)/2) * np.sin((ta + theta)/2) / ((ya + y)/2)
+            q_b = np.where(axis, 0, delta * np.sin((mb + mu)/2) * np.sin((tb + theta)/2) / ((yb + y)/2))
+            k_minus = ta + na + q_a * np.hypot(x - xa, y - ya)
+            k_plus = tb - nb - q_b * np.hypot(x - xb, y - yb)
+            theta = np.where(axis, 0, (k_minus + k_plus) / 2)
+            nu = np.where(axis, k_minus, (k_minus - k_plus) / 2)
+            mach = _prandtl_meyer_mach(nu, gas.gamma, guess=mach)
+            mu = np.arcsin(1/mach)
+
+    return x, y, theta, nu, mu, mach
+
+
+
+#==================================================
+#method of characteristics
+#==================================================
+def method_of_characteristics(exit_mach: float, characteristic_lines=100, initial_turn=None, axisymmetric=False, throat_radius=0, gas=air) -> Nozzle:
     """Generate a nozzle geometry using the method of characteristics
 
     Notes
     -----
+    Given the design exit Mach number, generate the contour of a nozzle with a
+    throat of unit half height or radius. With a throat radius of zero the flow
+    expands around a sharp corner to give the minimum length nozzle, otherwise
+    the expansion happens along a circular arc to give a finite length nozzle.
+    
+    For a planar nozzle expanding from a corner the Riemann invariant is constant
+    along every characteristic, so the flow angle and Prandtl-Meyer angle of
+    every mesh point follow in closed form from the expansion fan at the throat.
+    The points are then located by intersecting straight characteristic segments
+    one diagonal of the mesh at a time, where every point on a diagonal depends
+    only on the diagonal before it.
+
+    Otherwise each diagonal is solved with a predictor corrector unit process
+    that carries the axisymmetric source term. The maximum wall angle is found
+    so the last characteristic reaches the centerline at the exit Mach number,
+    first on a mesh of 20 lines and then corrected on the full mesh, and the wall is placed along each left running characteristic where the
+    mass flow across it equals the mass flow through the throat. Default fluid
+    is air.
 
     Parameters
     ----------
-    exit_mach : float
-        The design exit mach number
-    characteristic_lines : int
-        The number of characteristic lines used to generate the contour
-    gas : fluid
-        A user defined fluid object. Default is air
+    exit_mach : `float`
+        The design exit mach number \n
+    characteristic_lines : `int`
+        The number of characteristic lines used to generate the contour \n
+    initial_turn : `float`
+        The flow angle in degrees of the first characteristic line. Default
+        spaces the lines evenly from the throat to the maximum wall angle \n
+    axisymmetric : `bool`
+        Design a round nozzle instead of a planar one. Default is false \n
+    throat_radius : `float`
+        The radius of the wall arc downstream of the throat in throat half
+        heights. Default is zero, a sharp corner \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
 
     Returns
     -------
+    Nozzle
+        The nozzle holding the characteristic mesh and the contour \n
 
     Examples
     --------
+    >>> import gas_dynamics as gd
+    >>> nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=150)
+    >>> nozzle.area_ratio
+    1.6871467185755176
+    >>> nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=50, axisymmetric=True)
+    >>> nozzle.plot()
+    >>>
+    """
+
+    n = int(round(characteristic_lines))
+    if n < 2:
+        n = 2
+
+    nozzle = Nozzle(exit_mach, n, axisymmetric=axisymmetric, throat_radius=throat_radius, gas=gas)
+    theta_max = prandtl_meyer_angle_from_mach(exit_mach, gas=gas) / 2
+    if not axisymmetric and throat_radius == 0:
+        _planar_kernel(nozzle, theta_max, initial_turn)
+        return nozzle
+
+    #the planar invariants fix the wall angle whatever the throat radius, while
+    #the axisymmetric wall angle is found on a coarse mesh and then refined
+    delta = 1 if axisymmetric else 0
+    if axisymmetric and n > 20:
+        #the coarse slope of the exit Mach number against the wall angle holds on
+        #the fine mesh, so two secant corrections there are enough
+        coarse = Nozzle(exit_mach, 20, axisymmetric=True, throat_radius=throat_radius, gas=gas)
+        theta_max, slope = _wall_angle(coarse, theta_max, .5*theta_max, initial_turn)
+        _wall_angle(nozzle, theta_max, None, initial_turn, slope=slope, maxiter=2)
+    elif axisymmetric:
+        _wall_angle(nozzle, theta_max, .5*theta_max, initial_turn)
+    else:
+        _march_kernel(nozzle, theta_max, initial_turn, delta)
+    _wall(nozzle, delta)
+    return nozzle
+
+
+
+#==================================================
+#wall angle
+#==================================================
+def _wall_angle(nozzle: Nozzle, first: float, second: float, initial_turn=None, slope=None, tol=1e-9, maxiter=50) -> tuple:
+    """Find the maximum wall angle of an axisymmetric nozzle with the secant
+    method, leaving the mesh of the final iterate in the nozzle, and return it
+    with the last slope of the exit Mach number against the angle
+
+    A slope known from a coarser mesh takes the place of the second guess, so the
+    first correction only needs the march at the first guess.
 
     """
 
-    characteristic_lines
-    if isinstance(characteristic_lines, int) == False:
-        c_lines = round(characteristic_lines) + 1
-    if characteristic_lines < 2 :
-        characteristic_lines += 1
-
-###Create c class to contain all of the data for a line
-class Characteristic_line:
-    def __init__(self, number):
-        #this is K+ line, or "Right running line (bottom to top)"
-        self.line = number          #the line number
-        self.x = []                 #x coordinate of point
-        self.y = []                 #y coordinate of point
-        self.k_minus = []           #value of k-
-        self.k_plus = []            #value of k+
-        self.theta = []             #amount which the flow has turned
-        self.nu = []                #the prandtl meyer turn angle corresponding to the mach number
-        self.mach = []              #the mach number
-        self.mach_wave_angle = []   #the mach wave angle
-
-#Create a class to store all of the lines
-class Nozzle:
-    def __init__(self, num_lines):
-        self.lines = []
-        self.make_lines(num_lines)
-        self.x = [0]
-        self.y = [1]
-
-    def make_lines(self, num_lines):
-        for n in range(num_lines):
-            self.lines.append(Characteristic_line(n))
-
-
-#add a number of lines to the nozzle class
-#TODO: Variable me
-nozzle = Nozzle(100)
-
-#determine a mach number
-#TODO: Variable me
-exit_mach = 2
-
-#get the number of lines
-num_lines = len(nozzle.lines)
-theta_max = prandtl_meyer_turn(mach=exit_mach) / 2
-
-#determine all the turn angles for the lines
-#TODO: Variable me
-initial_turn = .01
-theta_to_go = theta_max - initial_turn
-theta_steps = theta_to_go / (num_lines - 1)
-fig, ax = plt.subplots()
-
-#initialize some values in the first line
-[nozzle.lines[0].theta.append(initial_turn + (n)*theta_steps) for n in range(num_lines)]
-[nozzle.lines[0].k_plus.append(0) for n in range(num_lines)] 
-[nozzle.lines[0].k_minus.append(2*(initial_turn + (n)*theta_steps)) for n in range(num_lines)]
-[nozzle.lines[0].nu.append(nu) for nu in nozzle.lines[0].theta]
-[nozzle.lines[0].mach.append(prandtl_meyer_mach(nu)) for nu in nozzle.lines[0].nu]
-[nozzle.lines[0].mach_wave_angle.append(mach_wave_angle(mach)) for mach in nozzle.lines[0].mach]
-
-#create values on the first line
-for n, line in enumerate(nozzle.lines):
-    if n == 0:
-        continue
-    for m, k_minus in enumerate(nozzle.lines[n-1].k_minus[1:]):
-        k_plus = -nozzle.lines[0].k_minus[n]
-        line.k_plus.append(k_plus)
-        line.k_minus.append(k_minus)
-        if line.theta == []:
-            line.theta.append(0)
-        else:
-            theta = .5 * (k_minus + k_plus)
-            line.theta.append(theta)
-        nu = .5 * (k_minus - k_plus)
-        line.nu.append(nu)
-        mach = prandtl_meyer_mach(nu)
-        line.mach.append(mach)
-        wave_angle = mach_wave_angle(mach)
-        line.mach_wave_angle.append(wave_angle)
-
-#get points on first line
-for n, theta in enumerate(nozzle.lines[0].theta):
-    if n == 0:
-        slope = tand(theta - nozzle.lines[n].mach_wave_angle[n])
-        nozzle.lines[n].x.append( nozzle.y / -slope)
-        nozzle.lines[n].y.append(0)
-        continue
-
-    slope_down = tand(nozzle.lines[0].theta[n] - nozzle.lines[0].mach_wave_angle[n])
-    line_down = lambda x : slope_down*x + 1
-
-    slope_up = tand(nozzle.lines[0].theta[n-1] + nozzle.lines[0].mach_wave_angle[n-1])
-    b = nozzle.lines[0].y[n-1] -(slope_up * nozzle.lines[0].x[n-1])
-    
-    line_up = lambda x : slope_up*x + b
-    zero = lambda x : line_down(x) - line_up(x)
-    x = fsolve(zero,1)
-
-    nozzle.lines[0].x.append(x[0])
-    nozzle.lines[0].y.append(line_down(x[0]))
-
-for n, line in enumerate(nozzle.lines):
-    if n == 0:
-        continue
-    for m, theta in enumerate(line.theta):
-        if m == 0:
-            slope = tand(0 - line.mach_wave_angle[m])
-            b = nozzle.lines[n-1].y[m+1] - slope * nozzle.lines[n-1].x[m+1]
-            line.x.append(-b/slope)
-            line.y.append(0)
-            continue
-        
-        slope_down = tand(theta - line.mach_wave_angle[m])
-        b_down = nozzle.lines[n-1].y[m] - (slope_down * nozzle.lines[n-1].x[m])
-        line_down = lambda x : slope_down*x + b_down
-
-        slope_up = tand(line.theta[m-1] + line.mach_wave_angle[m-1])
-        b_up = line.y[m-1] - (slope_up * line.x[m-1])
-        line_up = lambda x : slope_up*x + b_up
-
-        zero = lambda x : line_down(x) - line_up(x)
-        x = fsolve(zero,1)
-
-        line.x.append(x[0])
-        line.y.append(line_down(x[0]))
-        print()
-
-#finally go for the contour
-#duplicate the angle at every final point
-for line in nozzle.lines:
-    line.theta.append(line.theta[-1])
-    line.mach_wave_angle.append(line.mach_wave_angle[-1])
-
-
-for n, line in enumerate(nozzle.lines[:-1]):
-    if n == 0:
-        slope = tand((line.theta[-1]))
-        b_up = 1
-        contour_line = lambda x : x*slope + b_up
-
-        slope2 = tand(line.mach_wave_angle[-1])
-        b_up2 = line.y[-1] - slope2*line.x[-1]
-        line_up = lambda x : x*slope2 + b_up2
-
-        zero = lambda x : contour_line(x) - line_up(x)
-        x = fsolve(zero,1)
-        line.x.append(x[0])
-        line.y.append(contour_line(x[0]))
-        nozzle.x.append(x[0])
-        nozzle.y.append(contour_line(x[0]))
-        continue
-
-    slope = .5 * tand(line.theta[-1])
-    b_up = nozzle.lines[n-1].y[-1] - slope*nozzle.lines[n-1].x[-1]
-    contour_line = lambda x : x*slope + b_up
-
-    slope2 = tand(line.mach_wave_angle[-1])
-    b_up2 = line.y[-1] - slope2*line.x[-1]
-    line_up = lambda x : x*slope2 + b_up2
-
-    zero = lambda x : contour_line(x) - line_up(x)
-    x = fsolve(zero,1)
-    line.x.append(x[0])
-    line.y.append(contour_line(x[0]))
-    nozzle.x.append(x[0])
-    nozzle.y.append(contour_line(x[0]))
-
-for line in nozzle.lines:
-    ax.plot(line.x, line.y, color='k', alpha=0.5)
-
-ax.plot(nozzle.x, nozzle.y)
-ax.grid(which='both', axis='both')
-ax.axis('equal')
-ax.set_xlabel(r'$Z$')
-ax.set_ylabel(r'$X$', rotation=0)
-ax.set_ylim(-.5, 2)
-ax.set_xlim(-.5, 4)
-
-plt.title(r'$Method \ of \ Characteristics \ Nozzle$')
-plt.legend(title=r'$Characteristic \ Lines$')
-print('To get an appropriate resolution, the initial turn angle needs to be around .01 degrees and 150 characteristic lines compared with the area ratio required')
-plt.show()
\ No newline at end of file
+    angle, error = first, _march_kernel(nozzle, first, initial_turn) - nozzle.exit_mach
+    if slope is None:
+        previous, previous_error = angle, error
+        angle, error = second, _march_kernel(nozzle, second, initial_turn) - nozzle.exit_mach
+        slope = (error - previous_error) / (angle - previous)
+    for _ in range(maxiter):
+        if abs(error) < tol or slope == 0:
+            break
+        step = -error / slope
+        angle += step
+        previous_error, error = error, _march_kernel(nozzle, angle, initial_turn) - nozzle.exit_mach
+        slope = (error - previous_error) / step
+    return angle, slope
+
+
+
+#==================================================
+#planar kernel
+#==================================================
+def _planar_kernel(nozzle: Nozzle, theta_max: float, initial_turn=None):
+    """Fill the mesh of a planar minimum length nozzle in closed form
+
+    """
+
+    n, gas = nozzle.characteristic_lines, nozzle.gas
+    if initial_turn is None:
+        initial_turn = theta_max / n
+    fan = np.linspace(initial_turn, theta_max, n)
+    nozzle.theta_max = theta_max
+    x, y, theta, nu, mach, mu = nozzle._x, nozzle._y, nozzle._theta, nozzle._nu, nozzle._mach, nozzle._mu
+
+    #the throat, where the flow angle equals the Prandtl-Meyer angle of each line
+    x[0], y[0] = 0, 1
+    theta[0, :n], nu[0, :n] = fan, fan
+    theta[0, n] = theta_max
+
+    #the invariants fix the state of every point, with the wall taking the state
+    #of the last point on its left running characteristic
+    i, j = np.triu_indices(n)
+    theta[i+1, j] = fan[j] - fan[i]
+    nu[i+1, j] = fan[j] + fan[i]
+    theta[1:, n], nu[1:, n] = theta[1:, n-1], nu[1:, n-1]
+
+    #with evenly spaced lines the Prandtl-Meyer angle only depends on i + j
+    step = fan[1] - fan[0]
+    mach_diagonal = prandtl_meyer_mach_from_angle(2*initial_turn + step*np.arange(2*n-1), gas=gas)
+    mach[0, :n] = prandtl_meyer_mach_from_angle(fan, gas=gas)
+    mach[i+1, j] = mach_diagonal[i+j]
+    mach[1:, n] = mach[1:, n-1]
+    mu[:] = mach_wave_angle(mach)
+
+    #sweep the diagonals i + j = s, intersecting the right running segment from
+    #(i-1, j) with the left running segment from (i, j-1). The centerline is a
+    #left running segment of zero slope and the wall replaces the right running
+    #segment with the average wall angle.
+    with np.errstate(invalid='ignore'):
+        for s in range(2*n):
+            i = np.arange(max(0, s-n), s//2 + 1)
+            j = s - i
+            r = i + 1
+            axis = i == j
+            wall = j == n
+            jb = np.where(axis, j, j-1)
+
+            theta_p, mu_p = theta[r, j], mu[r, j]
+            xa, ya = x[r-1, j], y[r-1, j]
+            xb, yb = x[r, jb], y[r, jb]
+
+            slope_a = np.where(wall, tand((theta[r-1, j] + theta_p)/2), tand((theta[r-1, j] + theta_p)/2 - (mu[r-1, j] + mu_p)/2))
+            slope_b = np.where(axis, 0, tand((theta[r, jb] + theta_p)/2 + (mu[r, jb] + mu_p)/2))
+            yb = np.where(axis, 0, yb)
+            xb = np.where(axis, 0, xb)
+
+            x_p = (yb - ya + slope_a*xa - slope_b*xb) / (slope_a - slope_b)
+            x[r, j] = x_p
+            y[r, j] = ya + slope_a*(x_p - xa)
+
+
+
+#==================================================
+#marched kernel
+#==================================================
+def _march_kernel(nozzle: Nozzle, theta_max: float, initial_turn=None, delta=1) -> float:
+    """March the interior of the mesh with the unit process and return the
+    Mach number where the last characteristic meets the centerline
+
+    """
+
+    n, gas, radius = nozzle.characteristic_lines, nozzle.gas, nozzle.throat_radius
+    if initial_turn is None:
+        initial_turn = theta_max / n
+    fan = np.radians(np.linspace(initial_turn, theta_max, n))
+    nozzle.theta_max = theta_max
+    x, y, theta, nu, mach, mu = nozzle._x, nozzle._y, nozzle._theta, nozzle._nu, nozzle._mach, nozzle._mu
+    for array in (x, y, theta, nu, mach, mu):
+        array[:] = np.nan
+
+    #the expansion along the throat arc, or around the corner when it has no radius
+    x[0, :n] = radius * np.sin(fan)
+    y[0, :n] = 1 + radius * (1 - np.cos(fan))
+    theta[0, :n], nu[0, :n] = fan, fan
+    mach[0, :n] = prandtl_meyer_mach_from_angle(np.degrees(fan), gas=gas)
+    mu[0, :n] = np.arcsin(1/mach[0, :n])
+
+    for s in range(2*n - 1):
+        i = np.arange(max(0, s-n+1), s//2 + 1)
+        j = s - i
+        r = i + 1
+        axis = i == j
+        jb = np.where(axis, j, j-1)
+        a = (x[r-1, j], y[r-1, j], theta[r-1, j], nu[r-1, j], mu[r-1, j])
+        b = (x[r, jb], y[r, jb], theta[r, jb], nu[r, jb], mu[r, jb])
+        x[r, j], y[r, j], theta[r, j], nu[r, j], mu[r, j], mach[r, j] = _unit_process(a, b, axis, delta, gas=gas)
+
+    return mach[n, n-1]
+
+
+
+#==================================================
+#wall from mass flow
+#==================================================
+def _wall(nozzle: Nozzle, delta=1):
+    """Place the wall on every left running characteristic where the mass flow
+    across it matches the throat, then store the mesh in degrees
+
+    Notes
+    -----
+    Across a characteristic the normal velocity is the speed of sound, so the
+    mass flow through a segment is the integral of rho a y^delta ds. The flow
+    from the last mesh point to the wall takes the state of that point.
+
+    """
+
+    n, gas = nozzle.characteristic_lines, nozzle.gas
+    x, y, theta, nu, mach, mu = nozzle._x, nozzle._y, nozzle._theta, nozzle._nu, nozzle._mach, nozzle._mu
+    gamma = gas.gamma
+
+    def flux(mach):
+        return (1 + (gamma-1)/2 * mach**2) ** (-(gamma+1)/(2*(gamma-1)))
+
+    #mass flow across each left running characteristic from the centerline
+    i, j = np.triu_indices(n)
+    rho_a = np.full((n+1, n), np.nan)
+    rho_a[i+1, j] = flux(mach[i+1, j])
+    weight = rho_a * y[:, :n]**delta
+    ds = np.hypot(np.diff(x[:, :n], axis=1), np.diff(y[:, :n], axis=1))
+    segment = np.nan_to_num((weight[:, 1:] + weight[:, :-1]) / 2 * ds)
+    carried = segment.sum(axis=1)[1:]
+
+    throat = flux(1) / (1 + delta)
+    remaining = throat - carried
+    xb, yb, tb, mb = x[1:, n-1], y[1:, n-1], theta[1:, n-1], mu[1:, n-1]
+    c = remaining / rho_a[1:, n-1]
+    if delta:
+        length = 2*c / (yb + (yb**2 + 2*np.sin(tb + mb)*c)**.5)
+    else:
+        length = c
+
+    x[1:, n] = xb + length*np.cos(tb + mb)
+    y[1:, n] = yb + length*np.sin(tb + mb)
+    x[0, n], y[0, n] = x[0, n-1], y[0, n-1]
+    theta[:, n], nu[:, n], mach[:, n], mu[:, n] = theta[:, n-1], nu[:, n-1], mach[:, n-1], mu[:, n-1]
+    theta[0, n] = theta[0, n-1]
+
+    theta[:] = np.degrees(theta)
+    nu[:] = np.degrees(nu)
+    mu[:] = np.degrees(mu)
+
+
+
+#==================================================
+#nozzle sweep
+#==================================================
+def nozzle_sweep(exit_mach, gamma, characteristic_lines=100, axisymmetric=False, throat_radius=0, directory='nozzles',
+    max_workers=None, chunksize=1, gas=air) -> list:
+    """Design a family of nozzles over exit Mach numbers and ratios of specific heats
+
+    Notes
+    -----
+    Every combination of exit Mach number and ratio of specific heats is
+    designed with the method of characteristics on a process pool, and the
+    contour of each case is written to its own compressed .npz file as soon as
+    it finishes, so only the file names are held in memory. Cases whose file
+    already exists are skipped, which resumes a sweep that was interrupted.
+    Files are written under a temporary name and renamed once complete, so a
+    partial file is never mistaken for a finished case. The name of a file ends
+    in a digest of all the parameters of its case, so a sweep with other design
+    parameters never takes up the files of another. The gas constant is
+    taken from the gas. Default fluid is air.
+
+    Each file holds the arrays wall_x and wall_y and the scalars exit_mach,
+    gamma, theta_max and area_ratio.
+
+    Parameters
+    ----------
+    exit_mach : `array_like`
+        The design exit Mach numbers \n
+    gamma : `array_like`
+        The ratios of specific heats \n
+    characteristic_lines : `int`
+        The number of characteristic lines used to generate each contour \n
+    axisymmetric : `bool`
+        Design round nozzles instead of planar ones. Default is false \n
+    throat_radius : `float`
+        The radius of the wall arc downstream of the throat in throat half
+        heights. Default is zero, a sharp corner \n
+    directory : `str`
+        The directory the case files are written to \n
+    max_workers : `int`
+        The number of worker processes. Default is the number of processors,
+        and one designs every case in this process \n
+    chunksize : `int`
+        The number of cases handed to a worker at a time \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    list
+        The path of every case file, ordered by exit Mach number and then by
+        ratio of specific heats \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> import numpy as np
+    >>> paths = gd.nozzle_sweep(exit_mach=[2, 2.5, 3], gamma=[1.3, 1.4], characteristic_lines=50)
+    >>> len(paths)
+    6
+    >>> contour = np.load(paths[0])
+    >>> contour['area_ratio']
+    array(1.77143971)
+    >>>
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    cases = []
+    for mach, k in product(np.atleast_1d(exit_mach), np.atleast_1d(gamma)):
+        parameters = (float(mach), float(k), int(characteristic_lines), bool(axisymmetric), float(throat_radius), float(gas.R))
+        #the digest of every parameter keeps cases of other designs, or nearby ones, apart
+        name = 'nozzle_mach_{:.6g}_gamma_{:.6g}_{}.npz'.format(mach, k, sha1(repr(parameters).encode()).hexdigest()[:12])
+        cases.append((os.path.join(directory, name),) + parameters)
+
+    remaining = [case for case in cases if not os.path.exists(case[0])]
+    if max_workers == 1:
+        for case in remaining:
+            _sweep_case(case)
+    elif remaining:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for _ in executor.map(_sweep_case, remaining, chunksize=chunksize):
+                pass
+
+    return [case[0] for case in cases]
+
+
+
+def _sweep_case(case: tuple) -> str:
+    """Design a single case of a nozzle sweep and write its contour
+
+    """
+
+    path, mach, gamma, lines, axisymmetric, throat_radius, R = case
+    gas = fluid('sweep', gamma, R)
+    nozzle = method_of_characteristics(mach, lines, axisymmetric=axisymmetric, throat_radius=throat_radius, gas=gas)
+    partial = path + '.part'
+    with open(partial, 'wb') as f:
+        np.savez_compressed(f, wall_x=nozzle.wall_x, wall_y=nozzle.wall_y, exit_mach=mach, gamma=gamma,
+            theta_max=nozzle.theta_max, area_ratio=nozzle.area_ratio)
+    os.replace(partial, path)
+    return path
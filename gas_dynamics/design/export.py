@@ -0,0 +1,273 @@
+#!usr/bin/env
+#Writers for the characteristic meshes and contours of the method of
+#characteristics. Every writer dumps whole numpy buffers to the file, so the
+#only text formatted per point is done with a single format operation.
+#
+#
+#Copyright 2020 by Fernando A de la Fuente
+#All rights reserved
+
+import numpy as np
+from gas_dynamics.standard.standard import stagnation_pressure_ratio
+from gas_dynamics.design.design import Nozzle
+
+
+
+#==================================================
+#mesh
+#==================================================
+def _mesh(result) -> tuple:
+    """Return the points, cells and fields of a nozzle or flow field
+
+    Notes
+    -----
+    The cells are the quadrilaterals bounded by two characteristics of each
+    family. Cells that lose a corner on the centerline or the wall are kept as
+    triangles, and cells with fewer corners are dropped. Points outside the
+    mesh are removed, coincident points are merged and the cells renumbered,
+    with their corners in counter-clockwise order.
+
+    Returns
+    -------
+    tuple
+        The points as an array of shape (n, 3), the corner indices of every
+        cell one after the other, the number of corners of every cell and a
+        dict of the point fields \n
+    """
+
+    if isinstance(result, Nozzle):
+        x, y, theta, mach = result._x, result._y, result._theta, result._mach
+        pressure = stagnation_pressure_ratio(mach, gas=result.gas)
+        index = np.arange(x.size).reshape(x.shape)
+        #the lattice of row i and column j
+        corners = [index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]]
+    else:
+        x, y, theta, mach, pressure = result.x, result.y, result.theta, result.mach, result.pressure
+        rows, columns = x.shape
+        index = np.arange(x.size).reshape(x.shape)
+        #the diamond from point k of front m to point k of front m + 2, with the
+        #points of front m + 1 that lie between them
+        padded = np.full((rows, columns + 1), -1)
+        padded[:, 1:] = index
+        below = np.where((np.arange(rows - 2) % 2 == 0)[:, None], padded[1:-1, :-1], padded[1:-1, 1:])
+        above = np.where((np.arange(rows - 2) % 2 == 0)[:, None], padded[1:-1, 1:], np.append(padded[1:-1, 2:], np.full((rows - 2, 1), -1), axis=1))
+        corners = [index[:-2], below, index[2:], above]
+
+    corners = np.stack([c.ravel() for c in corners], axis=1)
+    valid = np.isfinite(x.ravel())
+    present = (corners >= 0) & valid[np.where(corners >= 0, corners, 0)]
+
+    #coincident points, such as the fan of a sharp throat corner, are merged into
+    #the first of them, and a corner repeated within a cell is dropped
+    coordinates = np.stack((x.ravel(), y.ravel()), axis=1)
+    _, first, inverse = np.unique(coordinates[valid], axis=0, return_index=True, return_inverse=True)
+    merged = np.full(x.size, -1)
+    merged[valid] = np.flatnonzero(valid)[first][inverse.ravel()]
+    corners = np.where(present, merged[np.where(present, corners, 0)], -1)
+    for k in range(1, 4):
+        present[:, k] &= ~np.any(present[:, :k] & (corners[:, :k] == corners[:, k:k+1]), axis=1)
+
+    #move the corners of every cell to the front and keep the cells with three or more
+    order = np.argsort(~present, axis=1, kind='stable')
+    corners, present = np.take_along_axis(corners, order, axis=1), np.take_along_axis(present, order, axis=1)
+    count = present.sum(axis=1)
+    corners, present, count = corners[count >= 3], present[count >= 3], count[count >= 3]
+
+    #the shoelace area, with a triangle closed on its first corner, and the cells
+    #turned counter-clockwise so their normals point out of the plane
+    closed = np.where(present, corners, corners[:, :1])
+    xc, yc = x.ravel()[closed], y.ravel()[closed]
+    area = np.sum(xc*np.roll(yc, -1, axis=1) - np.roll(xc, -1, axis=1)*yc, axis=1) / 2
+    corners = np.where(area[:, None] < 0, np.where(count[:, None] == 4, corners[:, [0, 3, 2, 1]], corners[:, [0, 2, 1, 3]]), corners)
+    corners, present, count = corners[area != 0], present[area != 0], count[area != 0]
+
+    #renumber the points that remain
+    kept = valid & (merged == np.arange(x.size))
+    number = np.cumsum(kept) - 1
+    points = np.stack((x.ravel()[kept], y.ravel()[kept], np.zeros(kept.sum())), axis=1)
+    cells = number[corners[present]]
+    fields = {'mach': mach.ravel()[kept], 'pressure': np.asarray(pressure).ravel()[kept], 'theta': theta.ravel()[kept]}
+    return points, cells, count, fields
+
+
+
+#==================================================
+#write vtk
+#==================================================
+def write_vtk(result, path: str):
+    """Write the characteristic mesh to a legacy binary VTK file
+
+    Notes
+    -----
+    Given a nozzle from the method of characteristics or a flow field from its
+    analysis, write the mesh points, the cells between the characteristics and
+    the Mach number, pressure and flow angle at every point as an unstructured
+    grid that ParaView can open.
+
+    Parameters
+    ----------
+    result : `Nozzle` or `FlowField`
+        The characteristic mesh to write \n
+    path : `str`
+        The file to write, usually ending in .vtk \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=100)
+    >>> gd.write_vtk(nozzle, 'nozzle.vtk')
+    >>>
+    """
+
+    points, cells, count, fields = _mesh(result)
+    offsets = np.concatenate(([0], np.cumsum(count)))
+    connectivity = np.empty(len(count) + len(cells), dtype='>i4')
+    starts = offsets[:-1] + np.arange(len(count))
+    connectivity[starts] = count
+    mask = np.ones(len(connectivity), dtype=bool)
+    mask[starts] = False
+    connectivity[mask] = cells
+    types = np.where(count == 4, 9, 5).astype('>i4')
+
+    with open(path, 'wb') as f:
+        f.write(b'# vtk DataFile Version 3.0\nmethod of characteristics\nBINARY\nDATASET UNSTRUCTURED_GRID\n')
+        f.write(b'POINTS %d double\n' % len(points))
+        f.write(points.astype('>f8'))
+        f.write(b'\nCELLS %d %d\n' % (len(count), len(connectivity)))
+        f.write(connectivity)
+        f.write(b'\nCELL_TYPES %d\n' % len(count))
+        f.write(types)
+        f.write(b'\nPOINT_DATA %d\n' % len(points))
+        for name, values in fields.items():
+            f.write(b'SCALARS %s double 1\nLOOKUP_TABLE default\n' % name.encode())
+            f.write(values.astype('>f8'))
+            f.write(b'\n')
+
+
+
+#==================================================
+#write vtu
+#==================================================
+def write_vtu(result, path: str):
+    """Write the characteristic mesh to a VTK XML unstructured grid file
+
+    Notes
+    -----
+    Given a nozzle from the method of characteristics or a flow field from its
+    analysis, write the mesh points, the cells between the characteristics and
+    the Mach number, pressure and flow angle at every point. The arrays are
+    appended to the file as raw binary blocks.
+
+    Parameters
+    ----------
+    result : `Nozzle` or `FlowField`
+        The characteristic mesh to write \n
+    path : `str`
+        The file to write, usually ending in .vtu \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=100)
+    >>> gd.write_vtu(nozzle, 'nozzle.vtu')
+    >>>
+    """
+
+    points, cells, count, fields = _mesh(result)
+    arrays = [('Points', points.astype('<f8')), ('connectivity', cells.astype('<i8')), ('offsets', np.cumsum(count).astype('<i8')),
+        ('types', np.where(count == 4, 9, 5).astype('u1'))]
+    arrays += [(name, values.astype('<f8')) for name, values in fields.items()]
+    types = {'f': 'Float64', 'i': 'Int64', 'u': 'UInt8'}
+
+    #every block is its length in bytes followed by the data
+    tags, offset = {}, 0
+    for name, values in arrays:
+        components = ' NumberOfComponents="3"' if values.ndim == 2 else ''
+        tags[name] = '<DataArray type="%s" Name="%s"%s format="appended" offset="%d"/>' % (
+            types[values.dtype.kind], name, components, offset)
+        offset += 8 + values.nbytes
+
+    header = '\n'.join((
+        '<?xml version="1.0"?>',
+        '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">',
+        '<UnstructuredGrid>',
+        '<Piece NumberOfPoints="%d" NumberOfCells="%d">' % (len(points), len(count)),
+        '<PointData Scalars="mach">', *[tags[name] for name in fields], '</PointData>',
+        '<Points>', tags['Points'], '</Points>',
+        '<Cells>', tags['connectivity'], tags['offsets'], tags['types'], '</Cells>',
+        '</Piece>',
+        '</UnstructuredGrid>',
+        '<AppendedData encoding="raw">',
+        '_'))
+
+    with open(path, 'wb') as f:
+        f.write(header.encode())
+        for name, values in arrays:
+            f.write(np.array([values.nbytes], dtype='<u8'))
+            f.write(np.ascontiguousarray(values))
+        f.write(b'\n</AppendedData>\n</VTKFile>\n')
+
+
+
+#==================================================
+#write contour csv
+#==================================================
+def write_contour_csv(result, path: str):
+    """Write the wall contour to a comma separated file of x, y points
+
+    Parameters
+    ----------
+    result : `Nozzle` or `FlowField`
+        The nozzle or flow field holding the wall \n
+    path : `str`
+        The file to write, usually ending in .csv \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=100)
+    >>> gd.write_contour_csv(nozzle, 'contour.csv')
+    >>>
+    """
+
+    points = np.stack((result.wall_x, result.wall_y), axis=1)
+    points = points[np.isfinite(points).all(axis=1)]
+    with open(path, 'w') as f:
+        f.write('x,y\n')
+        f.write(('%.17g,%.17g\n' * len(points)) % tuple(points.ravel()))
+
+
+
+#==================================================
+#write contour dxf
+#==================================================
+def write_contour_dxf(result, path: str):
+    """Write the wall contour to a DXF file as a single polyline
+
+    Notes
+    -----
+    The polyline is written as an R12 POLYLINE entity, which any CAD program
+    can import, with the coordinates in throat half heights or radii.
+
+    Parameters
+    ----------
+    result : `Nozzle` or `FlowField`
+        The nozzle or flow field holding the wall \n
+    path : `str`
+        The file to write, usually ending in .dxf \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=100)
+    >>> gd.write_contour_dxf(nozzle, 'contour.dxf')
+    >>>
+    """
+
+    points = np.stack((result.wall_x, result.wall_y), axis=1)
+    points = points[np.isfinite(points).all(axis=1)]
+    vertex = '0\nVERTEX\n8\n0\n10\n%.17g\n20\n%.17g\n30\n0.0\n'
+    with open(path, 'w') as f:
+        f.write('0\nSECTION\n2\nENTITIES\n0\nPOLYLINE\n8\n0\n66\n1\n70\n0\n')
+        f.write((vertex * len(points)) % tuple(points.ravel()))
+        f.write('0\nSEQEND\n0\nENDSEC\n0\nEOF\n')
@@ -6,6 +6,7 @@
 #returns
 #   `type`
 
+import weakref
 import numpy as np
 
 
@@ -280,4 +281,179 @@ def lin_interpolate(x, x0, x1, y0, y1):
     """
 
     y = y0 + (x-x0) * (y1-y0)/(x1-x0)
-    return y
\ No newline at end of file
+    return y
+
+
+#==================================================
+#bracketed newton
+#==================================================
+def _bracketed_newton(func, derivative, lower, upper, args=(), guess=None, increasing=True, tol=1e-12, maxiter=100):
+    """Vectorized Newton iteration safeguarded by bisection on a bracket
+
+    Notes
+    -----
+    Every element of the problem is solved at once. A Newton step that leaves
+    the bracket or is not finite is replaced by a bisection step, and the
+    bracket is tightened on every iteration, so each element converges to the
+    root inside its own bracket. Only the elements that have not converged are
+    evaluated on later iterations.
+
+    Parameters
+    ----------
+    func : `callable`
+        The function to zero, called as func(x, *args) \n
+    derivative : `callable`
+        The derivative of func with respect to x, called as derivative(x, *args) \n
+    lower : `array_like`
+        The lower end of the bracket \n
+    upper : `array_like`
+        The upper end of the bracket \n
+    args : `tuple`
+        Extra arrays broadcast against the bracket and handed to func \n
+    guess : `array_like`
+        The initial guess. Default is the middle of the bracket \n
+    increasing : `array_like`
+        True where func is increasing over the bracket \n
+    tol : `float`
+        The convergence tolerance \n
+    maxiter : `int`
+        The maximum number of iterations \n
+
+    Returns
+    -------
+    tuple
+        The roots and the number of iterations each element took \n
+    """
+
+    if guess is None:
+        guess = (np.asarray(lower, dtype=float) + np.asarray(upper, dtype=float)) / 2
+    arrays = np.broadcast_arrays(np.asarray(lower, dtype=float), np.asarray(upper, dtype=float),
+        np.asarray(guess, dtype=float), np.asarray(increasing, dtype=bool), *args)
+    shape = arrays[0].shape
+    lower, upper, x, increasing = [np.array(a, dtype=a.dtype).ravel() for a in arrays[:4]]
+    args = [np.ravel(a) for a in arrays[4:]]
+    x = np.clip(x, lower, upper)
+    iterations = np.zeros(x.size, dtype=int)
+
+    active = np.flatnonzero(np.isfinite(x))
+    with np.errstate(all='ignore'):
+        for _ in range(maxiter):
+            if active.size == 0:
+                break
+            xa, la, ua = x[active], lower[active], upper[active]
+            sub_args = [a[active] for a in args]
+            f = func(xa, *sub_args)
+            df = derivative(xa, *sub_args)
+            iterations[active] += 1
+
+            below = (f < 0) == increasing[active]
+            la = np.where(below, xa, la)
+            ua = np.where(below, ua, xa)
+            step = f / df
+            x_new = xa - step
+            outside = ~np.isfinite(x_new) | (x_new < la) | (x_new > ua)
+            x_new = np.where(outside, (la + ua) / 2, x_new)
+
+            x[active], lower[active], upper[active] = x_new, la, ua
+            scale = 1 + np.abs(x_new)
+            done = (f == 0) | (np.abs(x_new - xa) <= tol * scale) | (ua - la <= tol * scale)
+            x[active[f == 0]] = xa[f == 0]
+            active = active[~done]
+
+    return x.reshape(shape), iterations.reshape(shape)
+
+
+
+#==================================================
+#table lookup
+#==================================================
+def table_lookup(table, column: str, value, output=None):
+    """Look up the rows of a table where a column takes a value
+
+    Notes
+    -----
+    The column is split into segments where it is monotone, at the points its
+    differences change sign. Each segment is searched with a binary search and
+    the table is interpolated linearly in the column between the rows on
+    either side, so a column like the maximum fanno parameter, which falls to
+    zero at a Mach number of one and rises again, returns one row for each
+    branch. Rows of segments that do not hold the value are nan. The segments
+    of a column are found once per table and kept while the table lives, so
+    repeated lookups are only the binary searches. A table changed in place
+    should be copied before it is looked up again.
+
+    Parameters
+    ----------
+    table : `ndarray`
+        A structured array with one row per entry, like the fanno tables \n
+    column : `str`
+        The name of the column to search \n
+    value : `array_like`
+        The values to look up \n
+    output : `str`
+        The name of a column to return. Default returns every column \n
+
+    Returns
+    -------
+    ndarray
+        The interpolated rows, with one leading axis entry per monotone
+        segment followed by the shape of the values \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> table = gd.fanno_tables(range=[.1,5], step=.01)
+    >>> gd.table_lookup(table, 'p_pstar', 2, output='mach')
+    array([0.53284302])
+    >>>
+    """
+
+    value = np.asarray(value, dtype=float)
+    rows = []
+    for start, stop, sign, segment in _table_segments(table, column):
+        k = np.clip(np.searchsorted(segment, sign * value), 1, len(segment) - 1)
+        t = (sign*value - segment[k-1]) / (segment[k] - segment[k-1])
+        inside = (sign*value >= segment[0]) & (sign*value <= segment[-1])
+        row = np.full(value.shape, np.nan, dtype=table.dtype)
+        for name in table.dtype.names:
+            lower, upper = table[name][start:stop+1][k-1], table[name][start:stop+1][k]
+            row[name] = np.where(inside, lower + t*(upper - lower), np.nan)
+        row[column] = np.where(inside, value, np.nan)
+        rows.append(row)
+
+    result = np.stack(rows) if rows else np.full((0,) + value.shape, np.nan, dtype=table.dtype)
+    if output is not None:
+        return result[output]
+    return result
+
+
+
+_segments = {}
+
+def _table_segments(table, column: str) -> list:
+    """The monotone segments of a column of a table, each as its start, stop, sign and signed values, worked out once"""
+
+    key = (id(table), column)
+    cached = _segments.get(key)
+    if cached is not None and cached[0]() is table:
+        return cached[1]
+
+    values = np.asarray(table[column], dtype=float)
+    keep = np.isfinite(values)
+
+    #split the column where its differences change sign, keeping flat runs
+    #with the segment before them
+    valid = keep[1:] & keep[:-1]
+    with np.errstate(invalid='ignore'):
+        direction = np.where(valid, np.sign(np.diff(values)), 0)
+    last = np.maximum.accumulate(np.where((direction != 0) | ~valid, np.arange(len(direction)), 0))
+    direction = direction[last]
+    breaks = np.flatnonzero(direction[1:] != direction[:-1]) + 1
+    bounds = np.concatenate(([0], breaks, [len(direction)]))
+    segments = [(start, stop, direction[start], direction[start] * values[start:stop+1])
+        for start, stop in zip(bounds[:-1], bounds[1:]) if direction[start] != 0]
+
+    #the entry goes with the table, so the id of a freed table is never reused for it
+    _segments[key] = (weakref.ref(table), segments)
+    weakref.finalize(table, _segments.pop, key, None)
+    return segments
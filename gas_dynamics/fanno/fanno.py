@@ -7,63 +7,383 @@
 #All rights reserved
 
 from gas_dynamics.fluids import fluid, air
+from gas_dynamics.extra import _bracketed_newton
+from gas_dynamics.units import get_units, to_si, from_si
+from gas_dynamics.standard.standard import _mach_from_area_ratio
+import numpy as np
 from numpy import log
-from scipy.optimize import fsolve
 
 
 
 #==================================================
 #stagnation enthalpy
 #==================================================
-def stagnation_enthalpy(enthalpy: float, gas=air) -> float:
+def stagnation_enthalpy(enthalpy: float, state=None, velocity=None, mass_velocity=None, rho=None, units=None) -> float:
     """Return the stagnation enthalpy
 
     Notes
     -----
-    Given the fluid state and a given enthalpy, return its stagnation
-    enthalpy
+    Given the enthalpy and the velocity of the flow, return its stagnation
+    enthalpy, J/kg in SI units and Btu/lbm in US units. The velocity is given,
+    or the mass velocity and the density, or it is taken from the mass velocity
+    and density of a flow state, whose units are then the default. Every input
+    can be an array and they broadcast against each other. Nothing is stored, on
+    the state or elsewhere, so any number of threads can use it at once.
 
     Parameters
     ----------
-    enthalpy : `float`
+    enthalpy : `array_like`
         The enthalpy of the fluid\n
-    gas : `fluid`
-        A user defined fluid object\n
+    state : `FlowState`
+        The state of the flow, with its density and velocity set\n
+    velocity : `array_like`
+        The velocity of the flow\n
+    mass_velocity : `array_like`
+        The mass flow per unit area\n
+    rho : `array_like`
+        The density\n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the inputs and of the result. Default is the units of the
+        state, or SI \n
 
     Returns
     -------
-    float
+    array_like
         Stagnation enthalpy\n
 
     Examples
     --------
+    >>> import gas_dynamics as gd
+    >>> gd.stagnation_enthalpy([3e5, 4e5], mass_velocity=480, rho=[1.2, 1.6])
+    array([380000., 445000.])
+    >>>
+    """
 
+    if state is not None:
+        units = state.units if units is None else units
+        if velocity is None and mass_velocity is None:
+            mass_velocity, rho = state.mass_velocity, state.rho
+    velocity = _energy_velocity(velocity, mass_velocity, rho, units)
+    ht = to_si(enthalpy, 'specific_energy', units) + velocity**2 / 2
+    return from_si(ht, 'specific_energy', units)
+
+
+
+#==================================================
+#static enthalpy
+#==================================================
+def static_enthalpy(stagnation_enthalpy: float, velocity=None, mass_velocity=None, rho=None, units=None) -> float:
+    """Return the enthalpy given the stagnation enthalpy and the velocity
+
+    Notes
+    -----
+    The inverse of stagnation_enthalpy, h = ht - V^2/2. The velocity is given, or
+    the mass velocity and the density. Every input can be an array and they
+    broadcast against each other.
+
+    Parameters
+    ----------
+    stagnation_enthalpy : `array_like`
+        The stagnation enthalpy\n
+    velocity : `array_like`
+        The velocity of the flow\n
+    mass_velocity : `array_like`
+        The mass flow per unit area\n
+    rho : `array_like`
+        The density\n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the inputs and of the result. Default is SI \n
+
+    Returns
+    -------
+    array_like
+        The enthalpy\n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.static_enthalpy(380000, velocity=[400, 600])
+    array([300000., 200000.])
+    >>>
     """
 
-    ht = enthalpy + gas.mass_velocity**2 / (gas.rho**2 * 2 * gas.gc)
-    return ht
+    velocity = _energy_velocity(velocity, mass_velocity, rho, units)
+    h = to_si(stagnation_enthalpy, 'specific_energy', units) - velocity**2 / 2
+    return from_si(h, 'specific_energy', units)
 
 
 
 #==================================================
-#fanno temperature
+#stagnation temperature from velocity
 #==================================================
+def stagnation_temperature_from_velocity(temperature: float, velocity=None, mass_velocity=None, rho=None, gas=air, units=None) -> float:
+    """Return the stagnation temperature given the temperature and the velocity
+
+    Notes
+    -----
+    The energy equation of a gas of constant specific heat, Tt = T + V^2/(2 cp),
+    where the velocity is given, or the mass velocity and the density. Every
+    input can be an array, as can the properties of a gas array, and they
+    broadcast against each other. Default fluid is air.
+
+    Parameters
+    ----------
+    temperature : `array_like`
+        The temperature\n
+    velocity : `array_like`
+        The velocity of the flow\n
+    mass_velocity : `array_like`
+        The mass flow per unit area\n
+    rho : `array_like`
+        The density\n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the inputs and of the result. Default is the units of the
+        fluid \n
+
+    Returns
+    -------
+    array_like
+        The stagnation temperature\n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.stagnation_temperature_from_velocity(300, velocity=[100, 400])
+    array([305., 380.])
+    >>>
+    """
+
+    units = gas.unit_system if units is None else units
+    velocity = _energy_velocity(velocity, mass_velocity, rho, units)
+    Tt = to_si(temperature, 'temperature', units) + velocity**2 / (2 * _energy_cp(gas))
+    return from_si(Tt, 'temperature', units)
+
 
 
 #==================================================
-#fanno mach from temperature
+#temperature from velocity
 #==================================================
+def temperature_from_velocity(stagnation_temperature: float, velocity=None, mass_velocity=None, rho=None, gas=air, units=None) -> float:
+    """Return the temperature given the stagnation temperature and the velocity
+
+    Notes
+    -----
+    The inverse of stagnation_temperature_from_velocity, T = Tt - V^2/(2 cp).
+    The velocity is given, or the mass velocity and the density. Every input can
+    be an array and they broadcast against each other. Default fluid is air.
+
+    Parameters
+    ----------
+    stagnation_temperature : `array_like`
+        The stagnation temperature\n
+    velocity : `array_like`
+        The velocity of the flow\n
+    mass_velocity : `array_like`
+        The mass flow per unit area\n
+    rho : `array_like`
+        The density\n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the inputs and of the result. Default is the units of the
+        fluid \n
+
+    Returns
+    -------
+    array_like
+        The temperature\n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.temperature_from_velocity(380, mass_velocity=480, rho=1.2)
+    300.0
+    >>>
+    """
+
+    units = gas.unit_system if units is None else units
+    velocity = _energy_velocity(velocity, mass_velocity, rho, units)
+    T = to_si(stagnation_temperature, 'temperature', units) - velocity**2 / (2 * _energy_cp(gas))
+    return from_si(T, 'temperature', units)
+
+
+
+def _energy_velocity(velocity, mass_velocity, rho, units):
+    """The velocity in SI units, given or from the mass velocity and density"""
+
+    if velocity is not None:
+        return to_si(velocity, 'velocity', units)
+    if mass_velocity is None or rho is None:
+        raise ValueError('give the velocity, or the mass velocity and the density')
+    return to_si(mass_velocity, 'mass_velocity', units) / to_si(rho, 'density', units)
+
+
+def _energy_cp(gas) -> float:
+    """The specific heat of the fluid in SI units, from its ratio of specific heats if it has none"""
+
+    gas = gas.si()
+    if gas.cp is None:
+        return gas.gamma * gas.R / (gas.gamma - 1)
+    return gas.cp
 
 
 
 #==================================================
-#fanno pressure
+#fanno mach from temperature
 #==================================================
+def fanno_mach_from_temperature_ratio(mach_initial: float, temperature_initial: float, temperature_final: float, gas=air) -> float:
+    """Return the Mach number given the Mach number and two temperatures
+
+    Notes
+    -----
+    Given the initial Mach number, initial temperature, and final temperature, determine
+    the resulting Mach number in the constant area adiabatic flow with friction. The
+    temperature ratio inverts explicitly. Friction never carries the flow through a Mach
+    number of one, so a result on the other branch from the initial Mach number is nan.
+    Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The Mach number at region 1 \n
+    temperature_initial : `float`
+        The temperature at region 1 \n
+    temperature_final : `float`
+        The temperature at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The resulting Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_final = gd.fanno_mach_from_temperature_ratio(mach_initial=2, temperature_initial=1, temperature_final=1.2413793103448274)
+    >>> mach_final
+    1.5000000000000004
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    T2_T1 = np.asarray(temperature_final, dtype=float) / temperature_initial
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mach_final = (((1 + (gamma-1)/2 * mach_initial**2) / T2_T1 - 1) * 2/(gamma-1))**.5
+    return _fanno_branch(mach_initial, mach_final)
+
 
 
 #==================================================
 #fanno mach from pressure
 #==================================================
+def fanno_mach_from_pressure_ratio(mach_initial: float, pressure_initial: float, pressure_final: float, gas=air) -> float:
+    """Return the Mach number given the Mach number and two pressures
+
+    Notes
+    -----
+    Given the initial Mach number, initial pressure, and final pressure, determine
+    the resulting Mach number in the constant area adiabatic flow with friction. The
+    pressure ratio gives a quadratic in the square of the final Mach number with a
+    single positive root. Friction never carries the flow through a Mach number of
+    one, so a result on the other branch from the initial Mach number is nan.
+    Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The Mach number at region 1 \n
+    pressure_initial : `float`
+        The pressure at region 1 \n
+    pressure_final : `float`
+        The pressure at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The resulting Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_final = gd.fanno_mach_from_pressure_ratio(mach_initial=2, pressure_initial=1, pressure_final=1.4855627054164149)
+    >>> mach_final
+    1.5000000000000002
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    p2_p1 = np.asarray(pressure_final, dtype=float) / pressure_initial
+
+    #(gamma-1)/2 r^2 X^2 + r^2 X - M1^2 (1 + (gamma-1)/2 M1^2) = 0 for X = M2^2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        c = mach_initial**2 * (1 + (gamma-1)/2 * mach_initial**2) / p2_p1**2
+        mach_final = (2*c / (1 + (1 + 2*(gamma-1)*c)**.5))**.5
+    return _fanno_branch(mach_initial, mach_final)
+
+
+
+#==================================================
+#fanno mach from density
+#==================================================
+def fanno_mach_from_density_ratio(mach_initial: float, density_initial: float, density_final: float, gas=air) -> float:
+    """Return the Mach number given the Mach number and two densities
+
+    Notes
+    -----
+    Given the initial Mach number, initial density, and final density, determine
+    the resulting Mach number in the constant area adiabatic flow with friction. The
+    density ratio is linear in the square of the final Mach number. Friction never
+    carries the flow through a Mach number of one, so a result on the other branch
+    from the initial Mach number is nan. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The Mach number at region 1 \n
+    density_initial : `float`
+        The density at region 1 \n
+    density_final : `float`
+        The density at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The resulting Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_final = gd.fanno_mach_from_density_ratio(mach_initial=2, density_initial=1, density_final=1.1967032904743342)
+    >>> mach_final
+    1.5
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    rho2_rho1 = np.asarray(density_final, dtype=float) / density_initial
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denominator = rho2_rho1**2 * (1 + (gamma-1)/2 * mach_initial**2) - (gamma-1)/2 * mach_initial**2
+        mach_final = np.where(denominator > 0, mach_initial / np.abs(denominator)**.5, np.nan)
+    return _fanno_branch(mach_initial, mach_final)
+
+
+
+def _fanno_branch(mach_initial, mach_final):
+    """Return the final Mach numbers, nan where they cross a Mach number of one"""
+
+    crossed = ((mach_initial < 1) & (mach_final > 1)) | ((mach_initial > 1) & (mach_final < 1))
+    return np.where(crossed, np.nan, mach_final)[()]
 
 
 
@@ -392,6 +712,46 @@ def fanno_velocity_star_ratio(mach: float, gas=air) -> float:
 
 
 
+#==================================================
+#fanno stagnation pressure choked ratio
+#==================================================
+def fanno_stagnation_pressure_star_ratio(mach: float, gas=air) -> float:
+    """Return the ratio of stagnation pressure over stagnation pressure where Mach equals one
+
+    Notes
+    -----
+    Given a Mach number of a constant area adiabatic duct under the influence of
+    friction alone, return the stagnation pressure ratio of region two over region one
+    where Mach in region two equals one. Default fluid is air.
+
+    Parameters
+    ----------
+    mach : `float`
+        The mach number\n
+    gas : `fluid`
+        The user defined fluid object\n
+
+    Returns
+    -------
+    float
+        The fanno stagnation pressure ratio pt / pt* \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = 1.2
+    >>> pt_ptstar = gd.fanno_stagnation_pressure_star_ratio(M)
+    >>> pt_ptstar
+    1.0304397530864196
+    >>>
+    """
+
+    gamma = gas.gamma
+    pt_ptstar = 1/mach * ((1 + (gamma-1)/2 * mach**2)/((gamma+1)/2))**((gamma+1)/(2*(gamma-1)))
+    return pt_ptstar
+
+
+
 #==================================================
 #fanno
 #==================================================
@@ -475,16 +835,77 @@ def fanno_parameter_max(mach: float, gas=air) -> float:
 
 
 
+#==================================================
+#fanno tables
+#==================================================
+def fanno_tables(range=[.1,5], step=.01, gas=air) -> np.ndarray:
+    """Return the fanno tables for a range of Mach numbers
+
+    Notes
+    -----
+    Given a range of Mach numbers and the fluid, return the choked ratios of
+    every incremental Mach number in between as a structured array with the
+    fields mach, T_Tstar, p_pstar, rho_rhostar, v_vstar, pt_ptstar and
+    fanno_max. Every column is computed once over the whole Mach array and
+    written straight into the table. Any column can be looked up in reverse
+    with table_lookup. Default fluid is air.
+
+    Parameters
+    ----------
+    range : `list`
+        The starting and ending Mach # in a list, ie: [.1,5]. \n
+    step : `float`
+        The step size for the tables. \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    ndarray
+        The fanno table, one row per Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> table = gd.fanno_tables(range=[.5,2], step=.5)
+    >>> table['fanno_max']
+    array([1.06906031, 0.        , 0.13605022, 0.3049965 ])
+    >>> gd.table_lookup(table, 'fanno_max', .1, output='mach')
+    array([0.95322995, 1.36751136])
+    >>>
+    """
+
+    mach_min = max(range[0], 0)
+    count = int(round((range[1] - mach_min) / step)) + 1
+    mach = mach_min + step * np.arange(count)
+
+    columns = ('mach', 'T_Tstar', 'p_pstar', 'rho_rhostar', 'v_vstar', 'pt_ptstar', 'fanno_max')
+    table = np.empty(count, dtype=[(name, float) for name in columns])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['mach'] = mach
+        table['T_Tstar'] = fanno_temperature_star_ratio(mach, gas=gas)
+        table['p_pstar'] = fanno_pressure_star_ratio(mach, gas=gas)
+        table['rho_rhostar'] = fanno_density_star_ratio(mach, gas=gas)
+        table['v_vstar'] = fanno_velocity_star_ratio(mach, gas=gas)
+        table['pt_ptstar'] = fanno_stagnation_pressure_star_ratio(mach, gas=gas)
+        table['fanno_max'] = fanno_parameter_max(mach, gas=gas)
+    return table
+
+
+
 #==================================================
 #mach from fanno parameter
 #==================================================
-def mach_from_fanno(fanno: float, mach_initial: float, gas=air) -> float:
+def mach_from_fanno(fanno: float, mach_initial: float, gas=air, return_choked=False) -> float:
     """Return the Mach number that would result from the fanno parameter and initial mach number
 
     Notes
     -----
     Given the Mach number and fanno parameter that describes that system, return the resulting
-    mach number. Default fluid is air.
+    mach number. The final Mach number lies on the same subsonic or supersonic branch as the
+    initial Mach number. Where the fanno parameter is longer than the maximum fanno parameter
+    of the initial Mach number the duct is choked and the Mach number is nan. Arrays are solved
+    element by element. Default fluid is air.
 
     Parameters
     ----------
@@ -494,11 +915,13 @@ def mach_from_fanno(fanno: float, mach_initial: float, gas=air) -> float:
         The starting Mach number \n
     gas : `fluid`
         The user defined fluid object \n
+    return_choked : `bool`
+        Also return the mask of choked ducts. Default is false \n
 
     Returns
     -------
     Float
-        The resulting Mach number \n
+        The resulting Mach number, and the choked mask if asked for \n
 
     Examples
     --------
@@ -507,19 +930,311 @@ def mach_from_fanno(fanno: float, mach_initial: float, gas=air) -> float:
     >>> mach_final = gd.mach_from_fanno(fanno=fanno, mach_initial=mach_initial)
     >>> mach_final
     1.567008305615555
+    >>> gd.mach_from_fanno(fanno=[.5, 1, 1.5], mach_initial=.5, return_choked=True)
+    (array([0.58146236, 0.80368397,        nan]), array([False, False,  True]))
     >>>
     """
 
-    def mach_solve(M, mach_initial=mach_initial, fanno=fanno, gas=gas):
-        zero = fanno_parameter(mach_initial=mach_initial, mach_final=M, gas=gas) - fanno
-        return zero
+    fanno, mach_initial = np.broadcast_arrays(np.asarray(fanno, dtype=float), np.asarray(mach_initial, dtype=float))
+    remaining = fanno_parameter_max(mach_initial, gas=gas) - fanno
+    choked = remaining < 0
+    with np.errstate(invalid='ignore'):
+        mach, _ = _fanno_mach(np.where(choked, np.nan, remaining), mach_initial > 1, gas.gamma)
+    if return_choked:
+        return mach[()], choked[()]
+    return mach[()]
 
-    if mach_initial < 1:
-        x0 = .5
-    elif mach_initial > 1:
-        x0 = 1.5
-    else:
-        x0=1
 
-    sol = fsolve(mach_solve, args=(mach_initial, fanno, gas), x0=x0)
-    return sol[0]
\ No newline at end of file
+
+#==================================================
+#mach from fanno parameter max
+#==================================================
+def mach_from_fanno_parameter_max(fanno_max: float, supersonic=False, gas=air) -> float:
+    """Return the Mach number that reaches a Mach number of one after the maximum fanno parameter
+
+    Notes
+    -----
+    Given the maximum fanno parameter, the product of friction factor and the length
+    to reach a Mach number of one over diameter, return the Mach number at the start
+    of the duct on the subsonic or supersonic branch. The supersonic branch has a
+    finite maximum fanno parameter, above which the Mach number is nan. Arrays are
+    solved element by element. Default fluid is air.
+
+    Parameters
+    ----------
+    fanno_max : `float`
+        The maximum fanno parameter f(x*-x)/D \n
+    supersonic : `bool`
+        Return the supersonic Mach number. Default is false \n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The starting Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = gd.mach_from_fanno_parameter_max(0.3049965025814798, supersonic=True)
+    >>> M
+    2.0000000000000004
+    >>>
+    """
+
+    fanno_max = np.asarray(fanno_max, dtype=float)
+    supersonic = np.broadcast_to(np.asarray(supersonic, dtype=bool), fanno_max.shape)
+    mach, _ = _fanno_mach(fanno_max, supersonic, gas.gamma)
+    return mach[()]
+
+
+
+def _fanno_mach(fanno_max, supersonic, gamma: float) -> tuple:
+    """Invert the maximum fanno parameter on either branch
+
+    Notes
+    -----
+    In terms of u = 1/M^2 the maximum fanno parameter is convex with its minimum
+    of zero at u = 1. Its second order expansion about u = 1 and its linear growth
+    at large u both bound the root from the subsonic side, and the second order
+    expansion bounds it from the supersonic side, so Newton's method started from
+    the bound steps monotonically to the root.
+
+    Returns
+    -------
+    tuple
+        The Mach numbers and the number of iterations each took \n
+    """
+
+    fanno_max, supersonic, gamma = np.broadcast_arrays(fanno_max, supersonic, gamma)
+    a = (gamma+1)/(2*gamma)
+    c = 1/(gamma*(gamma+1))
+
+    #gamma goes along with the target, so a gas array is solved element by element
+    def zero(u, target, gamma):
+        return (gamma+1)/(2*gamma) * np.log((gamma+1)/(2*u + gamma-1)) + (u-1)/gamma - target
+
+    def slope(u, target, gamma):
+        return 1/gamma - (gamma+1)/gamma/(2*u + gamma-1)
+
+    with np.errstate(all='ignore'):
+        subsonic_lower = np.maximum(1 + (fanno_max/c)**.5, 1 + gamma*fanno_max)
+        subsonic_upper = subsonic_lower - zero(subsonic_lower, fanno_max, gamma) / slope(subsonic_lower, fanno_max, gamma)
+        supersonic_lower = np.maximum(1 - (fanno_max/c)**.5, 0)
+        lower = np.where(supersonic, supersonic_lower, subsonic_lower)
+        upper = np.where(supersonic, 1, np.maximum(subsonic_upper, subsonic_lower))
+        fanno_limit = a * np.log((gamma+1)/(gamma-1)) - 1/gamma
+        invalid = (fanno_max < 0) | (supersonic & (fanno_max > fanno_limit))
+        u, iterations = _bracketed_newton(zero, slope, lower, upper, args=(fanno_max, gamma), guess=np.where(invalid, np.nan, lower),
+            increasing=~supersonic)
+        mach = np.where(invalid, np.nan, u**-.5)
+    return mach, iterations
+
+
+
+#==================================================
+#friction factor
+#==================================================
+def friction_factor(reynolds: float, relative_roughness=0, correlation='colebrook') -> float:
+    """Return the Darcy friction factor of a round pipe
+
+    Notes
+    -----
+    Given the Reynolds number and the roughness over the diameter, return the
+    friction factor used in the fanno parameter. Turbulent flow follows either
+    the explicit Haaland correlation or the Colebrook equation, which is solved
+    with Newton's method started from the Haaland value. Below a Reynolds number
+    of 2300 the flow is laminar and the friction factor is 64 / Re. Arrays are
+    solved element by element.
+
+    Parameters
+    ----------
+    reynolds : `float`
+        The Reynolds number based on the diameter \n
+    relative_roughness : `float`
+        The roughness height over the diameter. Default is a smooth pipe \n
+    correlation : `str`
+        'colebrook' or 'haaland'. Default is 'colebrook' \n
+
+    Returns
+    -------
+    float
+        The Darcy friction factor \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.friction_factor(1e5, relative_roughness=1e-4)
+    0.01851386607747164
+    >>> gd.friction_factor(1e5, relative_roughness=1e-4, correlation='haaland')
+    0.018265053014793857
+    >>>
+    """
+
+    if correlation not in ('colebrook', 'haaland'):
+        raise ValueError("correlation must be 'colebrook' or 'haaland'")
+    reynolds, relative_roughness = np.broadcast_arrays(np.asarray(reynolds, dtype=float),
+        np.asarray(relative_roughness, dtype=float))
+
+    with np.errstate(all='ignore'):
+        #1/sqrt(f) from Haaland
+        x = -1.8 * np.log10((relative_roughness/3.7)**1.11 + 6.9/reynolds)
+        if correlation == 'colebrook':
+            #x + 2 log10(e/3.7D + 2.51 x / Re) = 0
+            a, b = relative_roughness/3.7, 2.51/reynolds
+            for _ in range(20):
+                g = x + 2*np.log10(a + b*x)
+                step = g / (1 + 2*b / ((a + b*x) * np.log(10)))
+                x = x - step
+                if np.all(np.abs(step) <= 1e-13 * np.abs(x)):
+                    break
+        f = np.where(reynolds < 2300, 64/reynolds, x**-2)
+    return f[()]
+
+
+
+#==================================================
+#fanno march
+#==================================================
+def fanno_march(mach_initial: float, pressure_initial: float, temperature_initial: float, length, diameter, roughness=0,
+    steps=10, viscosity=None, correlation='colebrook', gas=air, return_choked=False, units=None) -> tuple:
+    """Return the Mach number, pressure and temperature along pipes of varying
+    diameter and roughness, with the friction factor taken from the local flow
+
+    Notes
+    -----
+    Each pipe is a series of segments, each with its own length, diameter and
+    roughness, that are split into equal steps. Over a step the flow follows
+    the Fanno line exactly for the fanno parameter of the step, with the
+    friction factor from the Reynolds number at both ends of the step averaged
+    in a predictor corrector. The mass flow is fixed, so the Reynolds number
+    only changes with the diameter and with the viscosity at the local
+    temperature. The flow passes a change of diameter between segments
+    isentropically.
+
+    All pipes march in lockstep. The inlet states broadcast against the
+    leading axes of the segment arrays, whose last axis runs over the
+    segments. A pipe that chokes, either by friction or at a contraction, is
+    nan from the step where it choked to its end. Lengths, pressures,
+    temperatures and viscosities are in the units given, by default those of
+    the fluid, and the march is done in SI units. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `array_like`
+        The Mach number at the inlet \n
+    pressure_initial : `array_like`
+        The static pressure at the inlet \n
+    temperature_initial : `array_like`
+        The static temperature at the inlet \n
+    length : `array_like`
+        The length of every segment \n
+    diameter : `array_like`
+        The inside diameter of every segment \n
+    roughness : `array_like`
+        The roughness height of every segment. Default is a smooth pipe \n
+    steps : `int`
+        The number of steps in every segment \n
+    viscosity : `float` or `callable`
+        The dynamic viscosity, or a function of the static temperature that
+        returns it, both in the units given. Default is Sutherland's law for air \n
+    correlation : `str`
+        'colebrook' or 'haaland'. Default is 'colebrook' \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+    return_choked : `bool`
+        Also return the mask of choked pipes. Default is false \n
+    units : `str` or `UnitSystem`
+        The units of the inputs and of the results. Default is the units of the
+        fluid \n
+
+    Returns
+    -------
+    tuple
+        The distance from the inlet and the Mach number, pressure and
+        temperature at the end of every step, with the inlet first, and the
+        choked mask if asked for \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> x, mach, p, T = gd.fanno_march(.3, 500000, 300, length=[5, 5], diameter=[.1, .09], roughness=4.5e-5, steps=2)
+    >>> mach
+    array([0.3       , 0.3091467 , 0.31926639, 0.44143764, 0.48430604])
+    >>> import numpy as np
+    >>> x, mach, p, T = gd.fanno_march(.3*np.ones(100000), 500000, 300, length=[5, 5], diameter=[.1, .09])
+    >>> mach.shape
+    (100000, 21)
+    >>>
+    """
+
+    units = get_units(gas.unit_system if units is None else units)
+    gas = gas.si()
+    gamma, R = gas.gamma, gas.R
+    segments = np.broadcast_arrays(*[np.atleast_1d(to_si(a, 'length', units)) for a in (length, diameter, roughness)])
+    inlet = [np.asarray(a, dtype=float) for a in (mach_initial, to_si(pressure_initial, 'pressure', units),
+        to_si(temperature_initial, 'temperature', units))]
+    shape = np.broadcast_shapes(*[a.shape for a in inlet], segments[0].shape[:-1])
+    count = segments[0].shape[-1]
+    length, diameter, roughness = [np.broadcast_to(a, shape + (count,)) for a in segments]
+    mach, pressure, temperature = [np.broadcast_to(a, shape).astype(float) for a in inlet]
+    if viscosity is None:
+        viscosity = _air_viscosity
+    elif callable(viscosity):
+        viscosity = lambda temperature, given=viscosity: to_si(given(from_si(temperature, 'temperature', units)), 'viscosity', units)
+    else:
+        viscosity = lambda temperature, value=to_si(viscosity, 'viscosity', units): value
+
+    area = np.pi/4 * diameter**2
+    stagnation_temperature = temperature * (1 + (gamma-1)/2 * mach**2)
+    mass_flow = pressure * area[..., 0] * mach * (gamma/(R*temperature))**.5
+    supersonic = mach > 1
+    choked = np.zeros(shape, dtype=bool)
+
+    points = count*steps + 1
+    x, profile = np.zeros(shape + (points,)), np.empty((3,) + shape + (points,))
+    profile[:, ..., 0] = mach, pressure, temperature
+
+    def friction(temperature, D, e):
+        reynolds = mass_flow / (np.pi/4 * D) / viscosity(temperature)
+        return friction_factor(reynolds, e / D, correlation=correlation)
+
+    def advance(mach, fanno):
+        remaining = fanno_parameter_max(mach, gas=gas) - fanno
+        mach_final, _ = _fanno_mach(remaining, supersonic, gamma)
+        return mach_final, remaining < 0
+
+    with np.errstate(invalid='ignore'):
+        for s in range(count):
+            D, e, dx = diameter[..., s], roughness[..., s], length[..., s] / steps
+            if s > 0:
+                #isentropic change of area to the next segment
+                area_star = 1/mach * ((1 + (gamma-1)/2*mach**2) / ((gamma+1)/2))**((gamma+1)/(2*(gamma-1)))
+                mach = _mach_from_area_ratio(area_star * area[..., s] / area[..., s-1], supersonic, gamma)
+                choked |= np.isnan(mach) & ~np.isnan(profile[0, ..., s*steps])
+
+            for k in range(steps):
+                f = friction(stagnation_temperature / (1 + (gamma-1)/2*mach**2), D, e)
+                predicted, _ = advance(mach, f * dx/D)
+                #a step that chokes keeps the friction factor of its start
+                f = np.where(np.isnan(predicted), f, (f + friction(stagnation_temperature / (1 + (gamma-1)/2*predicted**2), D, e)) / 2)
+                mach, blocked = advance(mach, f * dx/D)
+                choked |= blocked
+
+                i = s*steps + k + 1
+                temperature = stagnation_temperature / (1 + (gamma-1)/2*mach**2)
+                x[..., i] = x[..., i-1] + dx
+                profile[:, ..., i] = mach, mass_flow / (area[..., s] * mach) * (R*temperature/gamma)**.5, temperature
+
+    x, pressure, temperature = from_si(x, 'length', units), from_si(profile[1], 'pressure', units), from_si(profile[2], 'temperature', units)
+    if return_choked:
+        return x, profile[0], pressure, temperature, choked
+    return x, profile[0], pressure, temperature
+
+
+
+def _air_viscosity(temperature):
+    """Sutherland's law for the viscosity of air in Pa-s"""
+
+    return 1.716e-5 * (temperature/273.15)**1.5 * (273.15 + 110.4) / (temperature + 110.4)
@@ -3,24 +3,71 @@
 #The fluid class and some common fluids and their properties in metric and standard
 ###
 
+import csv
+import os
+from functools import lru_cache
+from hashlib import sha1
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from gas_dynamics.extra import _bracketed_newton
+from gas_dynamics.units import SI, US, get_units, to_si
+
 #==================================================
 #fluid
 #==================================================
 class fluid:
     """A class to represent the fluid and its properties
 
+    Notes
+    -----
+    A fluid is immutable. The constants of the ratio of specific heats that the
+    relations use are worked out once when it is made, and it can be hashed, so it
+    can key a cache. A fluid with other properties is made with replace. The state
+    of a flow of the fluid is kept apart, in a FlowState.
+
+    The relations work in SI units. A fluid with a gc other than one has its gas
+    constant in ft-lbf / lbm-R and its specific heats in Btu / lbm-R, and the
+    functions that take dimensional inputs read them in the US units of the fluid
+    unless told otherwise. The same results come from the metric fluid with
+    units='US', which is the way to mix units in one call.
+
     Attributes
     ----------
+    name : `str`
+        The name of the fluid \n
     gamma : `float`
         The ratio of specific heats \n
     R : `float`
         The gas constant for the fluid \n
     units : `str`
         The unit system defining the gas constant \n
+    cp : `float`
+        The specific heat at constant pressure \n
+    cv : `float`
+        The specific heat at constant volume \n
+    gc : `float`
+        The proportionality factor of Newton's second law, one for metric \n
+    half_gamma_minus_one : `float`
+        (gamma-1)/2 \n
+    half_gamma_plus_one : `float`
+        (gamma+1)/2 \n
+    pressure_exponent : `float`
+        gamma/(gamma-1), the exponent of the isentropic pressure ratio \n
+    density_exponent : `float`
+        1/(gamma-1), the exponent of the isentropic density ratio \n
+    area_exponent : `float`
+        (gamma+1)/(2(gamma-1)), the exponent of the choked area ratio \n
+    gamma_ratio : `float`
+        (gamma+1)/(gamma-1) \n
+    unit_system : `UnitSystem`
+        The unit system of the properties, US for a fluid with a gc other than one \n
 
     Methods
     -------
-    No methods at this time
+    replace(**changes)
+        Return a copy of the fluid with the given properties changed \n
+    si()
+        Return the fluid with its properties in SI units \n
 
     Examples
     --------
@@ -31,19 +78,20 @@ class fluid:
     >>> methane.R
     518.2
     >>> methane.units
-    'metric'
+    'J / kg K'
     Conversely we can set the units
-    >>> methane = fluid('methane', 1.3, 0.1238, units = 'btu / lbm-R')
-    >>> methane.gamma
-    1.3
-    >>> methane.R
-    0.1238
+    >>> methane = gd.fluid('methane', 1.3, 0.1238, units='btu / lbm-R', gc=32.174)
     >>> methane.units
     'btu / lbm-R'
-
+    >>> methane.pressure_exponent
+    4.333333333333333
+    >>>
     """
 
-    def __init__(self, name: str, gamma: float, R: float, units='J / kg K'):
+    __slots__ = ('name', 'gamma', 'R', 'units', 'cp', 'cv', 'gc', 'half_gamma_minus_one', 'half_gamma_plus_one',
+        'pressure_exponent', 'density_exponent', 'area_exponent', 'gamma_ratio', '_key')
+
+    def __init__(self, name: str, gamma: float, R: float, units='J / kg K', cp=None, cv=None, gc=1):
         """Construct the necessary attributes for the fluid object
 
         Parameters
@@ -52,129 +100,1467 @@ class fluid:
             The name of the fluid\n
         gamma : `float`
             The ratio of specific heats \n
-        R : `flaot`
+        R : `float`
             The gas constant for the fluid \n
         units : `str`
             The units being used for the gas constant. Default is metric \n
+        cp : `float`
+            The specific heat at constant pressure \n
+        cv : `float`
+            The specific heat at constant volume \n
+        gc : `float`
+            The proportionality factor of Newton's second law. Default is one for metric \n
 
         """
-        self.name = name
-        self.gamma = gamma
-        self.cp = None
-        self.cv = None
-        self.R = R
-        self.gc = 1 #the gravitational constant. default 1 for metric
-        self.units = units
-        self.rho = None
-        self.temperature = None 
-        self.velocity = None 
-        self.a = None #speed of sound
-        self.mach = None
-        self.mass_veolcity = None #rho * velocity
-        self.a = None #speed of sound
+
+        assign = object.__setattr__
+        for attribute, value in (('name', name), ('gamma', gamma), ('R', R), ('units', units), ('cp', cp), ('cv', cv), ('gc', gc),
+            ('half_gamma_minus_one', (gamma-1)/2), ('half_gamma_plus_one', (gamma+1)/2), ('pressure_exponent', gamma/(gamma-1)),
+            ('density_exponent', 1/(gamma-1)), ('area_exponent', (gamma+1)/(2*(gamma-1))), ('gamma_ratio', (gamma+1)/(gamma-1)),
+            ('_key', None)):
+            assign(self, attribute, value)
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError("a fluid can't be changed, use replace to make a new one")
+
+    def __delattr__(self, attribute):
+        raise AttributeError("a fluid can't be changed, use replace to make a new one")
+
+    def _properties(self) -> tuple:
+        return self.name, self.gamma, self.R, self.units, self.cp, self.cv, self.gc
+
+    def __eq__(self, other):
+        if not isinstance(other, fluid):
+            return NotImplemented
+        return self._properties() == other._properties()
+
+    def __hash__(self):
+        return hash(self._properties())
+
+    def __reduce__(self):
+        #the built in fluids pickle as their key, the registered ones as their key and
+        #properties, so a process they were not registered in can make them again
+        if self._key is not None:
+            if self._key in _custom:
+                return _registered, (self._key, self._reconstruct())
+            return _registered, (self._key,)
+        return self._reconstruct()
+
+    def _reconstruct(self) -> tuple:
+        return fluid, self._properties()
+
+    def __repr__(self):
+        return 'fluid(name=%r, gamma=%r, R=%r, units=%r, cp=%r, cv=%r, gc=%r)' % self._properties()
+
+    def replace(self, **changes) -> 'fluid':
+        """Return a copy of the fluid with the given properties changed
+
+        Examples
+        --------
+        >>> from gas_dynamics.fluids import air
+        >>> hot_air = air.replace(gamma=1.35)
+        >>> hot_air.gamma, air.gamma
+        (1.35, 1.4)
+        >>>
+        """
+
+        properties = dict(zip(('name', 'gamma', 'R', 'units', 'cp', 'cv', 'gc'), self._properties()))
+        properties.update(changes)
+        return fluid(**properties)
+
+    @property
+    def unit_system(self):
+        return SI if self.gc == 1 else US
+
+    def si(self) -> 'fluid':
+        """Return the fluid with its properties in SI units
+
+        Examples
+        --------
+        >>> from gas_dynamics.fluids import air_us
+        >>> air_us.si().R
+        286.77108030479997
+        >>>
+        """
+
+        if self.gc == 1:
+            return self
+        return _si(self)
+
+
+
+class _column:
+    """A column of a flow state, which clears what depends on it when it is set
+
+    A column that was not given can be worked out from the others by the
+    function it decorates, and is then kept like a derived property.
+    """
+
+    def __init__(self, *depends):
+        self.depends = set(depends)
+
+    def __call__(self, function):
+        self.function, self.name, self.__doc__ = function, function.__name__, function.__doc__
+        return self
+
+    def __get__(self, state, owner):
+        if state is None:
+            return self
+        value = state._columns.get(self.name)
+        if value is None:
+            if self.name not in state._cache:
+                value = self.function(state)
+                state._cache[self.name] = None if value is None else _read_only(value)
+            value = state._cache[self.name]
+        return None if value is None else value[()]
+
+    def __set__(self, state, value):
+        state._columns[self.name] = None if value is None else _read_only(np.asarray(value, dtype=float))
+        state._cache.pop(self.name, None)
+        state._invalidate(self.name)
+
+
+class _derived:
+    """A property of a flow state worked out the first time it is read and kept
+    until a column it depends on is set
+    """
+
+    def __init__(self, *depends):
+        self.depends = set(depends)
+
+    def __call__(self, function):
+        self.function, self.name, self.__doc__ = function, function.__name__, function.__doc__
+        return self
+
+    def __get__(self, state, owner):
+        if state is None:
+            return self
+        if self.name not in state._cache:
+            state._cache[self.name] = _read_only(self.function(state))[()]
+        return state._cache[self.name]
+
+    def __set__(self, state, value):
+        raise AttributeError('%s is worked out from the columns of the state' % self.name)
+
+
+
+#==================================================
+#flow state
+#==================================================
+class FlowState:
+    """A class to hold the state of a flow of a fluid, at one point or at many
+
+    Notes
+    -----
+    The temperature, pressure, density and velocity are held as columns, arrays of
+    any shape that broadcast against each other, and are not copied if they are
+    already arrays of floats, so a state can hold a large extract of a solution.
+    Of the pressure and density one is enough, the other follows from the ideal
+    gas law. The columns and properties are read as read only views. A column is
+    changed by setting it, since writing into it in place, or into the array it
+    was set from, would leave what is kept from it stale.
+
+    Everything else, the speed of sound, Mach number, mass velocity and the
+    stagnation properties, is worked out the first time it is read and kept. Setting
+    a column clears the properties that depend on it, and setting the fluid or the
+    units clears them all, so a property nobody reads is never worked out. The
+    columns are in the units of the state. The stagnation properties take the
+    fluid as calorically perfect, except for a thermally perfect gas, whose
+    stagnation temperature and pressure come from its enthalpy and entropy.
+
+    Attributes
+    ----------
+    gas : `fluid`
+        The fluid flowing \n
+    temperature : `array_like`
+        The static temperature \n
+    pressure : `array_like`
+        The static pressure \n
+    rho : `array_like`
+        The density \n
+    velocity : `array_like`
+        The velocity \n
+    units : `UnitSystem`
+        The units of the state. Default is the unit system of the fluid \n
+    a : `array_like`
+        The local speed of sound \n
+    mach : `array_like`
+        The Mach number \n
+    mass_velocity : `array_like`
+        The mass flow per unit area, rho * velocity \n
+    stagnation_temperature : `array_like`
+        The stagnation temperature \n
+    stagnation_pressure : `array_like`
+        The stagnation pressure \n
+    stagnation_enthalpy : `array_like`
+        The stagnation enthalpy, cp times the temperature and the kinetic energy \n
+
+    Methods
+    -------
+    set_a()
+        Work out the local speed of sound now rather than when it is read \n
+    set_mach()
+        Work out the Mach number now rather than when it is read \n
+    set_mass_velocity()
+        Work out the mass velocity now rather than when it is read \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> state = gd.FlowState(temperature=300, velocity=500, rho=1.2)
+    >>> state.mach
+    1.4403899582824304
+    >>> state = gd.FlowState(temperature=[300, 250], velocity=[100, 600], pressure=101325)
+    >>> state.stagnation_pressure
+    array([107334.33516288, 672100.47298828])
+    >>> state.velocity = [200, 600]
+    >>> state.stagnation_pressure
+    array([126889.14345197, 672100.47298828])
+    >>>
+    """
+
+    def __init__(self, gas=None, temperature=None, velocity=None, rho=None, units=None, pressure=None):
+        self._columns = {}
+        self._cache = {}
+        self._gas = get_fluid('air') if gas is None else gas
+        self._units = self._gas.unit_system if units is None else get_units(units)
+        self.temperature = temperature
+        self.pressure = pressure
+        self.rho = rho
+        self.velocity = velocity
+
+    def _invalidate(self, column=None):
+        #clear what depends on the column, or everything
+        for name in list(self._cache):
+            if column is None or column in getattr(type(self), name).depends:
+                del self._cache[name]
+
+    @property
+    def gas(self):
+        return self._gas
+
+    @gas.setter
+    def gas(self, gas):
+        self._gas = gas
+        self._invalidate()
+
+    @property
+    def units(self):
+        return self._units
+
+    @units.setter
+    def units(self, units):
+        self._units = get_units(units)
+        self._invalidate()
+
+    def _factor(self, quantity: str) -> float:
+        return self._units.factor(quantity)
+
+    def _cp(self) -> float:
+        gas = self._gas.si()
+        return gas.gamma * gas.R / (gas.gamma - 1) if gas.cp is None else gas.cp
+
+    @_column()
+    def temperature(self):
+        return None
+
+    @_column('rho', 'temperature')
+    def pressure(self):
+        """The ideal gas law, from the density and temperature"""
+
+        if self.rho is None or self.temperature is None:
+            return None
+        factor = self._gas.si().R * self._factor('density') * self._factor('temperature') / self._factor('pressure')
+        return self.rho * self.temperature * factor
+
+    @_column('pressure', 'temperature')
+    def rho(self):
+        """The ideal gas law, from the pressure and temperature"""
+
+        if self._columns.get('pressure') is None or self.temperature is None:
+            return None
+        factor = self._factor('pressure') / (self._gas.si().R * self._factor('temperature') * self._factor('density'))
+        return self._columns['pressure'] / self.temperature * factor
+
+    @_column()
+    def velocity(self):
+        return None
+
+    @_derived('temperature')
+    def a(self):
+        gas = self._gas.si()
+        if isinstance(gas, ThermallyPerfectGas):
+            gamma = gas.ratio_of_specific_heats(self.temperature * self._factor('temperature'))
+            return (gamma * gas.R * self._factor('temperature') / self._factor('velocity')**2 * self.temperature)**.5
+        return (gas.gamma * gas.R * self._factor('temperature') / self._factor('velocity')**2 * self.temperature)**.5
+
+    @_derived('temperature', 'velocity')
+    def mach(self):
+        return self.velocity / self.a
+
+    @_derived('pressure', 'rho', 'temperature', 'velocity')
+    def mass_velocity(self):
+        return self.rho * self.velocity * (self._factor('density') * self._factor('velocity') / self._factor('mass_velocity'))
+
+    @_derived('temperature', 'velocity')
+    def stagnation_temperature(self):
+        gas = self._gas.si()
+        if isinstance(gas, ThermallyPerfectGas):
+            #the energy balance with the enthalpy of the gas, h(Tt) = h(T) + V^2/2
+            T, V = np.broadcast_arrays(np.asarray(self.temperature * self._factor('temperature'), dtype=float),
+                np.asarray(self.velocity * self._factor('velocity'), dtype=float))
+            rise = V**2 / (2 * gas.specific_heat(T))
+            Tt, _ = _bracketed_newton(lambda Tt, h: gas.enthalpy(Tt) - h, lambda Tt, h: gas.specific_heat(Tt), T, T + 2*rise + 1,
+                args=(gas.enthalpy(T) + V**2/2,), guess=T + rise)
+            return Tt / self._factor('temperature')
+        return self.temperature * (1 + self._gas.half_gamma_minus_one * self.mach**2)
+
+    @_derived('pressure', 'rho', 'temperature', 'velocity')
+    def stagnation_pressure(self):
+        gas = self._gas.si()
+        if isinstance(gas, ThermallyPerfectGas):
+            #isentropic to rest, s(Tt) - s(T) = R ln(pt/p)
+            T, Tt = [np.asarray(a, dtype=float) * self._factor('temperature') for a in (self.temperature, self.stagnation_temperature)]
+            return self.pressure * np.exp((gas.entropy(Tt) - gas.entropy(T)) / gas.R)
+        return self.pressure * (self.stagnation_temperature / self.temperature)**self._gas.pressure_exponent
+
+    @_derived('temperature', 'velocity')
+    def stagnation_enthalpy(self):
+        kinetic = self.velocity**2 * (self._factor('velocity')**2 / 2)
+        return (self.temperature * (self._cp() * self._factor('temperature')) + kinetic) / self._factor('specific_energy')
 
     def set_a(self):
-        """Set the local speed of sound for the fluid given its state
+        """Work out the local speed of sound for the fluid given its state
 
         """
-        
-        self.a = (self.temperature * self.R * self.gamma * self.gc)**.5
+
+        self.a
 
     def set_mach(self):
-        """Set the mach number for the fluid given its velocity and speed of sound
+        """Work out the mach number for the fluid given its velocity and speed of sound
 
         """
 
-        self.set_a()
-        self.mach = self.velocity / self.a
-        
+        self.mach
+
     def set_mass_velocity(self):
-        """Set the mass velocity for the fluid given its state
+        """Work out the mass velocity for the fluid given its state
 
         """
 
-        self.mass_velocity = self.velocity * self.rho
+        self.mass_velocity
+
+
+
+#==================================================
+#thermally perfect gas
+#==================================================
+class ThermallyPerfectGas(fluid):
+    """A class to represent a thermally perfect gas, whose specific heats change with temperature
+
+    Notes
+    -----
+    The specific heat at constant pressure is given by the NASA 7 coefficient
+    polynomials,
+
+    cp/R = a1 + a2 T + a3 T^2 + a4 T^3 + a5 T^4
+
+    with one set of coefficients below 1000 K and another above it. The stagnation
+    relations come from the enthalpy and entropy integrals of cp rather than from a
+    constant gamma, so they depend on the stagnation temperature the gas is held at.
+    For every stagnation temperature the integrals are worked out once on a grid of
+    temperatures and cached, and the relations interpolate in them. Below 200 K the
+    polynomials are extrapolated.
+
+    It is a fluid, so it can be passed as gas to any function. The stagnation
+    ratios, area ratios and speed of sound of the standard module use the
+    temperature dependent properties. Other functions take it as a calorically
+    perfect gas with the gamma at the stagnation temperature.
+
+    Attributes
+    ----------
+    coefficients : `tuple`
+        The seven coefficients below and above 1000 K \n
+    stagnation_temperature : `float`
+        The stagnation temperature in K the stagnation relations refer to \n
+
+    Methods
+    -------
+    specific_heat(temperature)
+        The specific heat at constant pressure \n
+    enthalpy(temperature)
+        The specific enthalpy \n
+    entropy(temperature)
+        The specific entropy at the reference pressure \n
+    ratio_of_specific_heats(temperature)
+        The ratio of specific heats \n
+    at(stagnation_temperature)
+        The gas held at another stagnation temperature \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> hot_air = gd.thermally_perfect_gas('air', stagnation_temperature=1800)
+    >>> hot_air.gamma
+    1.3021700187227434
+    >>> gd.stagnation_temperature_ratio(2, gas=hot_air)
+    0.6114694023718569
+    >>>
+    """
+
+    __slots__ = ('coefficients', 'stagnation_temperature', '_table')
+
+    def __init__(self, name: str, R: float, coefficients, stagnation_temperature=288.15, units='J / kg-K'):
+        coefficients = tuple(tuple(float(a) for a in row) for row in np.reshape(coefficients, (2, 7)))
+        object.__setattr__(self, 'coefficients', coefficients)
+        object.__setattr__(self, 'stagnation_temperature', float(stagnation_temperature))
+        object.__setattr__(self, '_table', None)
+        object.__setattr__(self, 'R', R)
+        cp = float(self.specific_heat(stagnation_temperature))
+        fluid.__init__(self, name, cp/(cp - R), R, units=units, cp=cp, cv=cp - R)
+
+    def _properties(self) -> tuple:
+        return fluid._properties(self) + (self.coefficients, self.stagnation_temperature)
+
+    def _reconstruct(self) -> tuple:
+        return ThermallyPerfectGas, (self.name, self.R, self.coefficients, self.stagnation_temperature, self.units)
+
+    def __repr__(self):
+        return 'ThermallyPerfectGas(name=%r, R=%r, stagnation_temperature=%r)' % (self.name, self.R, self.stagnation_temperature)
+
+    def replace(self, **changes) -> 'ThermallyPerfectGas':
+        properties = dict(name=self.name, R=self.R, coefficients=self.coefficients, stagnation_temperature=self.stagnation_temperature, units=self.units)
+        properties.update(changes)
+        return ThermallyPerfectGas(**properties)
+
+    def at(self, stagnation_temperature: float) -> 'ThermallyPerfectGas':
+        """Return the gas held at another stagnation temperature"""
+
+        return _thermally_perfect(self.name, self.R, tuple(np.ravel(self.coefficients)), float(stagnation_temperature), self.units)
+
+    def _polynomial(self, temperature):
+        temperature = np.asarray(temperature, dtype=float)
+        low, high = np.array(self.coefficients)
+        return np.where(temperature[..., None] < 1000, low, high), temperature
+
+    def specific_heat(self, temperature):
+        """Return the specific heat at constant pressure at the given temperature"""
+
+        a, T = self._polynomial(temperature)
+        return (self.R * (a[..., 0] + T*(a[..., 1] + T*(a[..., 2] + T*(a[..., 3] + T*a[..., 4])))))[()]
+
+    def enthalpy(self, temperature):
+        """Return the specific enthalpy at the given temperature"""
+
+        a, T = self._polynomial(temperature)
+        return (self.R * (T*(a[..., 0] + T*(a[..., 1]/2 + T*(a[..., 2]/3 + T*(a[..., 3]/4 + T*a[..., 4]/5)))) + a[..., 5]))[()]
+
+    def entropy(self, temperature):
+        """Return the specific entropy at the reference pressure and the given temperature"""
+
+        a, T = self._polynomial(temperature)
+        return (self.R * (a[..., 0]*np.log(T) + T*(a[..., 1] + T*(a[..., 2]/2 + T*(a[..., 3]/3 + T*a[..., 4]/4))) + a[..., 6]))[()]
+
+    def ratio_of_specific_heats(self, temperature):
+        """Return the ratio of specific heats at the given temperature"""
+
+        cp = self.specific_heat(temperature)
+        return cp / (cp - self.R)
+
+    def _isentropic(self) -> dict:
+        """The isentropic expansion from the stagnation temperature, worked out once
+
+        Notes
+        -----
+        The static temperature runs from the stagnation temperature down to 50 K.
+        At each one the energy equation gives the Mach number, the entropy integral
+        the pressure ratio, and the mass flux per unit area the area ratio. The
+        ratios are then put on an even grid of the square of the Mach number, so a
+        lookup is an index and a weight rather than a search. The area ratio is
+        kept as the mass flux over the Mach number, which stays finite at rest.
+        """
+
+        if self._table is None:
+            Tt, R = self.stagnation_temperature, self.R
+            #even in the square root of the temperature drop, which is near even in Mach number
+            T = Tt - (Tt - min(50, Tt)) * np.linspace(0, 1, 8001)**2
+            gamma = self.ratio_of_specific_heats(T)
+            mach2 = 2 * (self.enthalpy(Tt) - self.enthalpy(T)) / (gamma * R * T)
+            pressure = np.exp((self.entropy(T) - self.entropy(Tt)) / R)
+            density = pressure * Tt / T
+            flux = density * (gamma * T / Tt)**.5
+            flux = flux / np.interp(1, mach2, flux * mach2**.5)
+            grid = np.linspace(0, mach2[-1], 2**16 + 1)
+            with np.errstate(divide='ignore'):
+                table = {'step': grid[1], 'mach': mach2**.5, 'area': 1 / (flux * mach2**.5)}
+            for column, values in (('temperature', T / Tt), ('pressure', pressure), ('density', density), ('flux', flux)):
+                table[column] = np.interp(grid, mach2, values)
+            object.__setattr__(self, '_table', table)
+        return self._table
+
+    def _ratio(self, mach, column: str):
+        """Interpolate an isentropic ratio at the given Mach numbers"""
+
+        table = self._isentropic()
+        values = table['flux' if column == 'area' else column]
+        mach = np.asarray(mach, dtype=float)
+        u = mach**2 / table['step']
+        i = np.clip(u.astype(int), 0, len(values) - 2)
+        ratio = values[i] + (u - i) * (values[i+1] - values[i])
+        ratio = np.where(u <= len(values) - 1, ratio, np.nan)
+        if column == 'area':
+            with np.errstate(divide='ignore'):
+                ratio = 1 / (mach * ratio)
+        return ratio[()]
+
+    def _mach_from_area_ratio(self, area_ratio, supersonic):
+        """Interpolate the Mach number on either branch of the area ratio"""
+
+        table = self._isentropic()
+        mach, area = table['mach'], table['area']
+        throat = np.argmin(area)
+        area_ratio = np.asarray(area_ratio, dtype=float)
+        subsonic = np.interp(area_ratio, area[throat:0:-1], mach[throat:0:-1], right=np.nan)
+        above = np.interp(area_ratio, area[throat:], mach[throat:], right=np.nan)
+        return np.where(area_ratio < 1, np.nan, np.where(supersonic, above, subsonic))
+
+
+
+#==================================================
+#tabulated gas
+#==================================================
+class TabulatedGas(ThermallyPerfectGas):
+    """A class to represent a thermally perfect gas whose specific heat is given by a table
+
+    Notes
+    -----
+    Where the properties of a gas come as a table against temperature, such as
+    those of the combustion products of a propellant, the specific heat is taken
+    linear between the temperatures of the table and constant past its ends. The
+    enthalpy and entropy integrals of it are then exact, and their cumulative
+    values at the temperatures of the table are worked out once when the gas is
+    made. A lookup is a search of the whole array of temperatures at once and a
+    closed form within the interval each falls in.
+
+    The table gives cp, or gamma and R, or cp and gamma. The gas constant the
+    relations use is the one at the stagnation temperature, as for a composition
+    frozen through the expansion. Otherwise it is a thermally perfect gas, so it
+    can be passed as gas to the same functions. The columns are not copied, so
+    those of a memory mapped table stay on disk.
+
+    Attributes
+    ----------
+    temperature : `ndarray`
+        The temperatures of the table, increasing \n
+    table_cp : `ndarray`
+        The specific heat at constant pressure at each temperature \n
+    stagnation_temperature : `float`
+        The stagnation temperature in K the stagnation relations refer to \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> import numpy as np
+    >>> T = np.linspace(200, 3000, 29)
+    >>> products = gd.TabulatedGas('products', T, cp=1100 + .2*T, R=300, stagnation_temperature=2500)
+    >>> products.gamma
+    1.2307692307692308
+    >>> gd.stagnation_temperature_ratio(2, gas=products)
+    0.6665143763581465
+    >>>
+    """
+
+    __slots__ = ('temperature', 'table_cp', '_integrals')
+
+    def __init__(self, name: str, temperature, cp=None, gamma=None, R=None, stagnation_temperature=288.15, units='J / kg-K'):
+        temperature = np.asarray(temperature, dtype=float)
+        if temperature.ndim != 1 or temperature.size < 2 or np.any(np.diff(temperature) <= 0):
+            raise ValueError('the temperatures must be a row of at least two that increase')
+        if R is None:
+            if cp is None or gamma is None:
+                raise ValueError('give cp and gamma, or R with one of them')
+            R = np.asarray(cp, dtype=float) * (np.asarray(gamma, dtype=float) - 1) / np.asarray(gamma, dtype=float)
+        R = np.broadcast_to(np.asarray(R, dtype=float), temperature.shape)
+        if cp is None:
+            if gamma is None:
+                raise ValueError('give cp or gamma')
+            gamma = np.asarray(gamma, dtype=float)
+            cp = gamma * R / (gamma - 1)
+        cp = np.broadcast_to(np.asarray(cp, dtype=float), temperature.shape)
+
+        #the cumulative enthalpy and entropy at the temperatures of the table, exact for cp linear between them
+        dT = np.diff(temperature)
+        slope = np.diff(cp) / dT
+        h = np.concatenate(([0], np.cumsum(cp[:-1]*dT + slope*dT**2/2)))
+        s = np.concatenate(([0], np.cumsum((cp[:-1] - slope*temperature[:-1]) * np.log(temperature[1:]/temperature[:-1]) + slope*dT)))
+        object.__setattr__(self, 'temperature', _read_only(temperature))
+        object.__setattr__(self, 'table_cp', _read_only(cp))
+        object.__setattr__(self, '_integrals', (slope, h, s))
+        object.__setattr__(self, 'coefficients', None)
+        object.__setattr__(self, 'stagnation_temperature', float(stagnation_temperature))
+        object.__setattr__(self, '_table', None)
+        R = float(np.interp(stagnation_temperature, temperature, R))
+        object.__setattr__(self, 'R', R)
+        cp = float(self.specific_heat(stagnation_temperature))
+        fluid.__init__(self, name, cp/(cp - R), R, units=units, cp=cp, cv=cp - R)
+
+    def _properties(self) -> tuple:
+        return fluid._properties(self) + (self.temperature.tobytes(), self.table_cp.tobytes(), self.stagnation_temperature)
+
+    def _reconstruct(self) -> tuple:
+        return TabulatedGas, (self.name, self.temperature, self.table_cp, None, self.R, self.stagnation_temperature, self.units)
+
+    def __repr__(self):
+        return 'TabulatedGas(name=%r, R=%r, stagnation_temperature=%r)' % (self.name, self.R, self.stagnation_temperature)
+
+    def replace(self, **changes) -> 'TabulatedGas':
+        properties = dict(name=self.name, temperature=self.temperature, cp=self.table_cp, R=self.R,
+            stagnation_temperature=self.stagnation_temperature, units=self.units)
+        properties.update(changes)
+        return TabulatedGas(**properties)
+
+    def at(self, stagnation_temperature: float) -> 'TabulatedGas':
+        """Return the gas held at another stagnation temperature"""
+
+        return self.replace(stagnation_temperature=stagnation_temperature)
+
+    def _interval(self, temperature):
+        """The temperature, cp, enthalpy and entropy at the start of the interval of each temperature, and the slope of cp in it"""
+
+        temperature = np.asarray(temperature, dtype=float)
+        nodes = self.temperature
+        slope, h, s = self._integrals
+        i = np.clip(np.searchsorted(nodes, temperature, side='right') - 1, 0, nodes.size - 2)
+        #past the ends of the table cp is constant
+        j = np.where(temperature > nodes[-1], nodes.size - 1, np.where(temperature < nodes[0], 0, i))
+        m = np.where((temperature >= nodes[0]) & (temperature <= nodes[-1]), slope[i], 0)
+        return temperature, nodes[j], self.table_cp[j], h[j], s[j], m
+
+    def specific_heat(self, temperature):
+        """Return the specific heat at constant pressure at the given temperature"""
+
+        T, base, cp, h, s, m = self._interval(temperature)
+        return (cp + m*(T - base))[()]
+
+    def enthalpy(self, temperature):
+        """Return the specific enthalpy at the given temperature"""
+
+        T, base, cp, h, s, m = self._interval(temperature)
+        return (h + cp*(T - base) + m*(T - base)**2/2)[()]
+
+    def entropy(self, temperature):
+        """Return the specific entropy at the reference pressure and the given temperature"""
+
+        T, base, cp, h, s, m = self._interval(temperature)
+        return (s + (cp - m*base)*np.log(T/base) + m*(T - base))[()]
+
+
+
+#==================================================
+#equilibrium air
+#==================================================
+class EquilibriumAir(fluid):
+    """A class to represent air in chemical equilibrium at high temperature
+
+    Notes
+    -----
+    Above about 2000 K the oxygen and then the nitrogen of air dissociate, and the
+    enthalpy, density and speed of sound of the air depend on its pressure as well
+    as its temperature. Air is taken as nitrogen, oxygen, nitric oxide, atomic
+    nitrogen and oxygen and argon, whose equilibrium at every temperature and
+    pressure follows from the Gibbs energies of the NASA 7 coefficient polynomials.
+    Past the top of its polynomials a species keeps the specific heat it has there.
+    Ionization is left out, so the properties are good to about 9000 K.
+
+    The equilibrium is solved once, on first use, on a grid of temperatures from
+    200 to 10000 K and pressures from 1 Pa to 100 MPa, and the properties are
+    interpolated in the grid after that. The speed of sound is the equilibrium one,
+    with the composition changing with the state. The gamma, R and cp are those of
+    cold air, for the functions that take the gas as calorically perfect.
+
+    Methods
+    -------
+    enthalpy(temperature, pressure)
+        The specific enthalpy \n
+    density(temperature, pressure)
+        The density \n
+    sound_speed(temperature, pressure)
+        The equilibrium speed of sound \n
+    temperature_from_enthalpy(enthalpy, pressure)
+        The temperature of the given enthalpy and pressure \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.equilibrium_air.density(300, 101325)
+    1.177263930779418
+    >>> gd.equilibrium_air.sound_speed([300, 5000], 101325)
+    array([ 346.90693386, 1445.90529527])
+    >>>
+    """
+
+    __slots__ = ('_table',)
+
+    def __init__(self):
+        object.__setattr__(self, '_table', None)
+        fluid.__init__(self, 'Equilibrium air', 1.4, 287.05, units='J / kg-K', cp=1004.675, cv=717.625)
 
-    def set_R(self):
-        """Set the gas constant for the fluid
+    def _properties(self) -> tuple:
+        return fluid._properties(self) + ('equilibrium',)
 
+    def _reconstruct(self) -> tuple:
+        return EquilibriumAir, ()
+
+    def __repr__(self):
+        return 'EquilibriumAir()'
+
+    def _equilibrium(self) -> dict:
+        """The properties of air in equilibrium on the grid of temperature and pressure, worked out once
+
+        Notes
+        -----
+        With the partial pressures of molecular nitrogen and oxygen known, those of
+        the other species follow from the equilibrium constants of O2 = 2 O,
+        N2 = 2 N and N2 + O2 = 2 NO. The two partial pressures are found from the
+        sum of the partial pressures and the ratio of nitrogen to oxygen atoms, with
+        Newton steps in their logarithms taken over the whole grid at once.
         """
 
-        self.R = self.cp / self.cv
+        if self._table is None:
+            T = np.arange(200, 10000.1, 20)
+            log_pressure = np.arange(0, 8.001, .05)
+            temperature, pressure = np.meshgrid(T, 10**log_pressure, indexing='ij')
+            p = pressure / 1e5 #bar, the reference pressure of the polynomials
+            species = _load_species()
+            h, s = {}, {}
+            for name in ('N2', 'O2', 'NO', 'N', 'O', 'Ar'):
+                h[name], s[name] = _nasa_integrals(species[name], temperature)
+            g = {name: h[name] - s[name] for name in h}
+            ln_oxygen = g['O2'] - 2*g['O']
+            ln_nitrogen = g['N2'] - 2*g['N']
+            ln_nitric_oxide = g['N2'] + g['O2'] - 2*g['NO']
+
+            #atoms of argon per atom of nitrogen, and of oxygen
+            argon = _AIR_ATOMS['Ar'] / _AIR_ATOMS['N']
+            oxygen = _AIR_ATOMS['O'] / _AIR_ATOMS['N']
+            x = np.log(p * _AIR['N2'])
+            y = np.log(p * _AIR['O2'])
+            for _ in range(100):
+                N2, O2 = np.exp(x), np.exp(y)
+                O, N, NO = np.exp((ln_oxygen + y)/2), np.exp((ln_nitrogen + x)/2), np.exp((ln_nitric_oxide + x + y)/2)
+                nitrogen_atoms, oxygen_atoms = 2*N2 + NO + N, 2*O2 + NO + O
+                total = (N2 + O2 + NO + N + O + argon*nitrogen_atoms) / p - 1
+                balance = (oxygen*nitrogen_atoms - oxygen_atoms) / p
+                dtotal_dx = (N2 + N/2 + NO/2 + argon*(2*N2 + NO/2 + N/2)) / p
+                dtotal_dy = (O2 + O/2 + NO/2 + argon*NO/2) / p
+                dbalance_dx = (oxygen*(2*N2 + NO/2 + N/2) - NO/2) / p
+                dbalance_dy = (oxygen*NO/2 - 2*O2 - NO/2 - O/2) / p
+                determinant = dtotal_dx*dbalance_dy - dtotal_dy*dbalance_dx
+                dx = np.clip((dtotal_dy*balance - dbalance_dy*total) / determinant, -2, 2)
+                dy = np.clip((dbalance_dx*total - dtotal_dx*balance) / determinant, -2, 2)
+                x, y = x + dx, y + dy
+                if max(np.abs(dx).max(), np.abs(dy).max()) < 1e-12:
+                    break
+
+            N2, O2 = np.exp(x), np.exp(y)
+            partial = {'N2': N2, 'O2': O2, 'NO': np.exp((ln_nitric_oxide + x + y)/2), 'N': np.exp((ln_nitrogen + x)/2),
+                'O': np.exp((ln_oxygen + y)/2)}
+            partial['Ar'] = argon * (2*N2 + partial['NO'] + partial['N'])
+            fraction = {name: partial[name] / p for name in partial}
+            molar_mass = sum(fraction[name] * species[name]['molar_mass'] for name in fraction)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mixing = sum(np.where(partial[name] > 0, fraction[name] * np.log(partial[name]), 0) for name in fraction)
+            enthalpy = _UNIVERSAL_GAS_CONSTANT * temperature * sum(fraction[name] * h[name] for name in fraction) / molar_mass
+            entropy = _UNIVERSAL_GAS_CONSTANT * (sum(fraction[name] * s[name] for name in fraction) - mixing) / molar_mass
+            density = pressure * molar_mass / (_UNIVERSAL_GAS_CONSTANT * temperature)
+
+            #the speed of sound at constant entropy, from the derivatives in temperature
+            #and the logarithm of pressure
+            density_T, density_lp = np.gradient(density, T, log_pressure*np.log(10))
+            entropy_T, entropy_lp = np.gradient(entropy, T, log_pressure*np.log(10))
+            sound_speed = (pressure / (density_lp - density_T*entropy_lp/entropy_T))**.5
+            specific_heat = np.gradient(enthalpy, T, axis=0)
+            object.__setattr__(self, '_table', {'temperature': T, 'log_pressure': log_pressure, 'enthalpy': enthalpy,
+                'density': density, 'sound_speed': sound_speed, 'specific_heat': specific_heat})
+        return self._table
+
+    def _interpolate(self, column: str, temperature, pressure):
+        """Interpolate a property linearly in temperature and the logarithm of pressure"""
+
+        table = self._equilibrium()
+        T, log_pressure, values = table['temperature'], table['log_pressure'], table[column]
+        temperature, pressure = np.broadcast_arrays(np.asarray(temperature, dtype=float), np.asarray(pressure, dtype=float))
+        u = (temperature - T[0]) / (T[1] - T[0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v = (np.log10(pressure) - log_pressure[0]) / (log_pressure[1] - log_pressure[0])
+        i = np.clip(np.floor(u).astype(int), 0, len(T) - 2)
+        j = np.clip(np.floor(np.nan_to_num(v)).astype(int), 0, len(log_pressure) - 2)
+        u, v = u - i, v - j
+        value = ((1-u)*(1-v)*values[i, j] + u*(1-v)*values[i+1, j] + (1-u)*v*values[i, j+1] + u*v*values[i+1, j+1])
+        inside = (u >= 0) & (u <= 1) & (v >= 0) & (v <= 1)
+        return np.where(inside, value, np.nan)[()]
+
+    def enthalpy(self, temperature, pressure):
+        """Return the specific enthalpy at the given temperature and pressure"""
+
+        return self._interpolate('enthalpy', temperature, pressure)
+
+    def density(self, temperature, pressure):
+        """Return the density at the given temperature and pressure"""
+
+        return self._interpolate('density', temperature, pressure)
 
-    
+    def sound_speed(self, temperature, pressure):
+        """Return the equilibrium speed of sound at the given temperature and pressure"""
 
-#Initialize some fluids in the metric system
+        return self._interpolate('sound_speed', temperature, pressure)
+
+    def temperature_from_enthalpy(self, enthalpy, pressure):
+        """Return the temperature at the given specific enthalpy and pressure"""
+
+        table = self._equilibrium()
+        enthalpy, pressure = np.broadcast_arrays(np.asarray(enthalpy, dtype=float), np.asarray(pressure, dtype=float))
+        temperature, _ = _bracketed_newton(lambda T, h, p: self.enthalpy(T, p) - h,
+            lambda T, h, p: self._interpolate('specific_heat', T, p), table['temperature'][0], table['temperature'][-1],
+            args=(enthalpy, pressure), tol=1e-10)
+        low, high = self.enthalpy(table['temperature'][[0, -1]][:, None], pressure.ravel()).reshape((2,) + pressure.shape)
+        return np.where((enthalpy >= low) & (enthalpy <= high), temperature, np.nan)[()]
+
+
+
+#==================================================
+#gas array
 #==================================================
-air = fluid(name='Air', gamma=1.4, R=286.9, units='J / kg-K')
-air.cp, air.cv = 1000, 716
+class GasArray(fluid):
+    """A class to represent a fluid whose properties change from point to point
 
-argon = fluid(name='Argon', gamma=1.67, R=208, units='J / kg-K')
-argon.cp, argon.cv = 519, 310
+    Notes
+    -----
+    Along a combustor or across a mixing layer the composition of the gas, and
+    with it gamma and R, changes from point to point. A gas array holds the
+    properties as arrays, and so do the constants of the ratio of specific heats,
+    which are worked out once when it is made. It can be passed as gas to the
+    relations, which broadcast its properties against their other arrays as they
+    would a Mach number, so a whole solution of varying composition goes through
+    one call. The columns are not copied and can't be changed.
 
-CO2 = fluid(name='Carbon Dioxide', gamma=1.29, R=189, units='J / kg-K')
-CO2.cp, CO2.cv = 850, 657
+    Where no specific heats are given they are taken from gamma and R. A gc other
+    than one marks the points whose properties are in US units, and the functions
+    that take dimensional inputs read those points in US units.
 
-CO = fluid(name='Carbon Monoxide', gamma=1.4, R=297, units='J / kg-K')
-CO.cp, CO.cv = 1040, 741
+    Attributes
+    ----------
+    shape : `tuple`
+        The shape of the property arrays \n
 
-helium = fluid(name='Helium', gamma=1.67, R=2080, units='J / kg-K')
-helium.cp, helium.cv = 5230, 3140
+    Methods
+    -------
+    si()
+        Return the gas array with its properties in SI units \n
 
-hydrogen = fluid(name='Hydrogen', gamma=1.41, R=4120, units='J / kg-K')
-hydrogen.cp, hydrogen.cv = 14300, 10200
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gas = gd.GasArray(gamma=[1.4, 1.3, 1.67], R=[287, 300, 208])
+    >>> gd.stagnation_temperature_ratio(2, gas=gas)
+    array([0.55555556, 0.625     , 0.42735043])
+    >>> gd.shock_mach(2, gas=gas)
+    array([0.57735027, 0.56287804, 0.60728439])
+    >>>
+    """
+
+    def __init__(self, gamma, R, cp=None, cv=None, gc=1, name='Gas array', units='J / kg-K'):
+        gamma, R, gc = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (gamma, R, gc)])
+        cp = gamma * R / (gamma - 1) if cp is None else np.broadcast_to(np.asarray(cp, dtype=float), gamma.shape)
+        cv = cp - R if cv is None else np.broadcast_to(np.asarray(cv, dtype=float), gamma.shape)
+        fluid.__init__(self, name, *[_read_only(a) for a in (gamma, R)], units=units, cp=_read_only(cp), cv=_read_only(cv),
+            gc=_read_only(gc))
+        for attribute in ('half_gamma_minus_one', 'half_gamma_plus_one', 'pressure_exponent', 'density_exponent', 'area_exponent', 'gamma_ratio'):
+            object.__setattr__(self, attribute, _read_only(getattr(self, attribute)))
+
+    def _properties(self) -> tuple:
+        return (self.name, self.units, self.shape) + tuple(a.tobytes() for a in (self.gamma, self.R, self.cp, self.cv, self.gc))
+
+    def _reconstruct(self) -> tuple:
+        return GasArray, (self.gamma, self.R, self.cp, self.cv, self.gc, self.name, self.units)
+
+    def __repr__(self):
+        return 'GasArray(name=%r, shape=%r)' % (self.name, self.shape)
+
+    def __len__(self):
+        return len(self.gamma)
+
+    def __getitem__(self, index) -> 'GasArray':
+        return GasArray(self.gamma[index], self.R[index], self.cp[index], self.cv[index], self.gc[index], self.name, self.units)
+
+    @property
+    def shape(self) -> tuple:
+        return self.gamma.shape
+
+    def replace(self, **changes) -> 'GasArray':
+        properties = dict(gamma=self.gamma, R=self.R, cp=self.cp, cv=self.cv, gc=self.gc, name=self.name, units=self.units)
+        properties.update(changes)
+        return GasArray(**properties)
 
-methane = fluid(name='Methane', gamma=1.32, R=519, units='J / kg-K')
-methane.cp, methane.cv = 2230, 1690
+    @property
+    def unit_system(self):
+        us = self.gc != 1
+        if not us.any():
+            return SI
+        if us.all():
+            return US
+        return np.where(us, US.name, SI.name)
 
-nitrogen = fluid(name='Nitrogen', gamma=1.4, R=296, units='J / kg-K')
-nitrogen.cp, nitrogen.cv = 1040, 741
+    def si(self) -> 'GasArray':
+        """Return the gas array with its properties in SI units"""
 
-O2 = fluid(name='Oxygen', gamma=1.4, R=260, units='J / kg-K')
-O2.cp, O2.cv = 913, 653
+        us = self.gc != 1
+        if not us.any():
+            return self
+        R, cp, cv = [np.where(us, to_si(a, quantity, US), a) for a, quantity in ((self.R, 'gas_constant'),
+            (self.cp, 'specific_heat'), (self.cv, 'specific_heat'))]
+        return GasArray(self.gamma, R, cp, cv, name=self.name)
 
-water = fluid(name='water', gamma=1.33, R=461, units='J / kg-K')
-water.cp, water.cv = 1860, 1400
 
 
-#and in the british standard (Btu / lbm-R)
-#============================================================
-air_us = fluid(name='Air', gamma=1.4, R=53.3, units='Btu / lbm-R')
-air_us.cp, air_us.cv = 0.240, 0.171
-air_us.gc = 32.174
+#==================================================
+#get fluid
+#==================================================
+def get_fluid(name: str, us=False) -> fluid:
+    """Return a fluid of the registry by its name, formula or alias
+
+    Notes
+    -----
+    The properties of the fluids are read from the data file bundled with the
+    package the first time one is asked for, and every fluid is made once and
+    shared after that. Names are not case sensitive. The module level names,
+    such as air and air_us, are looked up the same way.
 
-argon_us = fluid(name='Argon', gamma=1.67, R=38.7, units='Btu / lbm-R')
-argon_us.cp, argon_us.cv = 0.124, 0.074
-argon_us.gc = 32.174
+    Parameters
+    ----------
+    name : `str`
+        The name, chemical formula or alias of the fluid \n
+    us : `bool`
+        Return the fluid in the British standard units, Btu / lbm-R. Default is
+        metric \n
+
+    Returns
+    -------
+    fluid
+        The fluid \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.get_fluid('N2')
+    fluid(name='Nitrogen', gamma=1.4, R=296.0, units='J / kg-K', cp=1040.0, cv=741.0, gc=1)
+    >>> gd.get_fluid('steam', us=True).R
+    85.7
+    >>>
+    """
 
-CO2_us = fluid(name='Carbon Dioxide', gamma=1.29, R=35.1, units='Btu / lbm-R')
-CO2_us.cp, CO2_us.cv = 0.203, 0.157
-CO2_us.gc = 32.174
+    if _rows is None:
+        _load()
+    key = _index.get(name.strip().lower())
+    if key is None:
+        raise KeyError('no fluid named %r' % name)
+    key = key + '_us' if us else key
+    if key not in _fluids:
+        row = _rows[key[:-3] if us else key]
+        if us:
+            gas = fluid(row['name'], float(row['gamma']), float(row['R_us']), units='Btu / lbm-R', cp=float(row['cp_us']),
+                cv=float(row['cv_us']), gc=32.174)
+        else:
+            gas = fluid(row['name'], float(row['gamma']), float(row['R']), units='J / kg-K', cp=float(row['cp']), cv=float(row['cv']))
+        #the fluids of the registry pickle as their key
+        object.__setattr__(gas, '_key', key)
+        _fluids[key] = gas
+    return _fluids[key]
 
-CO_us = fluid(name='Carbon Monoxide', gamma=1.4, R=55.2, units='Btu / lbm-R')
-CO_us.cp, CO_us.cv = 0.248, 0.177
-CO_us.gc = 32.174
 
-helium_us = fluid(name='Helium', gamma=1.67, R=386, units='Btu / lbm-R')
-helium_us.cp, helium_us.cv = 1.25, 0.750
-helium_us.gc = 32.174
 
-hydrogen_us = fluid(name='Hydrogen', gamma=1.41, R=766, units='Btu / lbm-R')
-hydrogen_us.cp, hydrogen_us.cv = 3.42, 2.43
-hydrogen_us.gc = 32.174
+#==================================================
+#mixture
+#==================================================
+def mixture(components: dict, basis='mass', us=False) -> fluid:
+    """Return the ideal gas mixture of the given fluids
+
+    Notes
+    -----
+    Given the fraction of every component, by mass or by mole, return a fluid
+    with the gas constant, specific heats and ratio of specific heats of the
+    mixture. Every component is taken as an ideal gas with the specific heat at
+    constant volume R/(gamma-1), so a mixture of a single fluid has its gamma and
+    R. The fractions are scaled to sum to one. Mixtures are cached by their
+    composition, so a composition that repeats costs a dictionary lookup.
+
+    Parameters
+    ----------
+    components : `dict`
+        The fraction of every component, keyed by fluid or by the name of a fluid
+        of the registry \n
+    basis : `str`
+        'mass' or 'mole' fractions. Default is 'mass' \n
+    us : `bool`
+        Look the named components up in the British standard units. Default is
+        metric \n
+
+    Returns
+    -------
+    fluid
+        The mixture \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> products = gd.mixture({'N2': .72, 'CO2': .15, 'H2O': .13})
+    >>> products.gamma, products.R
+    (1.3711070019926879, 301.4)
+    >>> gd.mixture({'N2': .79, 'O2': .21}, basis='mole').R
+    287.63641799970105
+    >>>
+    """
+
+    if basis not in ('mass', 'mole'):
+        raise ValueError("basis must be 'mass' or 'mole'")
+    items = tuple((get_fluid(gas, us=us) if isinstance(gas, str) else gas, float(fraction)) for gas, fraction in components.items())
+    return _mixture(items, basis)
+
+
+@lru_cache(maxsize=1024)
+def _mixture(items: tuple, basis: str) -> fluid:
+    """The mixture of a tuple of fluids and their fractions"""
+
+    gasses = [gas for gas, fraction in items]
+    if len({(gas.units, gas.gc) for gas in gasses}) > 1:
+        raise ValueError('the components of a mixture must share their units')
+    fractions = [fraction for gas, fraction in items]
+    if basis == 'mole':
+        #the molar mass of a component goes as 1/R
+        fractions = [fraction / gas.R for gas, fraction in items]
+    total = sum(fractions)
+    fractions = [fraction / total for fraction in fractions]
+
+    R = sum(fraction * gas.R for gas, fraction in zip(gasses, fractions))
+    cv = sum(fraction * gas.R / (gas.gamma - 1) for gas, fraction in zip(gasses, fractions))
+    name = ' + '.join('%.4g %s' % (fraction, gas.name) for gas, fraction in zip(gasses, fractions))
+    return fluid(name, (cv + R) / cv, R, units=gasses[0].units, cp=cv + R, cv=cv, gc=gasses[0].gc)
+
+
+
+#==================================================
+#gas array
+#==================================================
+def gas_array(gasses, index=None) -> GasArray:
+    """Return a gas array from the fluids at every point
+
+    Notes
+    -----
+    Given a fluid for every point, or a few fluids and the index of the fluid at
+    every point, such as the zone or species of the cells of a solution, return a
+    gas array with the properties of the fluid at every point. With an index the
+    properties are gathered in one step for each column.
+
+    Parameters
+    ----------
+    gasses : `array_like`
+        The fluid at every point, or the fluids the index refers to \n
+    index : `array_like`
+        The index into gasses of the fluid at every point. Default is none, for a
+        fluid at every point \n
+
+    Returns
+    -------
+    GasArray
+        The gas array \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gas = gd.gas_array([gd.get_fluid('air'), gd.get_fluid('argon')], index=[0, 0, 1])
+    >>> gas.gamma
+    array([1.4 , 1.4 , 1.67])
+    >>>
+    """
+
+    if index is None:
+        gasses = np.asarray(gasses, dtype=object)
+        distinct = list(set(gasses.ravel().tolist()))
+        lookup = {gas: i for i, gas in enumerate(distinct)}
+        index = np.fromiter((lookup[gas] for gas in gasses.ravel()), dtype=int, count=gasses.size).reshape(gasses.shape)
+        gasses = distinct
+    index = np.asarray(index, dtype=int)
+    columns = [np.array([getattr(gas, attribute) for gas in gasses], dtype=float) for attribute in ('gamma', 'R', 'gc')]
+    gamma, R, gc = columns
+    #a fluid without specific heats takes them from gamma and R
+    cp = np.array([gas.gamma * gas.R / (gas.gamma - 1) if gas.cp is None else gas.cp for gas in gasses], dtype=float)
+    cv = np.array([cp_ - gas.R if gas.cv is None else gas.cv for gas, cp_ in zip(gasses, cp)], dtype=float)
+    name = ' | '.join(gas.name for gas in gasses)
+    return GasArray(gamma[index], R[index], cp[index], cv[index], gc[index], name=name, units=gasses[0].units)
+
+
+
+#==================================================
+#thermally perfect gas
+#==================================================
+def thermally_perfect_gas(composition='air', stagnation_temperature=288.15, basis='mole') -> ThermallyPerfectGas:
+    """Return a thermally perfect gas of one species or a mixture of them
+
+    Notes
+    -----
+    The NASA 7 coefficient polynomials of the species are read from the data file
+    bundled with the package. A mixture has the coefficients of its species
+    weighed by mole fraction and the gas constant of its mean molar mass. Air is
+    taken as nitrogen, oxygen, argon and carbon dioxide. Gasses are cached by
+    their composition and stagnation temperature, and so are their tables.
+
+    Parameters
+    ----------
+    composition : `str` or `dict`
+        A species, by formula or name, or the fraction of every species \n
+    stagnation_temperature : `float`
+        The stagnation temperature in K the stagnation relations refer to \n
+    basis : `str`
+        'mole' or 'mass' fractions. Default is 'mole' \n
+
+    Returns
+    -------
+    ThermallyPerfectGas
+        The gas \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.thermally_perfect_gas('N2', stagnation_temperature=1500).gamma
+    1.3143212389578163
+    >>> products = gd.thermally_perfect_gas({'N2': .72, 'CO2': .1, 'H2O': .18}, stagnation_temperature=1800)
+    >>> products.R
+    298.93785165399214
+    >>>
+    """
+
+    if basis not in ('mass', 'mole'):
+        raise ValueError("basis must be 'mass' or 'mole'")
+    if isinstance(composition, str):
+        name = composition
+        composition = _AIR if composition.strip().lower() == 'air' else {composition: 1}
+    else:
+        name = ' + '.join('%.4g %s' % (fraction, species) for species, fraction in composition.items())
+    species = _load_species()
+    rows = [(species[_species(s)], float(fraction)) for s, fraction in composition.items()]
+    if basis == 'mass':
+        rows = [(row, fraction / row['molar_mass']) for row, fraction in rows]
+    total = sum(fraction for row, fraction in rows)
+    coefficients = sum(fraction / total * row['coefficients'] for row, fraction in rows)
+    molar_mass = sum(fraction / total * row['molar_mass'] for row, fraction in rows)
+    return _thermally_perfect(name, _UNIVERSAL_GAS_CONSTANT / molar_mass, tuple(coefficients.ravel()), float(stagnation_temperature), 'J / kg-K')
+
+
+#==================================================
+#register fluid
+#==================================================
+def register_fluid(gas: fluid, key=None) -> fluid:
+    """Add a fluid of your own to the registry, so it has a key that names it in every process
+
+    Notes
+    -----
+    A fluid sent to another process is pickled with it and made again on the other
+    side, a new fluid every time. The built in fluids pickle as their key instead.
+    Registering a fluid gives it a key too, and from then on it pickles as its key
+    and properties. Where the key is registered, as it is in the workers of a fluid
+    pool, the fluid is looked up by its key, so every task gets the same fluid and
+    what is cached against it. Anywhere else it is made from its properties and
+    registered there. Without a key the fluid is keyed by its name and a digest of its
+    properties, so fluids that share a name, such as the cases of a sweep, get
+    keys of their own. Registering the same fluid again does nothing.
+
+    Parameters
+    ----------
+    gas : `fluid`
+        The fluid, which may be a thermally perfect gas or a gas array \n
+    key : `str`
+        The key of the fluid. Default is its name in lower case and a digest of its
+        properties \n
+
+    Returns
+    -------
+    fluid
+        The fluid, which is registered in place \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> import pickle
+    >>> foobar = gd.register_fluid(gd.fluid('Foobar', 1.32, 320))
+    >>> pickle.loads(pickle.dumps(foobar)) is foobar
+    True
+    >>>
+    """
+
+    if key is None:
+        if gas._key is not None:
+            return gas
+        key = '%s#%s' % (gas.name.strip().lower(), sha1(repr(gas._properties()).encode()).hexdigest()[:16])
+    if _rows is None:
+        _load()
+    if key in _index or (key.endswith('_us') and key[:-3] in _index):
+        raise ValueError('%r is the key of a built in fluid' % key)
+    if gas._key is not None and gas._key != key:
+        raise ValueError('the fluid is registered as %r' % gas._key)
+    if key in _custom and _custom[key] is not gas:
+        if _custom[key] != gas:
+            raise ValueError('another fluid is registered as %r' % key)
+        return _custom[key]
+    object.__setattr__(gas, '_key', key)
+    _custom[key] = gas
+    return gas
+
+
+
+#==================================================
+#fluid pool
+#==================================================
+def fluid_pool(fluids=(), max_workers=None, initializer=None, initargs=()) -> ProcessPoolExecutor:
+    """Return a process pool whose workers are given the fluids once, when they start
+
+    Notes
+    -----
+    The fluids are registered, see register_fluid, and sent to every worker once
+    through the initializer of the pool. The tasks sent to the pool after that
+    find them by their key, so every task in a worker gets the same fluid, and
+    what the worker has cached against it, rather than a copy made for the task.
+    The built in fluids and equilibrium air don't need to be given.
+
+    Parameters
+    ----------
+    fluids : `list`
+        The fluids the tasks use \n
+    max_workers : `int`
+        The number of worker processes. Default is the number of processors \n
+    initializer : `callable`
+        A function every worker calls once the fluids are registered \n
+    initargs : `tuple`
+        The arguments of the initializer \n
+
+    Returns
+    -------
+    ProcessPoolExecutor
+        The process pool \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gasses = [gd.fluid('gas %d' % i, 1.2 + i/100, 287) for i in range(20)]
+    >>> with gd.fluid_pool(gasses, max_workers=2) as pool:
+    ...     ratios = list(pool.map(gd.stagnation_temperature_ratio, [2]*20, gasses))
+    >>> ratios[0]
+    0.7142857142857143
+    >>>
+    """
+
+    #the built in fluids are found by their key in every process already
+    fluids = [register_fluid(gas, gas._key) for gas in fluids if gas._key is None or gas._key in _custom]
+    payload = tuple((gas._key, gas._reconstruct()) for gas in fluids)
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_register_fluids, initargs=(payload, initializer, initargs))
+
+
+
+def _register_fluids(payload: tuple, initializer=None, initargs=()):
+    """Register the fluids sent to a worker of a fluid pool, then run its initializer"""
+
+    for key, (constructor, arguments) in payload:
+        register_fluid(constructor(*arguments), key)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+#==================================================
+#load gas table
+#==================================================
+def load_gas_table(path: str, name=None, columns=None, R=None, stagnation_temperature=288.15) -> TabulatedGas:
+    """Return a tabulated gas from a table of its properties against temperature
+
+    Notes
+    -----
+    The table is a CSV file whose header names its columns, or a .npy file of a
+    structured array or of a two dimensional one whose columns are named by
+    columns. The columns are temperature and two of cp, gamma and R, not case
+    sensitive, or one of cp and gamma when R is given. A .npy file is memory
+    mapped, so a large table is read only where it is used. The properties are in
+    SI units.
+
+    Parameters
+    ----------
+    path : `str`
+        The path of the .csv or .npy file \n
+    name : `str`
+        The name of the gas. Default is the name of the file \n
+    columns : `list`
+        The names of the columns of a table with none. Default is temperature, cp,
+        gamma and R, as many as it has \n
+    R : `float`
+        The gas constant, where the table doesn't give it \n
+    stagnation_temperature : `float`
+        The stagnation temperature in K the stagnation relations refer to. Default
+        is 288.15 K \n
+
+    Returns
+    -------
+    TabulatedGas
+        The gas \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> import numpy as np
+    >>> T = np.linspace(200, 3000, 29)
+    >>> np.save('products.npy', np.column_stack([T, 1100 + .2*T]))
+    >>> products = gd.load_gas_table('products.npy', columns=['temperature', 'cp'], R=300, stagnation_temperature=2500)
+    >>> gd.mach_from_area_ratio(10, gas=products)
+    [0.05919805320201723, 3.4774239211955544]
+    >>>
+    """
+
+    if path.lower().endswith('.npy'):
+        table = np.load(path, mmap_mode='r')
+    else:
+        table = np.genfromtxt(path, delimiter=',', names=True, dtype=float, encoding='utf-8')
+    if table.dtype.names is None:
+        table = np.atleast_2d(table)
+        columns = ('temperature', 'cp', 'gamma', 'R')[:table.shape[1]] if columns is None else columns
+        if len(columns) != table.shape[1]:
+            raise ValueError('the table has %d columns and %d names' % (table.shape[1], len(columns)))
+        table = {column: table[:, k] for k, column in enumerate(columns)}
+    else:
+        table = {column: table[column] for column in table.dtype.names}
+    table = {column.strip().lower(): values for column, values in table.items()}
+    if 'temperature' not in table:
+        raise ValueError('the table has no temperature column')
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    return TabulatedGas(name, table['temperature'], cp=table.get('cp'), gamma=table.get('gamma'), R=table.get('r', R),
+        stagnation_temperature=stagnation_temperature)
+
+
+
+@lru_cache(maxsize=256)
+def _thermally_perfect(name, R, coefficients, stagnation_temperature, units):
+    """A thermally perfect gas, made once for every composition and stagnation temperature"""
+
+    return ThermallyPerfectGas(name, R, coefficients, stagnation_temperature=stagnation_temperature, units=units)
+
+
+_UNIVERSAL_GAS_CONSTANT = 8314.462618 #J / kmol-K
+_AIR = {'N2': .7808, 'O2': .2095, 'Ar': .0093, 'CO2': .0004}
+#the atoms of the same air, with its carbon dioxide taken as oxygen
+_AIR_ATOMS = {'N': 1.5616, 'O': .4198, 'Ar': .0093}
+_species_rows = None
+
+def _load_species() -> dict:
+    """Read the bundled NASA polynomials, once"""
+
+    global _species_rows
+    if _species_rows is None:
+        with open(os.path.join(os.path.dirname(__file__), 'data', 'nasa7.csv'), newline='') as f:
+            _species_rows = {row['species']: {'molar_mass': float(row['molar_mass']), 't_high': float(row['t_high']),
+                'coefficients': np.array([[float(row['a%d_%s' % (i, part)]) for i in range(1, 8)] for part in ('low', 'high')])}
+                for row in csv.DictReader(f)}
+    return _species_rows
+
+
+def _nasa_integrals(species: dict, temperature):
+    """The molar enthalpy over RT and entropy over R of a species at the reference pressure
+
+    Past the top of its polynomials the species keeps the specific heat it has there.
+    """
+
+    T = np.minimum(temperature, species['t_high'])
+    a = np.where(T[..., None] < 1000, *species['coefficients'])
+    cp = a[..., 0] + T*(a[..., 1] + T*(a[..., 2] + T*(a[..., 3] + T*a[..., 4])))
+    enthalpy = T*(a[..., 0] + T*(a[..., 1]/2 + T*(a[..., 2]/3 + T*(a[..., 3]/4 + T*a[..., 4]/5)))) + a[..., 5]
+    entropy = a[..., 0]*np.log(T) + T*(a[..., 1] + T*(a[..., 2]/2 + T*(a[..., 3]/3 + T*a[..., 4]/4))) + a[..., 6]
+    return (enthalpy + cp*(temperature - T)) / temperature, entropy + cp*np.log(temperature / T)
+
+
+def _species(name: str) -> str:
+    """The formula of a species, by formula or by the name of a fluid of the registry"""
+
+    species = _load_species()
+    if name in species:
+        return name
+    for formula in species:
+        if formula.lower() == name.strip().lower():
+            return formula
+    if _rows is None:
+        _load()
+    key = _index.get(name.strip().lower())
+    if key is not None and _rows[key]['formula'] in species:
+        return _rows[key]['formula']
+    raise KeyError('no NASA polynomials for %r' % name)
+
+
+
+_rows = None
+_index = None
+_fluids = {}
+_custom = {}
+
+def _load():
+    """Read the bundled data file and index its fluids by key, name, formula and alias"""
+
+    global _rows, _index
+    with open(os.path.join(os.path.dirname(__file__), 'data', 'fluids.csv'), newline='') as f:
+        rows = {row['key']: row for row in csv.DictReader(f)}
+    index = {}
+    for key, row in rows.items():
+        for name in [key, row['name'], row['formula']] + row['aliases'].split(';'):
+            if name:
+                index.setdefault(name.strip().lower(), key)
+    _rows, _index = rows, index
+
+
+def _read_only(array):
+    """A view of an array that can't be written to"""
+
+    view = np.asarray(array).view()
+    view.flags.writeable = False
+    return view
+
+
+@lru_cache(maxsize=256)
+def _si(gas: fluid) -> fluid:
+    """A fluid in US units in SI units, made once"""
+
+    def convert(value, quantity):
+        return None if value is None else float(to_si(value, quantity, US))
+
+    return fluid(gas.name, gas.gamma, convert(gas.R, 'gas_constant'), units='J / kg-K', cp=convert(gas.cp, 'specific_heat'),
+        cv=convert(gas.cv, 'specific_heat'))
+
+
+def _registered(key: str, reconstruct=None) -> fluid:
+    """Return a fluid of the registry by its key, or make and register it from how it
+    is reconstructed if the key isn't registered in this process
+    """
+
+    if key in _custom:
+        return _custom[key]
+    if reconstruct is not None:
+        constructor, arguments = reconstruct
+        return register_fluid(constructor(*arguments), key)
+    if key.endswith('_us'):
+        return get_fluid(key[:-3], us=True)
+    return get_fluid(key)
 
-methane_us = fluid(name='Methane', gamma=1.32, R=96.4, units='Btu / lbm-R')
-methane_us.cp, methane_us.cv = 0.532, 0.403
-methane_us.gc = 32.174
 
-nitrogen_us = fluid(name='Nitrogen', gamma=1.4, R=55.1, units='Btu / lbm-R')
-nitrogen_us.cp, nitrogen_us.cv = 0.248, 0.177 
-nitrogen_us.gc = 32.174
+def __getattr__(name: str):
+    #the fluids of the registry are module attributes, made on first use
+    if not name.startswith('_'):
+        if _rows is None:
+            _load()
+        if name in _rows or (name.endswith('_us') and name[:-3] in _rows):
+            return _registered(name)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
 
-O2_us = fluid(name='Oxygen', gamma=1.4, R=48.3, units='Btu / lbm-R')
-O2_us.cp, O2_us.cv = 0.218, 0.156
-O2_us.gc = 32.174
 
-water_us = fluid(name='water', gamma=1.33, R=85.7, units='Btu / lbm-R')
-water_us.cp, water_us.cv = 0.445, 0.335
-water_us.gc = 32.174
\ No newline at end of file
+equilibrium_air = EquilibriumAir()
@@ -0,0 +1,243 @@
+#!usr/bin/env
+#Generalized quasi one dimensional flow, where area change, friction, heat
+#transfer and mass addition act on the flow at once. The Mach number is
+#integrated along the duct with the influence coefficients of Shapiro, and
+#every other property follows from the Mach number and the conserved
+#quantities.
+#
+#
+#Copyright 2020 by Fernando A de la Fuente
+#All rights reserved
+
+import numpy as np
+from gas_dynamics.rayleigh.rayleigh import _rayleigh_cp
+from gas_dynamics.fluids import air
+
+
+
+#==================================================
+#generalized flow
+#==================================================
+def generalized_flow(mach_initial: float, stagnation_temperature_initial: float, x, area_initial: float, area_gradient=0,
+    friction=0, heat=0, mass_addition=0, diameter=None, tol=1e-8, sonic_band=1e-3, gas=air, return_choked=False) -> np.ndarray:
+    """Return the flow along ducts with area change, friction, heat transfer and mass addition
+
+    Notes
+    -----
+    The square of the Mach number obeys
+
+    dM^2/M^2 = psi/(1 - M^2) * (-2 dA/A + gamma M^2 f dx/D + (1 + gamma M^2) dTt/Tt + 2 (1 + gamma M^2) dm/m)
+
+    where psi = 1 + (gamma-1)/2 M^2, f is the Darcy friction factor and the added mass
+    enters with no axial velocity at the stagnation temperature of the flow. The
+    distributions are sampled at the points x and taken linear between them, and the
+    area, stagnation temperature and mass flow are their exact integrals. Between the
+    points the Mach number is integrated with an embedded Runge-Kutta scheme of third
+    order whose step adapts to the error and shrinks as the flow nears a Mach number of
+    one, where the equation is singular.
+
+    Inside the sonic band around a Mach number of one, the slope is taken from
+    L'Hopital's rule, which gives a quadratic in the slope from the derivatives of the
+    numerator. Where it has a root that carries the flow across, the flow passes
+    through the sonic point, subsonic to supersonic or back. Where the numerator does
+    not vanish there the duct is choked, and it is nan from the first point past the
+    choke to its end.
+
+    Many ducts integrate at once, each with its own steps. The inlet states broadcast
+    against the leading axes of the distributions, whose last axis runs over x.
+    Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `array_like`
+        The Mach number at the inlet \n
+    stagnation_temperature_initial : `array_like`
+        The stagnation temperature at the inlet \n
+    x : `array_like`
+        The increasing distances along the duct the distributions are given at \n
+    area_initial : `array_like`
+        The area at the inlet \n
+    area_gradient : `array_like`
+        The change of area with distance, dA/dx \n
+    friction : `array_like`
+        The Darcy friction factor \n
+    heat : `array_like`
+        The heat added per unit mass of flow per unit length, negative for cooling \n
+    mass_addition : `array_like`
+        The mass added per unit length as a fraction of the inlet mass flow \n
+    diameter : `array_like`
+        The hydraulic diameter. Default is the diameter of a round duct of the local
+        area \n
+    tol : `float`
+        The error allowed in the square of the Mach number over a step \n
+    sonic_band : `float`
+        The distance of the square of the Mach number from one inside which the
+        sonic point is crossed with L'Hopital's rule \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+    return_choked : `bool`
+        Also return the mask of choked ducts. Default is false \n
+
+    Returns
+    -------
+    ndarray
+        The flow at every point as a structured array with the fields mach,
+        area_ratio, stagnation_temperature, temperature_ratio, pressure_ratio,
+        stagnation_pressure_ratio and mass_flow_ratio, all ratios to the inlet, and
+        the choked mask if asked for \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> import numpy as np
+    >>> x = np.linspace(0, 1, 5)
+    >>> flow = gd.generalized_flow(.3, 300, x, area_initial=.01, friction=.02, heat=2e5)
+    >>> flow['mach']
+    array([0.3       , 0.33257161, 0.36592534, 0.40084734, 0.43829136])
+    >>> x = np.linspace(0, 2, 201)
+    >>> area_gradient = 2*(x - 1)
+    >>> flow = gd.generalized_flow(gd.mach_from_area_ratio(2)[0], 300, x, area_initial=2, area_gradient=area_gradient)
+    >>> flow['mach'][[0, 100, 200]]
+    array([0.30590383, 0.99986624, 2.19719782])
+    >>>
+    """
+
+    gamma = gas.gamma
+    cp = _rayleigh_cp(gas)
+    x = np.asarray(x, dtype=float)
+    n = x.size
+    inlet = [np.asarray(a, dtype=float) for a in (mach_initial, stagnation_temperature_initial, area_initial)]
+    distributions = [np.asarray(a, dtype=float) for a in (area_gradient, friction, heat, mass_addition)]
+    if diameter is not None:
+        distributions.append(np.asarray(diameter, dtype=float))
+    shape = np.broadcast_shapes(*[a.shape for a in inlet], *[a.shape[:-1] for a in distributions])
+    mach, Tt1, A1 = [np.broadcast_to(a, shape).ravel() for a in inlet]
+    count = mach.size
+    distributions = [np.broadcast_to(a, shape + (n,)).reshape(count, n) for a in distributions]
+    dA, f, q, dm = distributions[:4]
+    D = distributions[4] if diameter is not None else None
+
+    #the area, stagnation temperature and mass flow at the points, exact for
+    #distributions linear between them
+    dx = np.diff(x)
+
+    def integral(g, start):
+        total = np.zeros((count, n))
+        total[:, 1:] = np.cumsum((g[:, 1:] + g[:, :-1]) / 2 * dx, axis=1)
+        return start[:, None] + total
+
+    area, Tt, mass = integral(dA, A1), integral(q/cp, Tt1), integral(dm, np.ones(count))
+
+    def local(i, k, t, g, total):
+        """The value and slope of an integral at distance t into segment k"""
+
+        slope = (g[i, k+1] - g[i, k]) / dx[k]
+        return total[i, k] + g[i, k]*t + slope*t**2/2, g[i, k] + slope*t
+
+    def numerator(i, k, t, M2):
+        A, A_x = local(i, k, t, dA, area)
+        T, T_x = local(i, k, t, q/cp, Tt)
+        m, m_x = local(i, k, t, dm, mass)
+        friction = f[i, k] + (f[i, k+1] - f[i, k]) * t/dx[k]
+        if D is None:
+            hydraulic = (4*A/np.pi)**.5
+        else:
+            hydraulic = D[i, k] + (D[i, k+1] - D[i, k]) * t/dx[k]
+        return M2 * (1 + (gamma-1)/2*M2) * (-2*A_x/A + gamma*M2*friction/hydraulic + (1 + gamma*M2)*(T_x/T + 2*m_x/m))
+
+    def slope(i, k, t, M2):
+        return numerator(i, k, t, M2) / (1 - M2)
+
+    M2 = mach**2
+    profile = np.full((count, n), np.nan)
+    profile[:, 0] = M2
+    k = np.zeros(count, dtype=int)
+    t = np.zeros(count)
+    h = np.full(count, dx[0])
+    crossing = np.zeros(count)
+    choked = np.zeros(count, dtype=bool)
+    active = np.full(count, n > 1)
+
+    with np.errstate(all='ignore'):
+        while active.any():
+            i = np.flatnonzero(active)
+            sonic = np.abs(1 - M2[i]) < sonic_band
+            advance = np.zeros(count)
+
+            #L'Hopital's rule in the sonic band, the slope s solving
+            #s^2 + dN/dM^2 s + dN/dx = 0
+            start = i[sonic & (crossing[i] == 0)]
+            if start.size:
+                ks, ts, m2 = k[start], t[start], M2[start]
+                delta = 1e-6 * dx[ks]
+                before, after = np.maximum(ts - delta, 0), np.minimum(ts + delta, dx[ks])
+                N = numerator(start, ks, ts, m2)
+                N_x = (numerator(start, ks, after, m2) - numerator(start, ks, before, m2)) / (after - before)
+                N_M = (numerator(start, ks, ts, m2 + 1e-6) - numerator(start, ks, ts, m2 - 1e-6)) / 2e-6
+                direction = np.where(m2 < 1, 1., -1.)
+                s = (-N_M + direction * (N_M**2 - 4*N_x)**.5) / 2
+                regular = (s*direction > 0) & (np.abs(N) <= 2*np.abs(s)*sonic_band)
+                crossing[start] = np.where(regular, s, 0)
+                choked[start[~regular]] = True
+                active[start[~regular]] = False
+
+            across = i[sonic & (crossing[i] != 0)]
+            if across.size:
+                #the jump ends clear of the band on the other side
+                s = crossing[across]
+                target = 1 + np.sign(s)*2*sonic_band
+                step = np.minimum((target - M2[across]) / s, dx[k[across]] - t[across])
+                done = step >= (target - M2[across]) / s
+                M2[across] = np.where(done, target, M2[across] + s*step)
+                crossing[across[done]] = 0
+                advance[across] = step
+
+            #embedded Runge-Kutta step of Bogacki and Shampine away from the sonic point
+            j = i[~sonic]
+            if j.size:
+                kj, tj, m2 = k[j], t[j], M2[j]
+                k1 = slope(j, kj, tj, m2)
+                step = np.minimum(np.minimum(h[j], dx[kj] - tj), .5*np.abs(1 - m2)/np.abs(k1))
+                k2 = slope(j, kj, tj + step/2, m2 + step/2*k1)
+                k3 = slope(j, kj, tj + 3*step/4, m2 + 3*step/4*k2)
+                third = m2 + step*(2/9*k1 + 1/3*k2 + 4/9*k3)
+                k4 = slope(j, kj, tj + step, third)
+                second = m2 + step*(7/24*k1 + 1/4*k2 + 1/3*k3 + 1/8*k4)
+                error = np.abs(third - second) / (tol * np.maximum(1, np.abs(third)))
+                accept = (error <= 1) & (third > 0) & ((1 - third)*(1 - m2) > 0)
+                factor = np.clip(.9 * error**(-1/3), .2, 5)
+                h[j] = np.where(accept, step*np.where(np.isfinite(factor), factor, 5), step*np.minimum(np.nan_to_num(factor, nan=.2), .5))
+                M2[j] = np.where(accept, third, m2)
+                advance[j] = np.where(accept, step, 0)
+
+                #a step that cannot shrink any further is a choke
+                stalled = j[~accept & (h[j] < 1e-12*dx[kj])]
+                choked[stalled] = True
+                active[stalled] = False
+
+            #record the ducts that reached the next point
+            t += advance
+            arrived = np.flatnonzero(active & (t >= dx[np.minimum(k, n-2)] * (1 - 1e-12)))
+            k[arrived] += 1
+            t[arrived] = 0
+            profile[arrived, k[arrived]] = M2[arrived]
+            active[arrived[k[arrived] == n-1]] = False
+
+        mach = profile**.5
+        psi = 1 + (gamma-1)/2 * profile
+        temperature_ratio = Tt/Tt1[:, None] * psi[:, :1] / psi
+        pressure_ratio = mass * temperature_ratio**.5 * (area[:, :1] * mach[:, :1]) / (area * mach)
+
+    flow = np.empty(shape + (n,), dtype=[('mach', float), ('area_ratio', float), ('stagnation_temperature', float),
+        ('temperature_ratio', float), ('pressure_ratio', float), ('stagnation_pressure_ratio', float), ('mass_flow_ratio', float)])
+    flow['mach'] = mach.reshape(shape + (n,))
+    flow['area_ratio'] = (area / area[:, :1]).reshape(shape + (n,))
+    flow['stagnation_temperature'] = Tt.reshape(shape + (n,))
+    flow['temperature_ratio'] = temperature_ratio.reshape(shape + (n,))
+    flow['pressure_ratio'] = pressure_ratio.reshape(shape + (n,))
+    flow['stagnation_pressure_ratio'] = (pressure_ratio * (psi / psi[:, :1])**(gamma/(gamma-1))).reshape(shape + (n,))
+    flow['mass_flow_ratio'] = mass.reshape(shape + (n,))
+
+    if return_choked:
+        return flow, choked.reshape(shape)
+    return flow
@@ -0,0 +1,759 @@
+#!usr/bin/env
+#Equations and tables for working with constant area flow subject to
+#friction at a constant temperature, otherwise known as isothermal flow.
+#The reference state where the flow chokes is at a Mach number of
+#1/sqrt(gamma), marked with a star like the sonic state of fanno flow.
+#
+#
+#Copyright 2020 by Fernando A de la Fuente
+#All rights reserved
+
+from gas_dynamics.fluids import fluid, air
+from gas_dynamics.extra import _bracketed_newton
+import numpy as np
+
+
+
+#==================================================
+#isothermal pressure ratio
+#==================================================
+def isothermal_pressure_ratio(mach_initial: float, mach_final: float, gas=air) -> float:
+    """Return the pressure ratio for an isothermal flow given two Mach numbers
+
+    Notes
+    -----
+    Given the two Mach numbers of a constant area duct at a constant temperature
+    under the influence of friction, return the pressure ratio of region two over
+    region one. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The mach number at region 1 \n
+    mach_final : `float`
+        The mach number at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The isothermal pressure ratio p2 / p1 \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_initial, mach_final = .2, .5
+    >>> p2_p1 = gd.isothermal_pressure_ratio(mach_initial, mach_final)
+    >>> p2_p1
+    0.4
+    >>>
+    """
+
+    p2_p1 = np.asarray(mach_initial, dtype=float) / mach_final
+    return p2_p1[()]
+
+
+
+#==================================================
+#isothermal density ratio
+#==================================================
+def isothermal_density_ratio(mach_initial: float, mach_final: float, gas=air) -> float:
+    """Return the density ratio for an isothermal flow given two Mach numbers
+
+    Notes
+    -----
+    Given the two Mach numbers of a constant area duct at a constant temperature
+    under the influence of friction, return the density ratio of region two over
+    region one. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The mach number at region 1 \n
+    mach_final : `float`
+        The mach number at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The isothermal density ratio rho2 / rho1 \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_initial, mach_final = .2, .5
+    >>> rho2_rho1 = gd.isothermal_density_ratio(mach_initial, mach_final)
+    >>> rho2_rho1
+    0.4
+    >>>
+    """
+
+    rho2_rho1 = np.asarray(mach_initial, dtype=float) / mach_final
+    return rho2_rho1[()]
+
+
+
+#==================================================
+#isothermal stagnation pressure ratio
+#==================================================
+def isothermal_stagnation_pressure_ratio(mach_initial: float, mach_final: float, gas=air) -> float:
+    """Return the stagnation pressure ratio for an isothermal flow given two Mach numbers
+
+    Notes
+    -----
+    Given the two Mach numbers of a constant area duct at a constant temperature
+    under the influence of friction, return the stagnation pressure ratio of region
+    two over region one. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The mach number at region 1 \n
+    mach_final : `float`
+        The mach number at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The isothermal stagnation pressure ratio pt2 / pt1 \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_initial, mach_final = .2, .5
+    >>> pt2_pt1 = gd.isothermal_stagnation_pressure_ratio(mach_initial, mach_final)
+    >>> pt2_pt1
+    0.46143515180106065
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach_initial, mach_final = np.asarray(mach_initial, dtype=float), np.asarray(mach_final, dtype=float)
+    pt2_pt1 = mach_initial/mach_final * ((1 + (gamma-1)/2 * mach_final**2)/(1 + (gamma-1)/2 * mach_initial**2))**(gamma/(gamma-1))
+    return pt2_pt1[()]
+
+
+
+#==================================================
+#isothermal stagnation temperature ratio
+#==================================================
+def isothermal_stagnation_temperature_ratio(mach_initial: float, mach_final: float, gas=air) -> float:
+    """Return the stagnation temperature ratio for an isothermal flow given two Mach numbers
+
+    Notes
+    -----
+    Given the two Mach numbers of a constant area duct at a constant temperature
+    under the influence of friction, return the stagnation temperature ratio of
+    region two over region one. The heat that holds the temperature constant
+    raises the stagnation temperature as the flow speeds up. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The mach number at region 1 \n
+    mach_final : `float`
+        The mach number at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The isothermal stagnation temperature ratio Tt2 / Tt1 \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_initial, mach_final = .2, .5
+    >>> Tt2_Tt1 = gd.isothermal_stagnation_temperature_ratio(mach_initial, mach_final)
+    >>> Tt2_Tt1
+    1.0416666666666667
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach_initial, mach_final = np.asarray(mach_initial, dtype=float), np.asarray(mach_final, dtype=float)
+    Tt2_Tt1 = (1 + (gamma-1)/2 * mach_final**2)/(1 + (gamma-1)/2 * mach_initial**2)
+    return Tt2_Tt1[()]
+
+
+
+#==================================================
+#isothermal mach from pressure
+#==================================================
+def isothermal_mach_from_pressure_ratio(mach_initial: float, pressure_initial: float, pressure_final: float, gas=air) -> float:
+    """Return the Mach number of an isothermal flow given a change in pressure
+
+    Notes
+    -----
+    Given the Mach number at region one and the pressure at both regions of a constant
+    area duct at a constant temperature under the influence of friction, return the
+    Mach number at region two. Friction never carries the flow through a Mach number
+    of 1/sqrt(gamma), so a result on the other branch from the initial Mach number is
+    nan. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The Mach number at region 1 \n
+    pressure_initial : `float`
+        The pressure at region 1 \n
+    pressure_final : `float`
+        The pressure at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The resulting Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_final = gd.isothermal_mach_from_pressure_ratio(mach_initial=.2, pressure_initial=500000, pressure_final=200000)
+    >>> mach_final
+    0.5
+    >>>
+    """
+
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    mach_final = mach_initial * pressure_initial / np.asarray(pressure_final, dtype=float)
+    return _isothermal_branch(mach_initial, mach_final, gas.gamma)
+
+
+
+#==================================================
+#isothermal mach from density
+#==================================================
+def isothermal_mach_from_density_ratio(mach_initial: float, density_initial: float, density_final: float, gas=air) -> float:
+    """Return the Mach number of an isothermal flow given a change in density
+
+    Notes
+    -----
+    Given the Mach number at region one and the density at both regions of a constant
+    area duct at a constant temperature under the influence of friction, return the
+    Mach number at region two. A result on the other branch of a Mach number of
+    1/sqrt(gamma) from the initial Mach number is nan. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The Mach number at region 1 \n
+    density_initial : `float`
+        The density at region 1 \n
+    density_final : `float`
+        The density at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The resulting Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_final = gd.isothermal_mach_from_density_ratio(mach_initial=.2, density_initial=5, density_final=2)
+    >>> mach_final
+    0.5
+    >>>
+    """
+
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    mach_final = mach_initial * density_initial / np.asarray(density_final, dtype=float)
+    return _isothermal_branch(mach_initial, mach_final, gas.gamma)
+
+
+
+def _isothermal_branch(mach_initial, mach_final, gamma: float):
+    """Return the final Mach numbers, nan where they cross a Mach number of 1/sqrt(gamma)"""
+
+    star = gamma**-.5
+    crossed = ((mach_initial < star) & (mach_final > star)) | ((mach_initial > star) & (mach_final < star))
+    return np.where(crossed, np.nan, mach_final)[()]
+
+
+
+#==================================================
+#isothermal pressure choked ratio
+#==================================================
+def isothermal_pressure_star_ratio(mach: float, gas=air) -> float:
+    """Return the ratio of pressure over pressure where Mach equals 1/sqrt(gamma)
+
+    Notes
+    -----
+    Given a Mach number of a constant area duct at a constant temperature under the
+    influence of friction, return the pressure ratio of region two over region one
+    where region two is choked at a Mach number of 1/sqrt(gamma). Default fluid is air.
+
+    Parameters
+    ----------
+    mach : `float`
+        The mach number\n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The isothermal pressure ratio p / p* \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = .5
+    >>> p_pstar = gd.isothermal_pressure_star_ratio(M)
+    >>> p_pstar
+    1.6903085094570331
+    >>>
+    """
+
+    gamma = gas.gamma
+    p_pstar = 1/(gamma**.5 * np.asarray(mach, dtype=float))
+    return p_pstar[()]
+
+
+
+#==================================================
+#isothermal density choked ratio
+#==================================================
+def isothermal_density_star_ratio(mach: float, gas=air) -> float:
+    """Return the ratio of density over density where Mach equals 1/sqrt(gamma)
+
+    Notes
+    -----
+    Given a Mach number of a constant area duct at a constant temperature under the
+    influence of friction, return the density ratio of region two over region one
+    where region two is choked at a Mach number of 1/sqrt(gamma). Default fluid is air.
+
+    Parameters
+    ----------
+    mach : `float`
+        The mach number\n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The isothermal density ratio rho / rho* \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = .5
+    >>> rho_rhostar = gd.isothermal_density_star_ratio(M)
+    >>> rho_rhostar
+    1.6903085094570331
+    >>>
+    """
+
+    gamma = gas.gamma
+    rho_rhostar = 1/(gamma**.5 * np.asarray(mach, dtype=float))
+    return rho_rhostar[()]
+
+
+
+#==================================================
+#isothermal velocity choked ratio
+#==================================================
+def isothermal_velocity_star_ratio(mach: float, gas=air) -> float:
+    """Return the ratio of velocity over velocity where Mach equals 1/sqrt(gamma)
+
+    Notes
+    -----
+    Given a Mach number of a constant area duct at a constant temperature under the
+    influence of friction, return the velocity ratio of region two over region one
+    where region two is choked at a Mach number of 1/sqrt(gamma). Default fluid is air.
+
+    Parameters
+    ----------
+    mach : `float`
+        The mach number\n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The isothermal velocity ratio V / V* \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = .5
+    >>> v_vstar = gd.isothermal_velocity_star_ratio(M)
+    >>> v_vstar
+    0.5916079783099616
+    >>>
+    """
+
+    gamma = gas.gamma
+    v_vstar = gamma**.5 * np.asarray(mach, dtype=float)
+    return v_vstar[()]
+
+
+
+#==================================================
+#isothermal stagnation pressure choked ratio
+#==================================================
+def isothermal_stagnation_pressure_star_ratio(mach: float, gas=air) -> float:
+    """Return the ratio of stagnation pressure over stagnation pressure where Mach equals 1/sqrt(gamma)
+
+    Notes
+    -----
+    Given a Mach number of a constant area duct at a constant temperature under the
+    influence of friction, return the stagnation pressure ratio of region two over
+    region one where region two is choked at a Mach number of 1/sqrt(gamma). Default
+    fluid is air.
+
+    Parameters
+    ----------
+    mach : `float`
+        The mach number\n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The isothermal stagnation pressure ratio pt / pt* \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = .5
+    >>> pt_ptstar = gd.isothermal_stagnation_pressure_star_ratio(M)
+    >>> pt_ptstar
+    1.25648326938041
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach = np.asarray(mach, dtype=float)
+    pt_ptstar = 1/(gamma**.5 * mach) * ((1 + (gamma-1)/2 * mach**2)/(1 + (gamma-1)/(2*gamma)))**(gamma/(gamma-1))
+    return pt_ptstar[()]
+
+
+
+#==================================================
+#isothermal stagnation temperature choked ratio
+#==================================================
+def isothermal_stagnation_temperature_star_ratio(mach: float, gas=air) -> float:
+    """Return the ratio of stagnation temperature over stagnation temperature where Mach equals 1/sqrt(gamma)
+
+    Notes
+    -----
+    Given a Mach number of a constant area duct at a constant temperature under the
+    influence of friction, return the stagnation temperature ratio of region two over
+    region one where region two is choked at a Mach number of 1/sqrt(gamma). Default
+    fluid is air.
+
+    Parameters
+    ----------
+    mach : `float`
+        The mach number\n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The isothermal stagnation temperature ratio Tt / Tt* \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = .5
+    >>> Tt_Ttstar = gd.isothermal_stagnation_temperature_star_ratio(M)
+    >>> Tt_Ttstar
+    0.9187500000000001
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach = np.asarray(mach, dtype=float)
+    Tt_Ttstar = (1 + (gamma-1)/2 * mach**2)/(1 + (gamma-1)/(2*gamma))
+    return Tt_Ttstar[()]
+
+
+
+#==================================================
+#isothermal parameter
+#==================================================
+def isothermal_parameter(mach_initial: float, mach_final: float, gas=air) -> float:
+    """Return the friction parameter for an isothermal flow given two Mach numbers
+
+    Notes
+    -----
+    Given the two Mach numbers of a constant area duct at a constant temperature
+    under the influence of friction, return the parameter f(x2-x1)/D, the product
+    of the friction factor and the length of duct between them over the diameter.
+    Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The mach number at region 1 \n
+    mach_final : `float`
+        The mach number at region 2 \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The friction parameter f(x2-x1)/D \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> mach_initial, mach_final = .2, .5
+    >>> fanno = gd.isothermal_parameter(mach_initial, mach_final)
+    >>> fanno
+    13.167418536251688
+    >>>
+    """
+
+    fanno = isothermal_parameter_max(mach_initial, gas=gas) - isothermal_parameter_max(mach_final, gas=gas)
+    return fanno
+
+
+
+#==================================================
+#isothermal parameter max
+#==================================================
+def isothermal_parameter_max(mach: float, gas=air) -> float:
+    """Return the maximum friction parameter for an isothermal flow
+
+    Notes
+    -----
+    Given the Mach number of a constant area duct at a constant temperature under
+    the influence of friction, return the parameter f(x*-x)/D for the length of
+    duct that brings the flow to a Mach number of 1/sqrt(gamma), where it chokes.
+    Unlike fanno flow the supersonic branch has no finite limit. Default fluid is
+    air.
+
+    Parameters
+    ----------
+    mach : `float`
+        The mach number \n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The maximum friction parameter f(x*-x)/D \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> M = .5
+    >>> fanno_max = gd.isothermal_parameter_max(M)
+    >>> fanno_max
+    0.8073207326441796
+    >>>
+    """
+
+    gamma = gas.gamma
+    u = gamma * np.asarray(mach, dtype=float)**2
+    fanno_max = (1 - u)/u + np.log(u)
+    return fanno_max[()]
+
+
+
+#==================================================
+#mach from isothermal parameter
+#==================================================
+def mach_from_isothermal_parameter(fanno: float, mach_initial: float, gas=air, return_choked=False) -> float:
+    """Return the Mach number that would result from the friction parameter and initial mach number
+
+    Notes
+    -----
+    Given the Mach number and friction parameter of a constant area duct at a
+    constant temperature, return the resulting Mach number on the same side of a
+    Mach number of 1/sqrt(gamma) as the initial Mach number. Where the parameter is
+    longer than the maximum friction parameter of the initial Mach number the duct
+    is choked and the Mach number is nan. Arrays are solved element by element.
+    Default fluid is air.
+
+    Parameters
+    ----------
+    fanno : `float`
+        The friction parameter for the system \n
+    mach_initial : `float`
+        The starting Mach number \n
+    gas : `fluid`
+        The user defined fluid object \n
+    return_choked : `bool`
+        Also return the mask of choked ducts. Default is false \n
+
+    Returns
+    -------
+    Float
+        The resulting Mach number, and the choked mask if asked for \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.mach_from_isothermal_parameter(fanno=13.167418536251688, mach_initial=.2)
+    0.5000000000000001
+    >>> gd.mach_from_isothermal_parameter(fanno=[5, 10, 15], mach_initial=.2, return_choked=True)
+    (array([0.23904086, 0.32157417,        nan]), array([False, False,  True]))
+    >>>
+    """
+
+    gamma = gas.gamma
+    fanno, mach_initial = np.broadcast_arrays(np.asarray(fanno, dtype=float), np.asarray(mach_initial, dtype=float))
+    remaining = isothermal_parameter_max(mach_initial, gas=gas) - fanno
+    choked = remaining < 0
+    with np.errstate(invalid='ignore'):
+        mach, _ = _isothermal_mach(np.where(choked, np.nan, remaining), mach_initial > gamma**-.5, gamma)
+    if return_choked:
+        return mach[()], choked[()]
+    return mach[()]
+
+
+
+#==================================================
+#mach from isothermal parameter max
+#==================================================
+def mach_from_isothermal_parameter_max(fanno_max: float, supersonic=False, gas=air) -> float:
+    """Return the Mach number that chokes after the maximum friction parameter of an isothermal flow
+
+    Notes
+    -----
+    Given the maximum friction parameter, the product of friction factor and the
+    length to reach a Mach number of 1/sqrt(gamma) over diameter, return the Mach
+    number at the start of the duct below or above 1/sqrt(gamma). Arrays are solved
+    element by element. Default fluid is air.
+
+    Parameters
+    ----------
+    fanno_max : `float`
+        The maximum friction parameter f(x*-x)/D \n
+    supersonic : `bool`
+        Return the Mach number above 1/sqrt(gamma). Default is false \n
+    gas : `fluid`
+        The user defined fluid object \n
+
+    Returns
+    -------
+    float
+        The starting Mach number \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.mach_from_isothermal_parameter_max(0.8073207326441796)
+    0.5
+    >>> gd.mach_from_isothermal_parameter_max(0.8073207326441796, supersonic=True)
+    1.8873225078090268
+    >>>
+    """
+
+    fanno_max = np.asarray(fanno_max, dtype=float)
+    supersonic = np.broadcast_to(np.asarray(supersonic, dtype=bool), fanno_max.shape)
+    mach, _ = _isothermal_mach(fanno_max, supersonic, gas.gamma)
+    return mach[()]
+
+
+
+def _isothermal_mach(fanno_max, supersonic, gamma: float) -> tuple:
+    """Invert the maximum friction parameter of isothermal flow on either branch
+
+    Notes
+    -----
+    In terms of v = 1/(gamma M^2) the maximum friction parameter is v - 1 - ln(v),
+    convex with its minimum of zero at v = 1. Its second order expansion about
+    v = 1 and its bounds ln(v) <= v - 1 and ln(v) <= v/e bracket the root on
+    either side, where Newton's method converges in a few steps.
+
+    Returns
+    -------
+    tuple
+        The Mach numbers and the number of iterations each took \n
+    """
+
+    fanno_max, supersonic = np.broadcast_arrays(fanno_max, supersonic)
+
+    def zero(v, target):
+        return v - 1 - np.log(v) - target
+
+    def slope(v, target):
+        return 1 - 1/v
+
+    with np.errstate(all='ignore'):
+        subsonic_lower = 1 + np.maximum((2*fanno_max)**.5, fanno_max)
+        subsonic_upper = np.maximum((fanno_max + 1) / (1 - 1/np.e), subsonic_lower)
+        supersonic_lower = np.maximum(np.exp(-fanno_max - 1), 1 - (2*fanno_max)**.5)
+        supersonic_upper = np.minimum(np.exp(-fanno_max), 1)
+        lower = np.where(supersonic, supersonic_lower, subsonic_lower)
+        upper = np.where(supersonic, supersonic_upper, subsonic_upper)
+        invalid = ~(fanno_max >= 0)
+        v, iterations = _bracketed_newton(zero, slope, lower, upper, args=(fanno_max,),
+            guess=np.where(invalid, np.nan, np.where(supersonic, upper, lower)), increasing=~supersonic)
+        mach = np.where(invalid, np.nan, (gamma*v)**-.5)
+    return mach, iterations
+
+
+
+#==================================================
+#isothermal inlet mach
+#==================================================
+def isothermal_inlet_mach(fanno: float, pressure_initial: float, pressure_final: float, gas=air, return_choked=False) -> float:
+    """Return the inlet Mach number of an isothermal pipe given the pressure at either end
+
+    Notes
+    -----
+    Given the friction parameter of a constant area duct at a constant temperature
+    and the pressure at its inlet and outlet, return the Mach number at the inlet.
+    With the pressure ratio r = p2/p1 the friction parameter is
+    (1 - r^2) / (gamma M1^2) + 2 ln(r), which gives the inlet Mach number directly.
+    Where the outlet would pass a Mach number of 1/sqrt(gamma) the pipe is choked
+    and the Mach number is nan. Default fluid is air.
+
+    Parameters
+    ----------
+    fanno : `float`
+        The friction parameter of the pipe \n
+    pressure_initial : `float`
+        The pressure at the inlet \n
+    pressure_final : `float`
+        The pressure at the outlet \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+    return_choked : `bool`
+        Also return the mask of choked pipes. Default is false \n
+
+    Returns
+    -------
+    float
+        The Mach number at the inlet, and the choked mask if asked for \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.isothermal_inlet_mach(fanno=13.167418536251688, pressure_initial=500000, pressure_final=200000)
+    0.2
+    >>>
+    """
+
+    gamma = gas.gamma
+    fanno, ratio = np.broadcast_arrays(np.asarray(fanno, dtype=float), np.asarray(pressure_final, dtype=float) / pressure_initial)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mach = ((1 - ratio**2) / (gamma * (fanno - 2*np.log(ratio))))**.5
+        #the outlet Mach number is on the other side of 1/sqrt(gamma)
+        choked = (mach - gamma**-.5) * (mach/ratio - gamma**-.5) < 0
+    mach = np.where(choked, np.nan, mach)
+    if return_choked:
+        return mach[()], choked[()]
+    return mach[()]
@@ -0,0 +1,456 @@
+#!usr/bin/env
+#A solver for networks of gas pipes joined at junctions. Every pipe is an
+#adiabatic constant area duct with friction fed from the stagnation state of
+#the node upstream of it, and the node pressures are found with a sparse
+#Newton method on the mass balance at every junction.
+#
+#
+#Copyright 2020 by Fernando A de la Fuente
+#All rights reserved
+
+import numpy as np
+from scipy.sparse import csr_matrix, csc_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from scipy.sparse.linalg import splu, spsolve
+from gas_dynamics.fanno.fanno import fanno_parameter_max, _fanno_mach
+from gas_dynamics.extra import _bracketed_newton
+from gas_dynamics.fluids import air
+from gas_dynamics.units import SI
+
+
+
+#==================================================
+#pipe flow
+#==================================================
+def _pipe_flow(pressure_upstream, pressure_downstream, stagnation_temperature, area, fanno, gas=air) -> tuple:
+    """Return the mass flow of pipes fed from a stagnation state and discharging
+    to a back pressure, with its derivatives with respect to both pressures
+
+    Notes
+    -----
+    The gas accelerates isentropically from the upstream node into the pipe at
+    the inlet Mach number, and friction carries it along the Fanno line to the
+    exit, where the static pressure matches the downstream node. The exit
+    pressure over the upstream stagnation pressure falls as the inlet Mach
+    number rises, until the exit reaches a Mach number of one after the whole
+    fanno parameter of the pipe. Below that back pressure the pipe is choked
+    and the mass flow no longer depends on it.
+
+    Returns
+    -------
+    tuple
+        The mass flow, its derivatives with respect to the upstream and the
+        downstream pressure, the choked mask and the inlet Mach number \n
+    """
+
+    gamma, R = gas.gamma, gas.R
+    k = (gamma+1)/(2*(gamma-1))
+    #the mass flow grows as the square root of the pressure drop, so below a
+    #small drop it is taken linear in the drop to keep the Newton iteration
+    #regular at pipes that carry no flow
+    band = 1e-8
+    linear = pressure_downstream / pressure_upstream > 1 - band
+    ratio = np.minimum(pressure_downstream / pressure_upstream, 1 - band)
+
+    #the inlet Mach number that reaches the exit at a Mach number of one
+    mach_choked, _ = _fanno_mach(fanno, np.zeros(fanno.shape, dtype=bool), gamma)
+    d = 1 + (gamma-1)/2 * mach_choked**2
+    ratio_choked = d**(-gamma/(gamma-1)) * mach_choked * (2*d/(gamma+1))**.5
+    choked = ratio <= ratio_choked
+
+    #log of the exit pressure over the upstream stagnation pressure
+    def exit_pressure(mach, log_ratio, fanno):
+        d1 = 1 + (gamma-1)/2 * mach**2
+        mach_exit, _ = _fanno_mach(fanno_parameter_max(mach, gas=gas) - fanno, np.zeros(mach.shape, dtype=bool), gamma)
+        d2 = 1 + (gamma-1)/2 * mach_exit**2
+        return -gamma/(gamma-1) * np.log(d1) + np.log(mach/mach_exit) + .5*np.log(d1/d2) - log_ratio
+
+    def slope(mach, log_ratio, fanno):
+        d1 = 1 + (gamma-1)/2 * mach**2
+        mach_exit, _ = _fanno_mach(fanno_parameter_max(mach, gas=gas) - fanno, np.zeros(mach.shape, dtype=bool), gamma)
+        d2 = 1 + (gamma-1)/2 * mach_exit**2
+        exit_slope = ((mach**2 - 1) / (mach**3 * d1)) / ((mach_exit**2 - 1) / (mach_exit**3 * d2))
+        return (-gamma*mach/d1 + 1/mach + (gamma-1)/2*mach/d1
+            - (1/mach_exit + (gamma-1)/2*mach_exit/d2) * exit_slope)
+
+    with np.errstate(all='ignore'):
+        log_ratio = np.log(np.maximum(ratio, ratio_choked))
+        guess = mach_choked * np.clip((1 - ratio) / (1 - ratio_choked), 0, 1)**.5
+        mach, _ = _bracketed_newton(exit_pressure, slope, 0, mach_choked, args=(log_ratio, fanno),
+            guess=np.where(choked, mach_choked, guess), increasing=False)
+        mach = np.where(choked, mach_choked, mach)
+
+        #mass flow per unit upstream stagnation pressure, and its change with the
+        #pressure ratio through the inlet Mach number
+        flux = area * (gamma/(R*stagnation_temperature))**.5 * mach * (1 + (gamma-1)/2*mach**2)**-k
+        flux_slope = flux * (1 - mach**2) / (mach * (1 + (gamma-1)/2*mach**2))
+        dmach_dlog = np.where(choked, 0, 1 / slope(mach, log_ratio, fanno))
+        #change of the flux with the pressure ratio
+        flux_ratio = flux_slope * dmach_dlog / ratio
+        drop = (1 - pressure_downstream / pressure_upstream) / band
+        flux_ratio = np.where(linear, -flux / band, flux_ratio)
+        flux = np.where(linear, flux * drop, flux)
+        mach = np.where(linear, mach * drop, mach)
+        mass_flow = pressure_upstream * flux
+        d_upstream = flux - flux_ratio * pressure_downstream / pressure_upstream
+        d_downstream = flux_ratio
+    return mass_flow, d_upstream, d_downstream, choked, mach
+
+
+
+#==================================================
+#pipe network
+#==================================================
+class PipeNetwork:
+    """A class to represent a network of gas pipes and the junctions between them
+
+    Notes
+    -----
+    Nodes either hold a fixed pressure, like a supply or an outlet to a back
+    pressure, or are junctions whose pressure is solved for. The gas at a node
+    is at rest, so the node pressure and temperature are stagnation values, and
+    junctions may have a mass flow drawn from them. Pipes are adiabatic ducts
+    with friction, where the fanno parameter is the product of the friction
+    factor and the length over the diameter, and the flow runs from the node at
+    the higher pressure whichever way the pipe was added.
+
+    The solve is a Newton iteration on the mass balance at every junction,
+    alternated with the energy balance that mixes the stagnation temperatures
+    of the flows entering each junction. The sparsity pattern of the Jacobian,
+    the map from pipes to its entries and a bandwidth reducing ordering are
+    built once for the layout of the network, so solves with new pressures or
+    demands only refill and refactor the same structure and start from the
+    last solution. Everything is in SI units, so a fluid in US units is given
+    converted, as gas.si().
+
+    Attributes
+    ----------
+    gas : `fluid`
+        The fluid in the network \n
+    pressure : `array`
+        The pressure at every node after a solve \n
+    stagnation_temperature : `array`
+        The stagnation temperature at every node after a solve \n
+    mass_flow : `array`
+        The mass flow through every pipe after a solve, positive from the
+        upstream node to the downstream node it was added with \n
+    choked : `array`
+        True for the pipes that are choked \n
+    mach_inlet : `array`
+        The Mach number at the inlet of every pipe \n
+    converged : `bool`
+        True if the last solve converged \n
+    iterations : `int`
+        The number of Newton iterations of the last solve \n
+
+    Methods
+    -------
+    add_node()
+        Add a junction or a node at a fixed pressure \n
+    add_pipe()
+        Add a pipe between two nodes \n
+    set_pressure()
+        Set or free the pressure of a node \n
+    set_demand()
+        Set the mass flow drawn from a node \n
+    solve()
+        Solve the network for the node pressures and pipe flows \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> network = gd.PipeNetwork()
+    >>> network.add_node('supply', pressure=500000, stagnation_temperature=300)
+    0
+    >>> network.add_node('junction', demand=.5)
+    1
+    >>> network.add_node('outlet', pressure=101325)
+    2
+    >>> network.add_pipe('supply', 'junction', length=100, diameter=.1, friction_factor=.02)
+    0
+    >>> network.add_pipe('junction', 'outlet', length=50, diameter=.05, friction_factor=.02)
+    1
+    >>> network.solve()
+    >>> network.mass_flow
+    array([1.12276046, 0.62276046])
+    >>>
+    """
+
+    def __init__(self, stagnation_temperature=288.15, gas=air):
+        """Construct an empty network
+
+        Parameters
+        ----------
+        stagnation_temperature : `float`
+            The stagnation temperature of nodes that do not set one \n
+        gas : `fluid`
+            A user defined fluid object in SI units. Default is air \n
+
+        """
+
+        #pressures, temperatures, lengths and mass flows are all taken in SI units
+        if gas.unit_system is not SI:
+            raise ValueError('a pipe network works in SI units, give the fluid as gas.si()')
+        self.gas = gas
+        self.default_temperature = stagnation_temperature
+        self._names = {}
+        self._fixed = []
+        self._temperature = []
+        self._demand = []
+        self._pipes = []
+        self._structure = None
+        self.pressure = None
+        self.converged = False
+        self.iterations = 0
+
+    def add_node(self, name, pressure=None, demand=0, stagnation_temperature=None) -> int:
+        """Add a node to the network and return its index
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the node \n
+        pressure : `float`
+            The fixed pressure of the node. Default is none, a junction \n
+        demand : `float`
+            The mass flow drawn from a junction, negative to inject flow \n
+        stagnation_temperature : `float`
+            The stagnation temperature of the gas supplied by the node \n
+
+        """
+
+        self._names[name] = len(self._fixed)
+        self._fixed.append(np.nan if pressure is None else pressure)
+        self._demand.append(demand)
+        self._temperature.append(self.default_temperature if stagnation_temperature is None else stagnation_temperature)
+        self._structure = None
+        self.pressure = None
+        return self._names[name]
+
+    def add_pipe(self, upstream, downstream, length: float, diameter: float, friction_factor: float) -> int:
+        """Add a pipe between two nodes and return its index
+
+        Parameters
+        ----------
+        upstream : `str`
+            The name of the node the pipe starts at \n
+        downstream : `str`
+            The name of the node the pipe ends at \n
+        length : `float`
+            The length of the pipe \n
+        diameter : `float`
+            The inside diameter of the pipe \n
+        friction_factor : `float`
+            The friction factor of the pipe \n
+
+        """
+
+        self._pipes.append((self._names[upstream], self._names[downstream], friction_factor * length / diameter,
+            np.pi/4 * diameter**2))
+        self._structure = None
+        return len(self._pipes) - 1
+
+    def set_pressure(self, name, pressure=None):
+        """Fix the pressure of a node, or free it to become a junction with none"""
+
+        index = self._names[name]
+        if np.isnan(self._fixed[index]) != (pressure is None):
+            self._structure = None
+        self._fixed[index] = np.nan if pressure is None else pressure
+
+    def set_demand(self, name, demand: float):
+        """Set the mass flow drawn from a junction"""
+
+        self._demand[self._names[name]] = demand
+
+    def _build(self):
+        """Build the Jacobian structure for the layout of the network
+
+        Notes
+        -----
+        Every pipe adds the derivative of its mass flow to the four entries
+        coupling its two nodes. The entries between junctions are gathered once
+        into a compressed matrix in a reverse Cuthill-McKee order, with the
+        position of every pipe entry kept so the values are refilled with a
+        single bincount.
+
+        """
+
+        pipes = np.array(self._pipes, dtype=float).reshape(-1, 4)
+        upstream, downstream = pipes[:, 0].astype(int), pipes[:, 1].astype(int)
+        free = np.isnan(np.array(self._fixed, dtype=float))
+        unknown = np.full(len(free), -1)
+        unknown[free] = np.arange(free.sum())
+
+        #entry (row, column) for d(balance at row)/d(pressure at column)
+        rows = np.concatenate((unknown[downstream], unknown[downstream], unknown[upstream], unknown[upstream]))
+        columns = np.concatenate((unknown[upstream], unknown[downstream], unknown[upstream], unknown[downstream]))
+        kept = (rows >= 0) & (columns >= 0)
+        n = int(free.sum())
+
+        pattern = csr_matrix((np.ones(kept.sum()), (rows[kept], columns[kept])), shape=(n, n))
+        order = reverse_cuthill_mckee(pattern + pattern.T, symmetric_mode=True) if n else np.zeros(0, dtype=int)
+        position = np.empty(n, dtype=int)
+        position[order] = np.arange(n)
+        keys, slot = np.unique(position[rows[kept]] * n + position[columns[kept]], return_inverse=True)
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(keys // n, minlength=n))))
+
+        self._structure = {'upstream': upstream, 'downstream': downstream, 'fanno': pipes[:, 2], 'area': pipes[:, 3],
+            'free': free, 'unknown': unknown, 'kept': kept, 'slot': slot, 'indices': keys % n, 'indptr': indptr,
+            'order': order, 'position': position}
+
+    def _balance(self, pressure, temperature):
+        """Return the pipe flows and the mass balance at every node"""
+
+        s = self._structure
+        up, down = s['upstream'], s['downstream']
+        forward = pressure[up] >= pressure[down]
+        high = np.where(forward, pressure[up], pressure[down])
+        low = np.where(forward, pressure[down], pressure[up])
+        source = np.where(forward, temperature[up], temperature[down])
+        flow, d_high, d_low, choked, mach = _pipe_flow(high, low, source, s['area'], s['fanno'], gas=self.gas)
+        sign = np.where(forward, 1, -1)
+        mass_flow = sign * flow
+        d_up = np.where(forward, d_high, -d_low)
+        d_down = np.where(forward, d_low, -d_high)
+
+        nodes = len(pressure)
+        balance = np.bincount(down, weights=mass_flow, minlength=nodes) - np.bincount(up, weights=mass_flow, minlength=nodes)
+        balance -= np.array(self._demand, dtype=float)
+        return mass_flow, (d_up, d_down), balance, choked, mach
+
+    def _jacobian(self, derivatives):
+        """Fill the Jacobian of the junction balances in the stored structure"""
+
+        s = self._structure
+        d_up, d_down = derivatives
+        values = np.concatenate((d_up, d_down, -d_up, -d_down))[s['kept']]
+        n = len(s['order'])
+        data = np.bincount(s['slot'], weights=values, minlength=len(s['indices']))
+        return csr_matrix((data, s['indices'], s['indptr']), shape=(n, n))
+
+    def _temperatures(self, mass_flow):
+        """Mix the stagnation temperatures of the flows entering every junction
+
+        """
+
+        s = self._structure
+        up, down, free = s['upstream'], s['downstream'], s['free']
+        given = np.array(self._temperature, dtype=float)
+        demand = np.array(self._demand, dtype=float)
+        nodes = len(free)
+        source = np.where(mass_flow >= 0, up, down)
+        sink = np.where(mass_flow >= 0, down, up)
+        flow = np.abs(mass_flow)
+
+        #(inflow + injection) T_n - sum(inflow T_source) = injection T_given
+        #fixed nodes that supply no pipe are outlets and take the mixed inflow
+        injection = np.where(free, np.maximum(-demand, 0), 0)
+        inflow = np.bincount(sink, weights=flow, minlength=nodes) + injection
+        outflow = np.bincount(source, weights=flow, minlength=nodes)
+        mixed = (free | (outflow == 0)) & (inflow > 0)
+        diagonal = np.where(mixed, inflow, 1)
+        matrix = csr_matrix((diagonal, (np.arange(nodes), np.arange(nodes))), shape=(nodes, nodes))
+        coupled = mixed[sink]
+        matrix = matrix - csr_matrix((flow[coupled], (sink[coupled], source[coupled])), shape=(nodes, nodes))
+        rhs = np.where(mixed, injection * given, given)
+        return spsolve(csc_matrix(matrix), rhs)
+
+    def solve(self, tol=1e-9, maxiter=50):
+        """Solve the network for the node pressures and the pipe flows
+
+        Parameters
+        ----------
+        tol : `float`
+            The largest mass imbalance at a junction relative to the largest
+            pipe flow \n
+        maxiter : `int`
+            The maximum number of Newton iterations \n
+
+        """
+
+        if self._structure is None:
+            self._build()
+        s = self._structure
+        free, order, position = s['free'], s['order'], s['position']
+        fixed = np.array(self._fixed, dtype=float)
+
+        #start from the last solution, or from the pressures of a network of
+        #linear resistances between the fixed nodes
+        if self.pressure is None or len(self.pressure) != len(fixed):
+            pressure = self._initial_pressure(fixed)
+            temperature = np.array(self._temperature, dtype=float)
+        else:
+            pressure = np.where(free, self.pressure, fixed)
+            temperature = self.stagnation_temperature
+
+        #the temperatures follow the flows of every iterate, so the mass and
+        #energy balances converge together
+        self.iterations, self.converged = 0, False
+        for n in range(maxiter + 1):
+            mass_flow, derivatives, balance, choked, mach = self._balance(pressure, temperature)
+            updated = self._temperatures(mass_flow)
+            change = np.max(np.abs(updated - temperature) / updated)
+            temperature = updated
+            scale = max(np.max(np.abs(mass_flow), initial=0), np.max(np.abs(self._demand), initial=0), 1e-300)
+            residual = np.max(np.abs(balance[free]), initial=0)
+            if residual <= tol * scale and change < tol:
+                self.converged = True
+                break
+            if n == maxiter:
+                break
+            if residual <= tol * scale:
+                continue
+
+            jacobian = self._jacobian(derivatives)
+            step = np.zeros(len(fixed))
+            step[np.flatnonzero(free)[order]] = splu(csc_matrix(jacobian), permc_spec='NATURAL').solve(-balance[free][order])
+
+            #halve the step until the imbalance drops and the pressures stay positive
+            for _ in range(30):
+                trial = pressure + step
+                if np.all(trial[free] > 0):
+                    trial_balance = self._balance(trial, temperature)[2]
+                    if np.max(np.abs(trial_balance[free])) < residual:
+                        break
+                step = step / 2
+            pressure = trial
+            self.iterations += 1
+
+        self.pressure = pressure
+        self.stagnation_temperature = temperature
+        self.mass_flow = mass_flow
+        self.choked = choked
+        self.mach_inlet = mach
+
+    def _initial_pressure(self, fixed):
+        """Return junction pressures that interpolate the fixed pressures across
+        the network with the pipes as linear resistances
+
+        """
+
+        s = self._structure
+        up, down, free, unknown = s['upstream'], s['downstream'], s['free'], s['unknown']
+        conductance = 1 / (1 + s['fanno'])
+        n = int(free.sum())
+        pressure = fixed.copy()
+        if n == 0:
+            return pressure
+
+        #graph Laplacian of the junctions with the fixed nodes moved to the right
+        laplacian = csr_matrix((n, n))
+        rhs = np.zeros(n)
+        for a, b in ((up, down), (down, up)):
+            rows = unknown[a]
+            keep = rows >= 0
+            laplacian = laplacian + csr_matrix((conductance[keep], (rows[keep], rows[keep])), shape=(n, n))
+            coupled = keep & (unknown[b] >= 0)
+            laplacian = laplacian - csr_matrix((conductance[coupled], (rows[coupled], unknown[b][coupled])), shape=(n, n))
+            to_fixed = keep & (unknown[b] < 0)
+            rhs += np.bincount(rows[to_fixed], weights=conductance[to_fixed] * fixed[b][to_fixed], minlength=n)
+
+        #junctions cut off from every fixed node start at the mean fixed pressure
+        laplacian = laplacian + csr_matrix((np.full(n, 1e-9), (np.arange(n), np.arange(n))), shape=(n, n))
+        rhs += 1e-9 * np.nanmean(fixed)
+        pressure[free] = spsolve(csc_matrix(laplacian), rhs)
+        return pressure
@@ -1,5 +1,5 @@
-from scipy.optimize import fsolve
-from gas_dynamics.extra import arctand
+import numpy as np
+from gas_dynamics.extra import arctand, _bracketed_newton
 from gas_dynamics.fluids import fluid, air
 
 
@@ -54,7 +54,9 @@ def prandtl_meyer_mach_from_angle(angle: float, gas=air) -> float:
     Notes
     -----
     Given a smooth turn through which a flow has turned and the ratio of specific
-    heats, return the Mach number after the turn.
+    heats, return the Mach number after the turn. Arrays of angles are solved
+    together with a bracketed Newton iteration. Angles beyond the maximum turn
+    angle of the gas return nan.
 
     Parameters
     ----------
@@ -78,11 +80,38 @@ def prandtl_meyer_mach_from_angle(angle: float, gas=air) -> float:
     >>>
     """
     
-    def get_mach(mach: float, angle=angle, gas=gas) -> float:
-        return prandtl_meyer_angle_from_mach(mach, gas=gas) - angle
-    
-    sol = fsolve(get_mach, x0=1.5, args=(angle, gas))
-    return sol[0]
+    return _prandtl_meyer_mach(np.radians(np.asarray(angle, dtype=float)), gas.gamma)[()]
+
+
+
+def _prandtl_meyer_mach(nu, gamma: float, guess=None):
+    """Return the Mach number for Prandtl-Meyer angles in radians, optionally
+    starting the iteration from a guess of the Mach number
+
+    """
+
+    nu, gamma = np.broadcast_arrays(np.asarray(nu, dtype=float), np.asarray(gamma, dtype=float))
+    k = (gamma+1)/(gamma-1)
+    nu_max = (k**.5 - 1) * np.pi/2
+
+    #solve for beta = (M^2-1)^.5, starting from the small and large turn asymptotes,
+    #with k going along with the angle so a gas array is solved element by element
+    def zero(beta, nu, k):
+        return k**.5 * np.arctan(beta/k**.5) - np.arctan(beta) - nu
+
+    def slope(beta, nu, k):
+        return beta**2 * (1 - 1/k) / ((1 + beta**2/k) * (1 + beta**2))
+
+    #nu_max - nu falls off as (k-1)/beta, which bounds beta from above
+    with np.errstate(all='ignore'):
+        if guess is None:
+            guess = np.where(nu < nu_max/2, (3*nu/(1 - 1/k))**(1/3), (k-1)/(nu_max - nu))
+        else:
+            guess = (np.asarray(guess, dtype=float)**2 - 1)**.5
+        upper = 2*(k-1)/(nu_max - nu) + 2
+    guess = np.where(nu > 0, guess, 0)
+    beta, _ = _bracketed_newton(zero, slope, 0, upper, args=(nu, k), guess=guess)
+    return np.where((nu >= 0) & (nu < nu_max), (1 + beta**2)**.5, np.nan)
 
 
 
@@ -109,5 +138,6 @@ def mach_wave_angle(mach: float):
 
     """
 
-    mu = arctand(1 / (mach**2 -1)**.5)
+    with np.errstate(divide='ignore'):
+        mu = arctand(1 / (mach**2 -1)**.5)
     return mu
\ No newline at end of file
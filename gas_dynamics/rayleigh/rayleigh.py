@@ -7,7 +7,8 @@
 #Copyright 2020 by Fernando A de la Fuente
 #All rights reserved
 from gas_dynamics.fluids import fluid, air
-from scipy.optimize import fsolve
+import numpy as np
+from gas_dynamics.extra import _bracketed_newton
 
 
 #==================================================
@@ -261,18 +262,23 @@ def rayleigh_mach_from_pressure_ratio(mach_initial: float, pressure_initial: flo
 #==================================================
 #rayleigh mach from temperature ratio
 #==================================================
-def rayleigh_mach_from_temperature_ratio(mach_initial: float, temperature_initial: float, temperature_final: float, gas=air) -> float:
+def rayleigh_mach_from_temperature_ratio(mach_initial: float, temperature_initial: float, temperature_final: float, gas=air,
+    branch='same', return_choked=False) -> float:
     """Return the Mach number given the Mach number and two temperatures
 
     Notes
     -----
     Given the initial Mach number, initial temperature, and final temperature, determine
     the resulting Mach number in the non-adiabatic constant area frictionless flow with 
-    heat transfer. Default fluid is air.
+    heat transfer. The temperature ratio T/T* is a quadratic in M^2 with two roots, one
+    on either side of its maximum of (1+gamma)^2/(4 gamma) at a Mach number of
+    1/sqrt(gamma), and both are solved explicitly. A final temperature above the
+    maximum cannot be reached and is nan. Arrays are solved element by element.
+    Default fluid is air.
 
     Parameters
     ----------
-    mach : `float`
+    mach_initial : `float`
         The Mach number\n
     temperature_initial : `float`
         Temperature 1\n
@@ -280,11 +286,17 @@ def rayleigh_mach_from_temperature_ratio(mach_initial: float, temperature_initia
         Temperature 2\n
     gas : `fluid`
         A user defined fluid object. Default is air \n
-    
+    branch : `str`
+        'lower' or 'upper' for the root below or above 1/sqrt(gamma), 'both' for both
+        stacked along a new first axis, or 'same' for the root on the same side as the
+        initial Mach number. Default is 'same' \n
+    return_choked : `bool`
+        Also return the mask of temperatures past the maximum. Default is false \n
+
     Returns
     -------
     float
-        The resulting Mach number \n
+        The resulting Mach number, and the choked mask if asked for \n
 
     Examples
     --------
@@ -293,37 +305,43 @@ def rayleigh_mach_from_temperature_ratio(mach_initial: float, temperature_initia
     >>> mach_final = gd.rayleigh_mach_from_temperature_ratio(mach_initial, T1, T2)
     >>> mach_final
     0.3006228581671002
+    >>> gd.rayleigh_mach_from_temperature_ratio(mach_initial, T1, T2, branch='both')
+    array([0.30062286, 2.3760193 ])
     >>>
     """
 
     gamma = gas.gamma
-    T2_T1 = temperature_final/temperature_initial
-    def zero(mach_final, mach_initial, T2_T1,gas):
-        return rayleigh_temperature_ratio(mach_initial=mach_initial, mach_final=mach_final, gas=gas) - T2_T1
-    
-    if mach_initial < 1:
-        x0 = .5
-    elif mach_initial > 1:
-        x0 = 1.5
-    else:
-        x0 = 1
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    T_Tstar = np.asarray(temperature_final, dtype=float) / temperature_initial * rayleigh_temperature_star_ratio(mach_initial, gas=gas)
 
-    sol = fsolve(zero, args=(mach_initial, T2_T1, gas), x0=x0)
-    return sol[0]
+    #gamma^2 T_Tstar x^2 + (2 gamma T_Tstar - (1+gamma)^2) x + T_Tstar = 0, x = M^2,
+    #written as 2c / (-b -+ sqrt(b^2 - 4ac)) to avoid cancellation
+    with np.errstate(invalid='ignore', divide='ignore'):
+        choked = T_Tstar > (1+gamma)**2 / (4*gamma)
+        b = (1+gamma)**2 - 2*gamma*T_Tstar
+        root = (1+gamma) * ((1+gamma)**2 - 4*gamma*T_Tstar)**.5
+        lower = (2*T_Tstar / (b + root))**.5
+        upper = (2*T_Tstar / (b - root))**.5
+    return _rayleigh_roots(lower, upper, mach_initial > gamma**-.5, choked, branch, return_choked)
 
 
 
 #==================================================
 #rayleigh mach from stagnation temperature ratio
 #==================================================
-def rayleigh_mach_from_stagnation_temperature_ratio(mach_initial: float, stagnation_temperature_initial: float, stagnation_temperature_final: float, gas=air) -> float:
+def rayleigh_mach_from_stagnation_temperature_ratio(mach_initial: float, stagnation_temperature_initial: float, stagnation_temperature_final: float, gas=air,
+    branch='same', return_choked=False) -> float:
     """Return the Mach number given the Mach number and two stagnation temperatures
 
     Notes
     -----
     Given the initial Mach number, initial stagnation temperature, and final stagnation
     temperature, determine the resulting Mach number in the non-adiabatic constant area
-    frictionless flow with heat transfer. Default fluid is air.
+    frictionless flow with heat transfer. The ratio Tt/Tt* is a quadratic in M^2 with a
+    subsonic and a supersonic root, both solved explicitly. Heat that takes the
+    stagnation temperature past Tt* thermally chokes the flow and the Mach number is
+    nan. A supersonic flow cannot be cooled below (gamma^2-1)/gamma^2 Tt*, where its
+    root is nan. Arrays are solved element by element. Default fluid is air.
 
     Parameters
     ----------
@@ -335,12 +353,17 @@ def rayleigh_mach_from_stagnation_temperature_ratio(mach_initial: float, stagnat
         Stagnation temperature 2\n
     gas : `fluid`
         A user defined fluid object. Default is air \n
-    
+    branch : `str`
+        'lower' or 'upper' for the subsonic or supersonic root, 'both' for both stacked
+        along a new first axis, or 'same' for the root on the same side of Mach one as
+        the initial Mach number. Default is 'same' \n
+    return_choked : `bool`
+        Also return the mask of thermally choked flows. Default is false \n
+
     Returns
     -------
     float
-        The resulting Mach number \n
-
+        The resulting Mach number, and the choked mask if asked for \n
 
     Examples
     --------
@@ -349,37 +372,70 @@ def rayleigh_mach_from_stagnation_temperature_ratio(mach_initial: float, stagnat
     >>> mach_final = gd.rayleigh_mach_from_stagnation_temperature_ratio(mach_initial, Tt1, Tt2)
     >>> mach_final
     0.33147520792270446
+    >>> gd.rayleigh_mach_from_stagnation_temperature_ratio(mach_initial, Tt1, [255, 300], return_choked=True)
+    (array([0.85841836,        nan]), array([False,  True]))
     >>>
     """
 
     gamma = gas.gamma
-    Tt2_Tt1 = stagnation_temperature_final/stagnation_temperature_initial
-    def zero(mach_final, mach_initial, Tt2_Tt1, gas):
-        return rayleigh_stagnation_temperature_ratio(mach_initial=mach_initial, mach_final=mach_final, gas=gas) - Tt2_Tt1
-    
-    if mach_initial < 1:
-        x0 = .5
-    elif mach_initial > 1:
-        x0 = 1.5
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    Tt_Ttstar = np.asarray(stagnation_temperature_final, dtype=float) / stagnation_temperature_initial \
+        * rayleigh_stagnation_temperature_star_ratio(mach_initial, gas=gas)
+
+    #the discriminant of the quadratic in M^2 is 4 (gamma+1)^2 (1 - Tt_Ttstar)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        choked = Tt_Ttstar > 1
+        b = gamma + 1 - gamma*Tt_Ttstar
+        root = (gamma+1) * (1 - Tt_Ttstar)**.5
+        lower = (Tt_Ttstar / (b + root))**.5
+        denominator = b - root
+        upper = (Tt_Ttstar / np.where(denominator > 0, denominator, np.nan))**.5
+    return _rayleigh_roots(lower, upper, mach_initial > 1, choked, branch, return_choked)
+
+
+
+def _rayleigh_roots(lower, upper, above, choked, branch: str, return_choked: bool):
+    """Pick the requested roots of a rayleigh inverse and mask the choked elements"""
+
+    lower = np.where(choked, np.nan, lower)
+    upper = np.where(choked, np.nan, upper)
+    if branch == 'same':
+        mach = np.where(above, upper, lower)
+    elif branch == 'lower':
+        mach = lower
+    elif branch == 'upper':
+        mach = upper
+    elif branch == 'both':
+        mach = np.stack(np.broadcast_arrays(lower, upper))
     else:
-        x0 = 1
-
-    sol = fsolve(zero, args=(mach_initial, Tt2_Tt1, gas), x0=x0)
-    return sol[0]
+        raise ValueError("branch must be 'same', 'lower', 'upper' or 'both'")
+    if return_choked:
+        return mach[()], choked[()]
+    return mach[()]
 
 
 
 #==================================================
 #rayleigh mach from stagnation pressure ratio
 #==================================================
-def rayleigh_mach_from_stagnation_pressure_ratio(mach_initial: float, stagnation_pressure_initial: float, stagnation_pressure_final: float, gas=air) -> float:
+def rayleigh_mach_from_stagnation_pressure_ratio(mach_initial: float, stagnation_pressure_initial: float, stagnation_pressure_final: float, gas=air,
+    branch='same', guess=None, return_choked=False, return_iterations=False) -> float:
     """Return the Mach number given the Mach number and two stagnation pressures
 
     Notes
     -----
     Given the initial Mach number, initial stagnation pressure, and final stagnation
     pressure, determine the resulting Mach number in the non-adiabatic constant area
-    frictionless flow with heat transfer. Default fluid is air.
+    frictionless flow with heat transfer. The ratio pt/pt* falls from its value at rest
+    to one at a Mach number of one and rises again above it, so each branch is solved
+    with a Newton iteration on its log, safeguarded by bisection on a bracket, with the
+    analytic derivative. The supersonic bracket is closed by pt/pt* > c M^(2/(gamma-1)).
+
+    A stagnation pressure below pt* cannot be reached and the flow is thermally
+    choked, while a subsonic flow cannot be cooled past its stagnation pressure at
+    rest. Both are nan. For samples of a stream ordered in time, the Mach numbers of
+    the previous samples are a good guess and cut the iterations to a few. Arrays are
+    solved element by element. Default fluid is air.
 
     Parameters
     ----------
@@ -391,11 +447,23 @@ def rayleigh_mach_from_stagnation_pressure_ratio(mach_initial: float, stagnation
         Stagnation pressure 2\n
     gas : `fluid`
         A user defined fluid object. Default is air \n
-    
+    branch : `str`
+        'lower' or 'upper' for the subsonic or supersonic root, 'both' for both stacked
+        along a new first axis, or 'same' for the root on the same side of Mach one as
+        the initial Mach number. Default is 'same' \n
+    guess : `array_like`
+        A starting Mach number for every element, clipped to its branch. Default starts
+        from the edge of the bracket \n
+    return_choked : `bool`
+        Also return the mask of thermally choked flows. Default is false \n
+    return_iterations : `bool`
+        Also return the number of iterations every element took. Default is false \n
+
     Returns
     -------
     float
-        The resulting Mach number\n
+        The resulting Mach number, then the choked mask and the iteration counts if
+        asked for \n
 
     Examples
     --------
@@ -403,24 +471,73 @@ def rayleigh_mach_from_stagnation_pressure_ratio(mach_initial: float, stagnation
     >>> mach_initial, pt1, pt2 = .8, 2.3, 2.6
     >>> mach_final = gd.rayleigh_mach_from_stagnation_pressure_ratio(mach_initial, pt1, pt2)
     >>> mach_final
-    0.40992385119887326
+    0.4099238511988714
+    >>> gd.rayleigh_mach_from_stagnation_pressure_ratio(mach_initial, pt1, [2.2, 2.6], branch='both')
+    array([[       nan, 0.40992385],
+           [       nan, 1.55919909]])
     >>>
     """
 
     gamma = gas.gamma
-    pt2_pt1 = stagnation_pressure_final/stagnation_pressure_initial
-    def zero(mach_final, mach_initial, pt2_pt1, gas):
-        return rayleigh_stagnation_pressure_ratio(mach_initial=mach_initial, mach_final=mach_final, gas=gas) - pt2_pt1
-
-    if mach_initial < 1:
-        x0 = .5
-    elif mach_initial > 1:
-        x0 = 1.5
+    mach_initial = np.asarray(mach_initial, dtype=float)
+    pt_ptstar = np.asarray(stagnation_pressure_final, dtype=float) / stagnation_pressure_initial \
+        * rayleigh_stagnation_pressure_star_ratio(mach_initial, gas=gas)
+    pt_ptstar = np.broadcast_to(pt_ptstar, np.broadcast_shapes(pt_ptstar.shape, mach_initial.shape))
+    choked = pt_ptstar < 1
+
+    if branch == 'same':
+        mach, iterations = _rayleigh_stagnation_pressure_mach(pt_ptstar, mach_initial > 1, gamma, guess)
+    elif branch in ('lower', 'upper'):
+        mach, iterations = _rayleigh_stagnation_pressure_mach(pt_ptstar, branch == 'upper', gamma, guess)
+    elif branch == 'both':
+        lower = _rayleigh_stagnation_pressure_mach(pt_ptstar, False, gamma, guess)
+        upper = _rayleigh_stagnation_pressure_mach(pt_ptstar, True, gamma, guess)
+        mach, iterations = np.stack((lower[0], upper[0])), np.stack((lower[1], upper[1]))
     else:
-        x0 = 1
+        raise ValueError("branch must be 'same', 'lower', 'upper' or 'both'")
+
+    result = (mach[()],)
+    if return_choked:
+        result += (choked[()],)
+    if return_iterations:
+        result += (iterations[()],)
+    return result if len(result) > 1 else result[0]
+
+
 
-    sol = fsolve(zero, args=(mach_initial, pt2_pt1, gas), x0=x0)
-    return sol[0]
+def _rayleigh_stagnation_pressure_mach(pt_ptstar, supersonic, gamma: float, guess=None) -> tuple:
+    """Invert pt/pt* on either branch
+
+    Returns
+    -------
+    tuple
+        The Mach numbers and the number of iterations each took \n
+    """
+
+    pt_ptstar, supersonic, gamma = np.broadcast_arrays(np.asarray(pt_ptstar, dtype=float), np.asarray(supersonic, dtype=bool),
+        np.asarray(gamma, dtype=float))
+    k = gamma/(gamma-1)
+
+    #gamma goes along with the target, so a gas array is solved element by element
+    def zero(mach, log_ratio, gamma):
+        d = 1 + (gamma-1)/2 * mach**2
+        return np.log(1+gamma) - np.log(1 + gamma*mach**2) + gamma/(gamma-1)*np.log(2*d/(gamma+1)) - log_ratio
+
+    def slope(mach, log_ratio, gamma):
+        return gamma*mach*(mach**2 - 1) / ((1 + (gamma-1)/2 * mach**2) * (1 + gamma*mach**2))
+
+    with np.errstate(all='ignore'):
+        at_rest = (1+gamma) * (2/(gamma+1))**k
+        invalid = (pt_ptstar < 1) | (~supersonic & (pt_ptstar > at_rest)) | np.isnan(pt_ptstar)
+        log_ratio = np.log(pt_ptstar)
+        upper = np.maximum((pt_ptstar / ((gamma-1)/(gamma+1))**k)**((gamma-1)/2), 1)
+        lower = np.where(supersonic, 1, 0)
+        upper = np.where(supersonic, upper, 1)
+        if guess is None:
+            guess = np.where(supersonic, upper, 0)
+        guess = np.where(invalid, np.nan, np.clip(np.broadcast_to(np.asarray(guess, dtype=float), pt_ptstar.shape), lower, upper))
+        mach, iterations = _bracketed_newton(zero, slope, lower, upper, args=(log_ratio, gamma), guess=guess, increasing=supersonic)
+    return np.where(invalid, np.nan, mach), iterations
 
 
 
@@ -650,7 +767,8 @@ def rayleigh_heat_flux(stagnation_temperature_initial: float, stagnation_tempera
     Examples
     --------
     >>> from gas_dynamics.fluids import air 
-    >>> air.cp = 1000
+    >>> air.cp
+    1000
     >>> Tt1, Tt2 = 280, 107.9
     >>> gd.rayleigh_heat_flux(Tt1=Tt1, Tt2=Tt2, ,air) 
     -172100.0
@@ -659,4 +777,158 @@ def rayleigh_heat_flux(stagnation_temperature_initial: float, stagnation_tempera
 
     cp = gas.cp
     q = cp*(stagnation_temperature_final-stagnation_temperature_initial)
-    return q
\ No newline at end of file
+    return q
+
+
+
+#==================================================
+#rayleigh heat max
+#==================================================
+def rayleigh_heat_max(mach_initial: float, stagnation_temperature_initial: float, gas=air) -> float:
+    """Return the most heat per unit mass that can be added before the flow thermally chokes
+
+    Notes
+    -----
+    Given the inlet Mach number and stagnation temperature of a constant area
+    frictionless duct, return the heat per unit mass that raises the stagnation
+    temperature to Tt*, where the flow leaves at a Mach number of one. A normal shock
+    keeps the flow on the same Rayleigh line, so the limit holds for supersonic inlets
+    with or without one. Arrays broadcast against each other, so a whole operating map
+    is one call. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The Mach number at the inlet \n
+    stagnation_temperature_initial : `float`
+        The stagnation temperature at the inlet \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    float
+        The maximum heat per unit mass \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.rayleigh_heat_max(mach_initial=[.3, 2], stagnation_temperature_initial=600)
+    array([1129802.44488103,  156250.        ])
+    >>>
+    """
+
+    stagnation_temperature_initial = np.asarray(stagnation_temperature_initial, dtype=float)
+    Tt_Ttstar = rayleigh_stagnation_temperature_star_ratio(np.asarray(mach_initial, dtype=float), gas=gas)
+    q_max = _rayleigh_cp(gas) * stagnation_temperature_initial * (1/Tt_Ttstar - 1)
+    return q_max[()]
+
+
+
+#==================================================
+#rayleigh heat addition
+#==================================================
+def rayleigh_heat_addition(mach_initial: float, stagnation_temperature_initial: float, heat: float, gas=air) -> np.ndarray:
+    """Return the state leaving a constant area frictionless duct after a given heat addition
+
+    Notes
+    -----
+    Given the inlet Mach number and stagnation temperature of the flow entering the duct
+    and the heat per unit mass added in it, return the state leaving the duct as a
+    structured array with the fields
+
+    mach_inlet : the Mach number entering the duct once the flow has adjusted \n
+    mach : the Mach number leaving the duct \n
+    stagnation_temperature : the stagnation temperature leaving the duct \n
+    temperature_ratio, pressure_ratio, stagnation_pressure_ratio : the temperature,
+    pressure and stagnation pressure leaving the duct over those of the original inlet \n
+    mass_flow_ratio : the mass flow over the original mass flow \n
+    choked : true where the heat is past the maximum \n
+    shock : true where a normal shock stands in the nozzle feeding the duct \n
+
+    Up to the maximum heat the flow stays on the branch it entered on. Past it the
+    flow chokes and leaves at a Mach number of one, and the inlet Mach number drops to
+    the subsonic one whose Tt* matches the heated stagnation temperature. A subsonic
+    inlet fed from a fixed stagnation state spills mass flow to get there. A supersonic
+    inlet is taken to be fed by a choked nozzle, which holds the mass flow, so a normal
+    shock stands in the nozzle and the duct is fed subsonic at a lower stagnation
+    pressure. Cooling a supersonic flow past its limit has no solution and is nan.
+    Arrays broadcast against each other. Default fluid is air.
+
+    Parameters
+    ----------
+    mach_initial : `float`
+        The Mach number at the inlet \n
+    stagnation_temperature_initial : `float`
+        The stagnation temperature at the inlet \n
+    heat : `float`
+        The heat per unit mass added, negative for cooling \n
+    gas : `fluid`
+        A user defined fluid object. Default is air \n
+
+    Returns
+    -------
+    ndarray
+        The state leaving the duct \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> state = gd.rayleigh_heat_addition(mach_initial=2, stagnation_temperature_initial=600, heat=[1e5, 5e5])
+    >>> state['mach']
+    array([1.43486011, 1.        ])
+    >>> state['shock']
+    array([False,  True])
+    >>> state['mach_inlet']
+    array([2.        , 0.40939349])
+    >>>
+    """
+
+    gamma = gas.gamma
+    mach_initial, Tt1, heat = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (mach_initial, stagnation_temperature_initial, heat)])
+    Tt2 = Tt1 + heat / _rayleigh_cp(gas)
+
+    with np.errstate(all='ignore'):
+        choked = Tt2 / Tt1 * rayleigh_stagnation_temperature_star_ratio(mach_initial, gas=gas) > 1
+        shock = choked & (mach_initial > 1)
+
+        #a choked duct is fed at the subsonic Mach number that reaches Tt* at the exit
+        mach_choked = rayleigh_mach_from_stagnation_temperature_ratio(1, Tt2, Tt1, gas=gas, branch='lower')
+        mach_inlet = np.where(choked, mach_choked, mach_initial)
+        mach = np.where(choked, 1, rayleigh_mach_from_stagnation_temperature_ratio(mach_initial, Tt1, Tt2, gas=gas))
+
+        #mass flux per unit stagnation pressure over the square root of the stagnation
+        #temperature, and the static over the stagnation pressure
+        def flux(mach):
+            return mach * (1 + (gamma-1)/2 * mach**2)**(-(gamma+1)/(2*(gamma-1)))
+
+        def pressure(mach):
+            return (1 + (gamma-1)/2 * mach**2)**(-gamma/(gamma-1))
+
+        #the stagnation pressure entering the duct drops through the shock at the mass
+        #flow the nozzle throat holds, while a spilling subsonic inlet keeps it
+        pt_inlet = np.where(shock, flux(mach_initial) / flux(mach_inlet), 1)
+        mass_flow_ratio = np.where(choked & ~shock, flux(mach_inlet) / flux(mach_initial), 1)
+
+        state = np.empty(mach.shape, dtype=[('mach_inlet', float), ('mach', float), ('stagnation_temperature', float),
+            ('temperature_ratio', float), ('pressure_ratio', float), ('stagnation_pressure_ratio', float),
+            ('mass_flow_ratio', float), ('choked', bool), ('shock', bool)])
+        state['mach_inlet'] = mach_inlet
+        state['mach'] = mach
+        state['stagnation_temperature'] = Tt2
+        state['temperature_ratio'] = Tt2 / Tt1 * (1 + (gamma-1)/2 * mach_initial**2) / (1 + (gamma-1)/2 * mach**2)
+        state['pressure_ratio'] = pt_inlet * pressure(mach_inlet) / pressure(mach_initial) * rayleigh_pressure_ratio(mach_inlet, mach, gas=gas)
+        state['stagnation_pressure_ratio'] = pt_inlet * rayleigh_stagnation_pressure_ratio(mach_inlet, mach, gas=gas)
+        state['mass_flow_ratio'] = mass_flow_ratio
+        state['choked'] = choked
+        state['shock'] = shock
+    return state
+
+
+
+def _rayleigh_cp(gas) -> float:
+    """The specific heat of the fluid, from its ratio of specific heats if it has none"""
+
+    if gas.cp is None:
+        return gas.gamma * gas.R / (gas.gamma - 1)
+    return gas.cp
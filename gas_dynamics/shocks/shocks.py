@@ -29,8 +29,9 @@ import numpy as np
 from scipy.optimize import fsolve
 import matplotlib.pyplot as plt
 from matplotlib.ticker import (MultipleLocator, FormatStrFormatter,AutoMinorLocator)
-from gas_dynamics.extra import ( radians, degrees, sind, arcsind, cosd, arccosd, tand, arctand, lin_interpolate )
-from gas_dynamics.fluids import fluid, air
+from gas_dynamics.extra import ( radians, degrees, sind, arcsind, cosd, arccosd, tand, arctand, lin_interpolate, _bracketed_newton )
+from gas_dynamics.fluids import fluid, air, ThermallyPerfectGas, EquilibriumAir, GasArray
+from gas_dynamics.units import to_si, from_si
 
 
 
@@ -681,4 +682,264 @@ def shock_flow_deflection_from_machs(mach_initial: float, mach_final: float, gas
         if zero1 < 0:
             zero2 = zero(thetas[num-1], mach_initial=mach_initial, mach_final=mach_final, gas=gas)
             theta = lin_interpolate(0, zero1, zero2, thetas[num], thetas[num-1])
-            return shock_flow_deflection(mach=mach_initial, shock_angle=theta, gas=gas)
\ No newline at end of file
+            return shock_flow_deflection(mach=mach_initial, shock_angle=theta, gas=gas)
+
+
+#==================================================
+#normal shock
+#==================================================
+def normal_shock(mach: float, pressure=None, temperature=None, gas=air, units=None) -> np.ndarray:
+    """Return the state after a standing normal shock in a gas whose specific heats need not be constant
+
+    Notes
+    -----
+    The conservation of mass, momentum and energy across the shock,
+
+    p2 = p1 + rho1 u1^2 (1 - epsilon) \n
+    h2 = h1 + u1^2 (1 - epsilon^2) / 2 \n
+
+    with epsilon = rho1/rho2, are solved for the density ratio with Newton steps,
+    starting from the density ratio of a calorically perfect gas with the gamma of
+    the fluid. The enthalpy and density of a thermally perfect gas come from its
+    polynomials, and those of equilibrium air from its tables, so the dissociation
+    behind strong shocks is taken into account. A plain fluid gives the usual normal
+    shock relations. Every upstream state is solved at once, and the arrays
+    broadcast against each other. The pressure, temperature, velocity and density
+    are in the units given, by default those of the fluid, and are solved in SI
+    units. Default fluid is air.
+
+    Parameters
+    ----------
+    mach : `array_like`
+        The Mach number before the shock \n
+    pressure : `array_like`
+        The pressure before the shock. Default is 101325 Pa \n
+    temperature : `array_like`
+        The temperature before the shock. Default is 288.15 K \n
+    gas : `fluid`
+        A fluid, thermally perfect gas or equilibrium air. Default is air \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the pressure and temperature and of the state returned.
+        Default is the units of the fluid \n
+
+    Returns
+    -------
+    ndarray
+        The state after the shock as a structured array with the fields mach,
+        velocity, pressure, temperature, density, pressure_ratio, temperature_ratio
+        and density_ratio \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> state = gd.normal_shock(mach=[2, 20], pressure=100, temperature=220, gas=gd.equilibrium_air)
+    >>> state['temperature']
+    array([ 371.24261364, 6140.33152426])
+    >>> state['density_ratio']
+    array([ 2.67217737, 13.35912589])
+    >>>
+    """
+
+    units, gas, pressure, temperature = _shock_inputs(pressure, temperature, gas, units)
+    mach, pressure, temperature = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (mach, pressure, temperature)])
+    if isinstance(gas, GasArray):
+        mach, pressure, temperature, gamma, R = np.broadcast_arrays(mach, pressure, temperature, gas.gamma, gas.R)
+        gas = GasArray(gamma.ravel(), R.ravel())
+    model = _gas_model(gas)
+    velocity = mach.ravel() * model['sound_speed'](temperature.ravel(), pressure.ravel())
+    after = _normal_shock(velocity, pressure.ravel(), temperature.ravel(), model, gas)
+    return _shock_units(_shock_state(after, pressure, temperature, model, mach.shape), units)[()]
+
+
+
+#==================================================
+#oblique shock
+#==================================================
+def oblique_shock(mach: float, flow_deflection: float, pressure=None, temperature=None, gas=air, units=None) -> np.ndarray:
+    """Return the weak oblique shock and the state after it in a gas whose specific heats need not be constant
+
+    Notes
+    -----
+    The component of the flow normal to the shock passes through a normal shock, see
+    normal_shock, and the tangential component is kept, so the flow turns through
+
+    tan(shock_angle - flow_deflection) = epsilon tan(shock_angle)
+
+    where epsilon is the density ratio across the shock. The flow deflection is
+    found on a grid of shock angles from the Mach angle to 90 degrees to bracket the
+    weak shock, which is then solved for with Newton steps. Deflections past the
+    largest one the flow can turn through detach the shock and are nan. Every
+    upstream state is solved at once, and the arrays broadcast against each other.
+    Angles are in degrees, and the other dimensional quantities are in the units
+    given, by default those of the fluid. Default fluid is air.
+
+    Parameters
+    ----------
+    mach : `array_like`
+        The Mach number before the shock \n
+    flow_deflection : `array_like`
+        The flow deflection angle in degrees \n
+    pressure : `array_like`
+        The pressure before the shock. Default is 101325 Pa \n
+    temperature : `array_like`
+        The temperature before the shock. Default is 288.15 K \n
+    gas : `fluid`
+        A fluid, thermally perfect gas or equilibrium air. Default is air \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the pressure and temperature and of the state returned.
+        Default is the units of the fluid \n
+
+    Returns
+    -------
+    ndarray
+        The shock angle and the state after the shock as a structured array with the
+        fields shock_angle, mach, velocity, pressure, temperature, density,
+        pressure_ratio, temperature_ratio and density_ratio \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> state = gd.oblique_shock(mach=2, flow_deflection=10)
+    >>> state['shock_angle']
+    39.31393184481887
+    >>>
+    """
+
+    units, gas, pressure, temperature = _shock_inputs(pressure, temperature, gas, units)
+    arrays = [np.asarray(a, dtype=float) for a in (mach, flow_deflection, pressure, temperature)]
+    if isinstance(gas, GasArray):
+        arrays += [gas.gamma, gas.R]
+    arrays = np.broadcast_arrays(*arrays)
+    shape = arrays[0].shape
+    mach, flow_deflection, pressure, temperature, *columns = [a.ravel() for a in arrays]
+    if columns:
+        gas = GasArray(*columns)
+    model = _gas_model(gas)
+    velocity = mach * model['sound_speed'](temperature, pressure)
+
+    #the gamma and R of a gas array go along with the states they belong to
+    def deflection(angle, velocity, pressure, temperature, *columns):
+        local = GasArray(*[a.ravel() for a in columns]) if columns else gas
+        normal = velocity * sind(angle)
+        epsilon = _normal_shock(normal, pressure, temperature, _gas_model(local) if columns else model, local)['velocity'].reshape(normal.shape) / normal
+        return angle - arctand(epsilon * tand(angle))
+
+    #bracket the weak shock, the first crossing of the deflection going up from the Mach angle
+    with np.errstate(all='ignore'):
+        mach_angle = arcsind(1 / mach)
+        grid = mach_angle[:, None] + (90 - mach_angle[:, None]) * np.linspace(0, 1, 91)[1:-1]
+        deflections = deflection(grid, *[np.repeat(a[:, None], grid.shape[1], axis=1) for a in (velocity, pressure, temperature, *columns)])
+        above = deflections >= flow_deflection[:, None]
+        attached = above.any(axis=1) & (flow_deflection >= 0) & (mach > 1)
+        k = np.argmax(above, axis=1)
+        lower = np.where(k > 0, grid[np.arange(k.size), np.maximum(k - 1, 0)], mach_angle)
+        upper = grid[np.arange(k.size), k]
+
+        def zero(angle, target, *upstream):
+            return deflection(angle, *upstream) - target
+
+        def derivative(angle, target, *upstream):
+            step = 1e-6 * angle
+            return (zero(angle + step, target, *upstream) - zero(angle - step, target, *upstream)) / (2*step)
+
+        angle, _ = _bracketed_newton(zero, derivative, lower, upper, args=(flow_deflection, velocity, pressure, temperature, *columns),
+            tol=1e-12)
+        angle = np.where(attached, angle, np.nan)
+        normal = velocity * sind(angle)
+        after = _normal_shock(normal, pressure, temperature, model, gas)
+        tangential = velocity * cosd(angle)
+        after['velocity'] = (after['velocity']**2 + tangential**2)**.5
+
+    state = _shock_state(after, pressure, temperature, model, shape)
+    result = np.empty(shape, dtype=[('shock_angle', float)] + state.dtype.descr)
+    result['shock_angle'] = angle.reshape(shape)
+    for name in state.dtype.names:
+        result[name] = state[name]
+    return _shock_units(result, units)[()]
+
+
+
+def _shock_inputs(pressure, temperature, gas, units) -> tuple:
+    """The units, and the fluid, pressure and temperature in SI units, standard sea level where not given"""
+
+    units = gas.unit_system if units is None else units
+    pressure = 101325 if pressure is None else to_si(pressure, 'pressure', units)
+    temperature = 288.15 if temperature is None else to_si(temperature, 'temperature', units)
+    return units, gas.si(), pressure, temperature
+
+
+def _shock_units(state: np.ndarray, units) -> np.ndarray:
+    """The state after a shock in the given units"""
+
+    for name in ('velocity', 'pressure', 'temperature', 'density'):
+        state[name] = from_si(state[name], name, units)
+    return state
+
+
+def _gas_model(gas) -> dict:
+    """The enthalpy, density and speed of sound of a fluid, and its temperature from enthalpy, in SI units"""
+
+    if isinstance(gas, EquilibriumAir):
+        return {'enthalpy': gas.enthalpy, 'density': gas.density, 'sound_speed': gas.sound_speed,
+            'temperature': gas.temperature_from_enthalpy}
+    if isinstance(gas, ThermallyPerfectGas):
+        def temperature(enthalpy, pressure):
+            guess = gas.stagnation_temperature * enthalpy / gas.enthalpy(gas.stagnation_temperature)
+            return _bracketed_newton(lambda T, h: gas.enthalpy(T) - h, lambda T, h: gas.specific_heat(T), 20, 20000,
+                args=(enthalpy,), guess=np.clip(guess, 20, 20000))[0]
+
+        return {'enthalpy': lambda T, p: gas.enthalpy(T), 'density': lambda T, p: p / (gas.R * T),
+            'sound_speed': lambda T, p: (gas.ratio_of_specific_heats(T) * gas.R * T)**.5, 'temperature': temperature}
+    cp = gas.gamma * gas.R / (gas.gamma - 1)
+    return {'enthalpy': lambda T, p: cp * T, 'density': lambda T, p: p / (gas.R * T),
+        'sound_speed': lambda T, p: (gas.gamma * gas.R * T)**.5, 'temperature': lambda h, p: h / cp}
+
+
+def _normal_shock(velocity, pressure, temperature, model: dict, gas) -> dict:
+    """Newton steps on the density ratio across normal shocks of the given upstream states"""
+
+    velocity, pressure, temperature = [np.array(a, dtype=float).ravel() for a in np.broadcast_arrays(velocity, pressure, temperature)]
+    density = model['density'](temperature, pressure)
+    enthalpy = model['enthalpy'](temperature, pressure)
+
+    def downstream(epsilon, i):
+        p2 = pressure[i] + density[i] * velocity[i]**2 * (1 - epsilon)
+        T2 = model['temperature'](enthalpy[i] + velocity[i]**2 * (1 - epsilon**2) / 2, p2)
+        return p2, T2, model['density'](T2, p2)
+
+    def residual(epsilon, i):
+        return epsilon - density[i] / downstream(epsilon, i)[2]
+
+    with np.errstate(all='ignore'):
+        #the density ratio of a calorically perfect gas to start from, one where there is no shock
+        mach2 = velocity**2 / (gas.gamma * gas.R * temperature)
+        epsilon = np.where(mach2 > 1, ((gas.gamma - 1) * mach2 + 2) / ((gas.gamma + 1) * mach2), 1)
+        #the start is exact for a gas array, whose points are calorically perfect gasses
+        active = np.flatnonzero((mach2 > 1) & (not isinstance(gas, GasArray)))
+        for _ in range(50):
+            if active.size == 0:
+                break
+            e = epsilon[active]
+            r = residual(e, active)
+            step = r * 1e-7 / (r - residual(e - 1e-7, active))
+            epsilon[active] = e - step
+            active = active[np.abs(step) > 1e-12]
+
+        p2, T2, rho2 = downstream(epsilon, slice(None))
+    return {'velocity': velocity * epsilon, 'pressure': p2, 'temperature': T2, 'density': rho2}
+
+
+def _shock_state(after: dict, pressure, temperature, model: dict, shape: tuple) -> np.ndarray:
+    """The structured array of the state after a shock"""
+
+    pressure, temperature = [np.ravel(a) for a in (pressure, temperature)]
+    state = np.empty(after['pressure'].shape, dtype=[('mach', float), ('velocity', float), ('pressure', float), ('temperature', float),
+        ('density', float), ('pressure_ratio', float), ('temperature_ratio', float), ('density_ratio', float)])
+    with np.errstate(all='ignore'):
+        state['mach'] = after['velocity'] / model['sound_speed'](after['temperature'], after['pressure'])
+        for name in ('velocity', 'pressure', 'temperature', 'density'):
+            state[name] = after[name]
+        state['pressure_ratio'] = after['pressure'] / pressure
+        state['temperature_ratio'] = after['temperature'] / temperature
+        state['density_ratio'] = after['density'] / model['density'](temperature, pressure)
+    return state.reshape(shape)
@@ -28,7 +28,9 @@
 import numpy as np
 from scipy.optimize import fsolve
 import matplotlib.pyplot as plt
-from gas_dynamics.fluids import fluid, air, methane, argon
+from gas_dynamics.fluids import fluid, air, methane, argon, ThermallyPerfectGas, GasArray
+from gas_dynamics.extra import _bracketed_newton
+from gas_dynamics.units import to_si, from_si
 
 
 
@@ -36,13 +38,14 @@ from gas_dynamics.fluids import fluid, air, methane, argon
 #sonic_velocity
 #fluid class and us standard option 11/6/2020
 #==================================================    
-def sonic_velocity(temperature=273.15, gas=air) -> float:
+def sonic_velocity(temperature=273.15, gas=air, units=None) -> float:
     """Returns the local speed of sound.
     
     Notes
     -----
     Given a ratio of specific heats, gas constant, and temperature
-    this function returns the locoal speed of sound. Default fluid is air.
+    this function returns the locoal speed of sound, K and m/s in SI units
+    and R and ft/s in US units. Default fluid is air.
     
     Parameters
     ----------
@@ -50,6 +53,9 @@ def sonic_velocity(temperature=273.15, gas=air) -> float:
         A user defined fluid object. Default is air \n
     temperature : `float`
         The temperature \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the temperature and speed of sound, or of each element.
+        Default is the unit system of the fluid \n
 
     Returns
     -------
@@ -65,9 +71,14 @@ def sonic_velocity(temperature=273.15, gas=air) -> float:
 
     """
 
-    gamma, R, gc = gas.gamma, gas.R, gas.gc
-    a = ( gc*gamma*R*temperature)**.5
-    return a
+    units = gas.unit_system if units is None else units
+    gas = gas.si()
+    temperature = to_si(temperature, 'temperature', units)
+    gamma, R = gas.gamma, gas.R
+    if isinstance(gas, ThermallyPerfectGas):
+        gamma = gas.ratio_of_specific_heats(temperature)
+    a = (gamma*R*temperature)**.5
+    return from_si(a, 'velocity', units)
 
 
 
@@ -297,9 +308,10 @@ def stagnation_pressure_ratio(mach: float, gas=air) -> float:
     >>>
     """
 
-    gamma = gas.gamma
-    denom = 1 + (gamma-1)/2 * mach**2
-    Pt_ratio = (1 / denom ) ** (gamma/(gamma-1))
+    if isinstance(gas, ThermallyPerfectGas):
+        return gas._ratio(mach, 'pressure')
+    denom = 1 + gas.half_gamma_minus_one * mach**2
+    Pt_ratio = (1 / denom ) ** gas.pressure_exponent
     return Pt_ratio
 
 
@@ -337,8 +349,9 @@ def stagnation_temperature_ratio(mach: float, gas=air) -> float:
     >>>
     """
 
-    gamma = gas.gamma
-    Tt_ratio = 1 / (1+(gamma-1)/2 *mach**2)
+    if isinstance(gas, ThermallyPerfectGas):
+        return gas._ratio(mach, 'temperature')
+    Tt_ratio = 1 / (1 + gas.half_gamma_minus_one * mach**2)
     return Tt_ratio
 
 
@@ -376,8 +389,9 @@ def stagnation_density_ratio(mach: float, gas=air) -> float:
     >>>
     """
 
-    gamma = gas.gamma
-    rho_t_ratio = (1 / (1 + (gamma-1)/2 * mach**2 )) ** (1 / (gamma-1))
+    if isinstance(gas, ThermallyPerfectGas):
+        return gas._ratio(mach, 'density')
+    rho_t_ratio = (1 / (1 + gas.half_gamma_minus_one * mach**2 )) ** gas.density_exponent
     return rho_t_ratio
 
 
@@ -738,12 +752,14 @@ def mach_area_star_ratio(mach: float, gas=air) -> float:
     4.23456790123457
     >>>
     """
-    if mach == 0:
-        return float('inf')
+    if isinstance(gas, ThermallyPerfectGas):
+        return gas._ratio(mach, 'area')
 
-    gamma = gas.gamma
-    a_star_ratio = 1/mach*((1+(gamma-1)/2*mach**2)/((gamma+1)/2))**((gamma+1)/(2*(gamma-1)))
-    return a_star_ratio
+    mach = np.asarray(mach, dtype=float)
+    with np.errstate(divide='ignore'):
+        a_star_ratio = np.where(mach == 0, np.inf,
+            1/mach*((1 + gas.half_gamma_minus_one*mach**2)/gas.half_gamma_plus_one)**gas.area_exponent)
+    return a_star_ratio[()]
 
 
 
@@ -822,6 +838,11 @@ def mach_from_area_ratio(area_ratio: float, gas=air) ->list:
     >>>
     """
 
+    if isinstance(gas, ThermallyPerfectGas):
+        return [gas._mach_from_area_ratio(area_ratio, False)[()], gas._mach_from_area_ratio(area_ratio, True)[()]]
+    if isinstance(gas, GasArray):
+        return [_mach_from_area_ratio(area_ratio, False, gas.gamma)[()], _mach_from_area_ratio(area_ratio, True, gas.gamma)[()]]
+
     def zero(mach, gas):
         return mach_area_star_ratio(mach=mach, gas=gas) - area_ratio
 
@@ -832,11 +853,45 @@ def mach_from_area_ratio(area_ratio: float, gas=air) ->list:
 
 
 
+def _mach_from_area_ratio(area_ratio, supersonic, gamma: float):
+    """Invert the area ratio A / A* on either branch, element by element
+
+    Notes
+    -----
+    The log of the area ratio is solved with a bracketed Newton iteration.
+    Away from a Mach number of one the area ratio behaves as a power of the
+    Mach number on each branch, which bounds the root and gives the initial
+    guess. Area ratios below one have no solution and return nan.
+
+    """
+
+    area_ratio, supersonic, gamma = np.broadcast_arrays(np.asarray(area_ratio, dtype=float), np.asarray(supersonic, dtype=bool),
+        np.asarray(gamma, dtype=float))
+    k = (gamma+1)/(2*(gamma-1))
+    log_ratio = np.log(np.where(area_ratio >= 1, area_ratio, np.nan))
+
+    #gamma goes along with the target, so a gas array is solved element by element
+    def log_area(mach, log_ratio, gamma):
+        return -np.log(mach) + (gamma+1)/(2*(gamma-1))*np.log((1 + (gamma-1)/2*mach**2) / ((gamma+1)/2)) - log_ratio
+
+    def slope(mach, log_ratio, gamma):
+        return (mach**2 - 1) / (mach * (1 + (gamma-1)/2*mach**2))
+
+    with np.errstate(all='ignore'):
+        #A/A* > (2/(gamma+1))^k / M below and > ((gamma-1)/(gamma+1))^k M^(2k-1) above
+        subsonic_guess = np.minimum(((2/(gamma+1))**k) / area_ratio, 1)
+        upper = (area_ratio * ((gamma+1)/(gamma-1))**k)**(1/(2*k-1)) + 1
+        mach, _ = _bracketed_newton(log_area, slope, np.where(supersonic, 1, 0), np.where(supersonic, upper, 1),
+            args=(log_ratio, gamma), guess=np.where(supersonic, upper, subsonic_guess), increasing=supersonic)
+    return np.where(np.isnan(log_ratio), np.nan, mach)
+
+
+
 #==================================================
 # mass_flux_max
 # added fluid class
 #==================================================
-def mass_flux_max(stagnation_pressure: float, stagnation_temperature: float, gas=air) -> float:
+def mass_flux_max(stagnation_pressure: float, stagnation_temperature: float, gas=air, units=None) -> float:
     """Returns the maximum flow rate per unit choked area
     
     Notes
@@ -846,9 +901,8 @@ def mass_flux_max(stagnation_pressure: float, stagnation_temperature: float, gas
     is air.
 
     **Units**:\n
-    J / kg-K and Pa return kg/m^2 \n    
-    kJ / kg-K and kPa returns kg/m^2 \n  
-    ft-lbf / lbm-R and psi returns lbm/in^2 \n  
+    SI, Pa and K return kg/s/m^2 \n    
+    US, psi and R return lbm/s/in^2 \n  
         
     Parameters
     ----------
@@ -858,8 +912,9 @@ def mass_flux_max(stagnation_pressure: float, stagnation_temperature: float, gas
         The stagnation temperature.\n
     gas : `fluid`
         A user defined fluid object. Default is air \n
-    metric : `bool`
-        Use metric or US standard.\n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the inputs and the mass flux, or of each element. Default
+        is the unit system of the fluid \n
     
     Returns
     -------
@@ -883,14 +938,21 @@ def mass_flux_max(stagnation_pressure: float, stagnation_temperature: float, gas
     'Btu / lbm-R'
     >>> flux = gd.mass_flux_max( stagnation_pressure=500, stagnation_temperature=500, gas=air_us)  
     >>> flux
-    2.097208828890205
+    11.895824100748039
+    >>> #or mix the two in one call
+    >>> gd.mass_flux_max([1e6, 500], [300, 500], units=['SI', 'US'])
+    array([2333.96521018,   11.89315108])
     >>>
     """
 
-    gamma, R, gc = gas.gamma, gas.R, gas.gc
+    units = gas.unit_system if units is None else units
+    gas = gas.si()
+    stagnation_pressure = to_si(stagnation_pressure, 'pressure', units)
+    stagnation_temperature = to_si(stagnation_temperature, 'temperature', units)
+    gamma, R = gas.gamma, gas.R
     
-    mdot_a_star = (((gc*gamma/(R))*(2/(gamma+1))**((gamma+1)/(gamma-1)))**.5 * stagnation_pressure/(stagnation_temperature**.5))
-    return mdot_a_star
+    mdot_a_star = (((gamma/(R))*(1/gas.half_gamma_plus_one)**gas.gamma_ratio)**.5 * stagnation_pressure/(stagnation_temperature**.5))
+    return from_si(mdot_a_star, 'mass_flux', units)
 
 
 
@@ -898,7 +960,7 @@ def mass_flux_max(stagnation_pressure: float, stagnation_temperature: float, gas
 #mass_flux
 #added fluid class
 #==================================================
-def mass_flux(mach: float, stagnation_pressure: float, stagnation_temperature: float, gas = air) -> float:
+def mass_flux(mach: float, stagnation_pressure: float, stagnation_temperature: float, gas = air, units=None) -> float:
     """Determine mass flow rate for a mach number up to 1
 
     Notes
@@ -908,10 +970,8 @@ def mass_flux(mach: float, stagnation_pressure: float, stagnation_temperature: f
     fluid is air.
     
     **Units**:\n
-    J / kg-K and Pa return kg/s/m^2 \n    
-    kJ / kg-K and kPa returns kg/s/m^2 \n  
-    ft-lbf / lbm-R and psi returns lbm/s/in^2 \n  
-    Btu / lbm-R and psi returns lbm/s/in^2 \n  
+    SI, Pa and K return kg/s/m^2 \n    
+    US, psi and R return lbm/s/in^2 \n  
     
     Parameters
     ----------
@@ -923,6 +983,9 @@ def mass_flux(mach: float, stagnation_pressure: float, stagnation_temperature: f
         The stagnation temperature \n
     gas : `fluid`
         A user defined fluid object. Default is air \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the inputs and the mass flux, or of each element. Default
+        is the unit system of the fluid \n
     
     Returns
     -------
@@ -941,15 +1004,19 @@ def mass_flux(mach: float, stagnation_pressure: float, stagnation_temperature: f
     'Btu / lbm-R'
     >>> flux = gd.mass_flux(mach=.8, stagnation_pressure=500, stagnation_temperature=500, gas=air_us) 
     >>> flux
-    2.01998480961849
+    11.457792686348915
     >>>
     """
 
-    gamma, R, gc = gas.gamma, gas.R, gas.gc
+    units = gas.unit_system if units is None else units
+    gas = gas.si()
+    stagnation_pressure = to_si(stagnation_pressure, 'pressure', units)
+    stagnation_temperature = to_si(stagnation_temperature, 'temperature', units)
+    gamma, R = gas.gamma, gas.R
     
-    term1 = mach * (1 + mach**2 * (gamma-1)/2 )**(-(gamma+1)/(2*(gamma-1)))
-    mass_flux = term1 * (gamma*gc/R)**.5 * stagnation_pressure/(stagnation_temperature**.5)
-    return mass_flux
+    term1 = mach * (1 + mach**2 * gas.half_gamma_minus_one)**(-gas.area_exponent)
+    mass_flux = term1 * (gamma/R)**.5 * stagnation_pressure/(stagnation_temperature**.5)
+    return from_si(mass_flux, 'mass_flux', units)
 
 
 
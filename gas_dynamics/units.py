@@ -0,0 +1,224 @@
+#!usr/bin/env
+#Unit systems, and the factors that take quantities in them to and from the SI
+#units the relations work in. Inputs are converted once per array where they
+#enter a function, so the relations never carry a proportionality factor gc.
+#
+#  Typical usage example:
+#  >>> gd.to_si(14.7, 'pressure', 'US')
+#  101352.9322095749
+#
+#Copyright 2020 by Fernando A de la Fuente
+#All rights reserved
+
+import numpy as np
+
+
+
+#==================================================
+#unit system
+#==================================================
+class UnitSystem:
+    """A class to represent a system of units
+
+    Notes
+    -----
+    A unit system holds the factor that takes each quantity in it to SI units.
+    Temperatures are absolute, so every conversion is a factor. A quantity the
+    system does not name is taken to be in SI units already. Like a fluid, a unit
+    system can't be changed once it is made and can be hashed.
+
+    The quantities are pressure, temperature, density, velocity, mass_flux, which
+    is the mass flow per unit area of the mass flux functions, mass_velocity, the
+    mass flow per unit area of a flow state, specific_energy, gas_constant,
+    specific_heat, length and viscosity.
+
+    Attributes
+    ----------
+    name : `str`
+        The name of the unit system \n
+    factors : `dict`
+        The factor that takes each quantity to SI units \n
+
+    Methods
+    -------
+    factor(quantity)
+        The factor that takes the quantity to SI units \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.US.factor('pressure')
+    6894.757293168361
+    >>> gd.US
+    UnitSystem(name='US')
+    >>>
+    """
+
+    __slots__ = ('name', 'factors')
+
+    quantities = ('pressure', 'temperature', 'density', 'velocity', 'mass_flux', 'mass_velocity', 'specific_energy',
+        'gas_constant', 'specific_heat', 'length', 'viscosity')
+
+    def __init__(self, name: str, factors: dict):
+        unknown = set(factors) - set(self.quantities)
+        if unknown:
+            raise ValueError('unknown quantities %s' % ', '.join(sorted(unknown)))
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'factors', {quantity: float(factors.get(quantity, 1)) for quantity in self.quantities})
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError("a unit system can't be changed")
+
+    def __eq__(self, other):
+        if not isinstance(other, UnitSystem):
+            return NotImplemented
+        return self.name == other.name and self.factors == other.factors
+
+    def __hash__(self):
+        return hash((self.name, tuple(self.factors.values())))
+
+    def __reduce__(self):
+        return UnitSystem, (self.name, self.factors)
+
+    def __repr__(self):
+        return 'UnitSystem(name=%r)' % self.name
+
+    def __str__(self):
+        return self.name
+
+    def factor(self, quantity: str) -> float:
+        """Return the factor that takes the quantity to SI units"""
+
+        try:
+            return self.factors[quantity]
+        except KeyError:
+            raise ValueError('unknown quantity %r' % quantity) from None
+
+
+
+SI = UnitSystem('SI', {})
+
+#psi, Rankine, lbm/ft^3, ft/s, lbm/s-in^2, lbm/s-ft^2, Btu/lbm, ft-lbf/lbm-R, Btu/lbm-R, ft and lbm/ft-s
+US = UnitSystem('US', {'pressure': 6894.757293168361, 'temperature': 5/9, 'density': 16.018463373960138, 'velocity': .3048,
+    'mass_flux': 703.0695796391593, 'mass_velocity': 4.88242763638305, 'specific_energy': 2326, 'gas_constant': 5.380320456,
+    'specific_heat': 4186.8, 'length': .3048, 'viscosity': 1.4881639435695537})
+
+_SYSTEMS = {'si': SI, 'metric': SI, 'us': US, 'imperial': US, 'english': US}
+
+
+
+#==================================================
+#get units
+#==================================================
+def get_units(units) -> UnitSystem:
+    """Return a unit system by its name
+
+    Parameters
+    ----------
+    units : `str` or `UnitSystem`
+        'SI' or 'metric', 'US', 'imperial' or 'english', not case sensitive, or a
+        unit system, which is returned as it is \n
+
+    Returns
+    -------
+    UnitSystem
+        The unit system \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.get_units('imperial') is gd.US
+    True
+    >>>
+    """
+
+    if isinstance(units, UnitSystem):
+        return units
+    try:
+        return _SYSTEMS[units.strip().lower()]
+    except (KeyError, AttributeError):
+        raise ValueError('no unit system named %r' % (units,)) from None
+
+
+
+#==================================================
+#to si
+#==================================================
+def to_si(value, quantity: str, units=SI):
+    """Return a quantity in SI units
+
+    Notes
+    -----
+    The whole array is converted with one product. The units are one system for
+    the whole array, or a system for every element, so inputs from sources that
+    use different units are converted at once. The factor of each distinct system
+    is looked up once.
+
+    Parameters
+    ----------
+    value : `array_like`
+        The quantity \n
+    quantity : `str`
+        The kind of quantity, one of UnitSystem.quantities \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units of the value, or of each element of it. Default is SI \n
+
+    Returns
+    -------
+    array_like
+        The quantity in SI units \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.to_si([300, 540], 'temperature', units=['SI', 'US'])
+    array([300., 300.])
+    >>>
+    """
+
+    return (np.asarray(value, dtype=float) * _factors(quantity, units))[()]
+
+
+
+#==================================================
+#from si
+#==================================================
+def from_si(value, quantity: str, units=SI):
+    """Return a quantity given in SI units in other units
+
+    Parameters
+    ----------
+    value : `array_like`
+        The quantity in SI units \n
+    quantity : `str`
+        The kind of quantity, one of UnitSystem.quantities \n
+    units : `str`, `UnitSystem` or `array_like`
+        The units to return, or the units of each element. Default is SI \n
+
+    Returns
+    -------
+    array_like
+        The quantity in the given units \n
+
+    Examples
+    --------
+    >>> import gas_dynamics as gd
+    >>> gd.from_si(101325, 'pressure', 'US')
+    14.69594877551345
+    >>>
+    """
+
+    return (np.asarray(value, dtype=float) / _factors(quantity, units))[()]
+
+
+
+def _factors(quantity: str, units):
+    """The factor of a quantity in one system, or an array of them for a system per element"""
+
+    if units is None or isinstance(units, (str, UnitSystem)):
+        return get_units(SI if units is None else units).factor(quantity)
+    units = np.asarray(units, dtype=object)
+    labels, inverse = np.unique(units.astype(str), return_inverse=True)
+    systems = {str(system): system for system in set(units.ravel().tolist())}
+    factors = np.array([get_units(systems[label]).factor(quantity) for label in labels])
+    return factors[inverse].reshape(units.shape)
@@ -13,6 +13,7 @@ setuptools.setup(name="gas_dynamics",
       long_description_content_type="text/markdown",
       project_urls = {"ReadtheDocs" : "http://gas-dynamics.readthedocs.io", "Github" : "http://github.com/fernancode/gas_dynamics"},
       packages=setuptools.find_packages(),
+      package_data={'gas_dynamics': ['data/*.csv']},
       classifiers=[
           "Development Status :: 3 - Alpha",
           "Programming Language :: Python :: 3.6",
@@ -0,0 +1,154 @@
+#######################
+# Test design functions
+#######################
+import gas_dynamics as gd
+import os
+from gas_dynamics.fluids import air, methane
+from gas_dynamics.design import design
+from gas_dynamics.design.export import _mesh
+import numpy as np
+
+class Test_method_of_characteristics:
+    def test_one(self):
+        nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=150)
+        A_Astar = gd.mach_area_star_ratio(2)
+        assert abs(nozzle.area_ratio - A_Astar) / A_Astar < 1e-3
+
+    def test_two(self):
+        nozzle = gd.method_of_characteristics(exit_mach=3, characteristic_lines=50, gas=methane)
+        assert abs(nozzle.mach[-1, -2] - 3) < 1e-6
+
+    def test_three(self):
+        nozzle = gd.method_of_characteristics(exit_mach=2.5, characteristic_lines=1000)
+        assert nozzle.x.shape == (1000, 1001)
+        assert np.all(np.diff(nozzle.wall_x) > 0)
+        assert np.all(np.diff(nozzle.wall_y) > 0)
+
+    def test_four(self):
+        nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=30, axisymmetric=True)
+        assert abs(nozzle.mach[-1, -2] - 2) < 1e-6
+        assert abs(nozzle.area_ratio - gd.mach_area_star_ratio(2)) < 1e-6
+        assert nozzle.theta_max < gd.prandtl_meyer_angle_from_mach(2) / 2
+        assert np.all(np.diff(nozzle.wall_x) > 0)
+        assert np.all(np.diff(nozzle.wall_y) >= 0)
+
+    def test_five(self):
+        nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=30, throat_radius=2)
+        assert abs(nozzle.area_ratio - gd.mach_area_star_ratio(2)) < 1e-6
+        assert nozzle.wall_x[0] == 0 and nozzle.wall_y[0] == 1
+        assert len(nozzle.wall_x) == 2*30 + 1
+        corner = gd.method_of_characteristics(exit_mach=2, characteristic_lines=30)
+        assert nozzle.wall_x[-1] > corner.wall_x[-1]
+
+    def test_six(self, monkeypatch):
+        #the wall angle is found on a coarse mesh, so the full mesh is marched three times at most
+        marched = []
+        march = design._march_kernel
+        monkeypatch.setattr(design, '_march_kernel', lambda nozzle, *args: marched.append(nozzle.characteristic_lines) or march(nozzle, *args))
+        nozzle = gd.method_of_characteristics(exit_mach=2.5, characteristic_lines=60, axisymmetric=True)
+        assert 0 < marched.count(60) <= 3
+        assert abs(nozzle.mach[-1, -2] - 2.5) < 1e-6
+
+
+class Test_nozzle_sweep:
+    def test_one(self, tmp_path):
+        paths = gd.nozzle_sweep(exit_mach=[2, 3], gamma=[1.3, 1.4], characteristic_lines=20, directory=tmp_path, max_workers=2)
+        assert len(paths) == 4
+        contour = np.load(paths[1])
+        assert contour['exit_mach'] == 2 and contour['gamma'] == 1.4
+        nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=20)
+        assert np.allclose(contour['wall_y'], nozzle.wall_y)
+
+    def test_two(self, tmp_path):
+        first = gd.nozzle_sweep(exit_mach=[2], gamma=[1.4], characteristic_lines=20, directory=tmp_path, max_workers=1)
+        modified = os.stat(first[0]).st_mtime_ns
+        paths = gd.nozzle_sweep(exit_mach=[2, 2.5], gamma=[1.4], characteristic_lines=20, directory=tmp_path, max_workers=1)
+        assert paths[0] == first[0]
+        assert os.stat(first[0]).st_mtime_ns == modified
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_parameters(self, tmp_path):
+        #other design parameters, or a nearby Mach number, never resume from another case
+        first = gd.nozzle_sweep(exit_mach=[2], gamma=[1.4], characteristic_lines=20, directory=tmp_path, max_workers=1)
+        finer = gd.nozzle_sweep(exit_mach=[2], gamma=[1.4], characteristic_lines=30, directory=tmp_path, max_workers=1)
+        nearby = gd.nozzle_sweep(exit_mach=[2.0000001], gamma=[1.4], characteristic_lines=20, directory=tmp_path, max_workers=1)
+        assert len({first[0], finer[0], nearby[0]}) == 3
+        assert np.load(finer[0])['wall_x'].size != np.load(first[0])['wall_x'].size
+
+
+class Test_method_of_characteristics_analysis:
+    def test_one(self):
+        #planar source flow from a virtual origin, sonic at a radius of 1.8
+        def mach(r):
+            return np.array([gd.mach_from_area_ratio(a)[1] for a in np.atleast_1d(r / 1.8)])
+
+        x = np.linspace(2, 6, 401)
+        y = x * np.tan(np.radians(10))
+        inflow = np.linspace(0, y[0], 21)
+        flow = gd.method_of_characteristics_analysis(x, y, inflow_mach=mach(np.hypot(2, inflow)),
+            inflow_angle=np.degrees(np.arctan2(inflow, 2)), characteristic_lines=20)
+        assert not flow.shock
+        solved = np.isfinite(flow.mach)
+        radius = np.hypot(flow.x[solved], flow.y[solved])[::50]
+        assert np.allclose(flow.mach[solved][::50], mach(radius), atol=1e-4)
+
+    def test_two(self):
+        x = np.linspace(0, 8, 801)
+        flow = gd.method_of_characteristics_analysis(x, np.ones_like(x), inflow_mach=2, inflow_angle=0, characteristic_lines=20)
+        assert not flow.shock
+        assert np.allclose(flow.mach[np.isfinite(flow.mach)], 2)
+        assert np.allclose(flow.pressure[0], gd.stagnation_pressure_ratio(2))
+
+    def test_three(self):
+        x = np.linspace(0, 8, 801)
+        y = 1 - 0.03 * np.clip(x - 1, 0, None)**2
+        flow = gd.method_of_characteristics_analysis(x, y, inflow_mach=2, inflow_angle=0, characteristic_lines=20,
+            axisymmetric=True)
+        assert flow.shock
+        assert 1 < flow.shock_x < 8
+
+
+class Test_export:
+    def test_one(self, tmp_path):
+        nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=20)
+        gd.write_vtk(nozzle, tmp_path / 'nozzle.vtk')
+        data = (tmp_path / 'nozzle.vtk').read_bytes()
+        #the coincident points of the sharp throat corner are written once
+        size = len(np.unique(nozzle._x[np.isfinite(nozzle._x)] + 1j*nozzle._y[np.isfinite(nozzle._x)]))
+        header = b'POINTS %d double\n' % size
+        start = data.index(header) + len(header)
+        points = np.frombuffer(data, dtype='>f8', count=3*size, offset=start).reshape(-1, 3)
+        assert np.allclose(points[:, 1].max(), nozzle.wall_y[-1])
+        assert b'SCALARS mach double 1' in data
+
+    def test_two(self, tmp_path):
+        x = np.linspace(0, 4, 101)
+        flow = gd.method_of_characteristics_analysis(x, 1 + x*np.tan(np.radians(10)), inflow_mach=1.5, characteristic_lines=10)
+        gd.write_vtu(flow, tmp_path / 'flow.vtu')
+        data = (tmp_path / 'flow.vtu').read_bytes()
+        start = data.index(b'<AppendedData encoding="raw">\n_') + len(b'<AppendedData encoding="raw">\n_')
+        assert b'NumberOfPoints="%d"' % flow.points in data
+        nbytes = np.frombuffer(data, dtype='<u8', count=1, offset=start)[0]
+        assert nbytes == 3 * 8 * flow.points
+
+    def test_three(self, tmp_path):
+        nozzle = gd.method_of_characteristics(exit_mach=2, characteristic_lines=20, throat_radius=1)
+        gd.write_contour_csv(nozzle, tmp_path / 'contour.csv')
+        gd.write_contour_dxf(nozzle, tmp_path / 'contour.dxf')
+        contour = np.loadtxt(tmp_path / 'contour.csv', delimiter=',', skiprows=1)
+        assert np.array_equal(contour, np.stack((nozzle.wall_x, nozzle.wall_y), axis=1))
+        assert (tmp_path / 'contour.dxf').read_text().count('VERTEX') == len(nozzle.wall_x)
+
+    def test_four(self):
+        #the cells turn counter-clockwise and the fan of a sharp corner is one point
+        x = np.linspace(0, 4, 101)
+        results = [gd.method_of_characteristics(exit_mach=2, characteristic_lines=20),
+            gd.method_of_characteristics(exit_mach=2, characteristic_lines=20, axisymmetric=True, throat_radius=1),
+            gd.method_of_characteristics_analysis(x, 1 + x*np.tan(np.radians(10)), inflow_mach=1.5, characteristic_lines=10)]
+        for result in results:
+            points, cells, count, fields = _mesh(result)
+            assert len(np.unique(points, axis=0)) == len(points)
+            start = np.concatenate(([0], np.cumsum(count)[:-1]))
+            for first, corners in zip(start, count):
+                xc, yc = points[cells[first:first + corners], :2].T
+                assert np.sum(xc*np.roll(yc, -1) - np.roll(xc, -1)*yc) > 0
@@ -4,6 +4,7 @@
 import gas_dynamics as gd
 from gas_dynamics.fluids import air, methane
 import random
+import numpy as np
 
 #TODO: these tests only test for float, not for actual correct values.
 #could use more robust-ness and check versus tabulated values
@@ -56,6 +57,20 @@ class Test_fanno_stagnation_pressure_ratio:
         assert float(gd.fanno_stagnation_pressure_ratio(a,b)) == 1
 
 
+class Test_fanno_mach_from_ratios:
+    def test_one(self):
+        mach_initial = np.array([.2, .5, .9, 1.1, 2, 4])
+        mach_final = np.array([.3, .9, .95, 1.05, 1.5, 1.1])
+        assert np.allclose(gd.fanno_mach_from_temperature_ratio(mach_initial, 1, gd.fanno_temperature_ratio(mach_initial, mach_final)), mach_final)
+        assert np.allclose(gd.fanno_mach_from_pressure_ratio(mach_initial, 1, gd.fanno_pressure_ratio(mach_initial, mach_final)), mach_final)
+        assert np.allclose(gd.fanno_mach_from_density_ratio(mach_initial, 1, gd.fanno_density_ratio(mach_initial, mach_final)), mach_final)
+
+    def test_two(self):
+        p2_p1 = gd.fanno_pressure_ratio(.5, 2, gas=methane)
+        assert np.isnan(gd.fanno_mach_from_pressure_ratio(.5, 1, p2_p1, gas=methane))
+        assert np.isnan(gd.fanno_mach_from_pressure_ratio(2, 1, 1/p2_p1, gas=methane))
+
+
 class Test_fanno_temperature_star_ratio:
     def test_one(self):
         a = random.uniform(1.01,10)
@@ -108,5 +123,143 @@ class Test_fanno_parameter_max:
         assert gd.fanno_parameter_max(1) == 0
 
 
-#TODO: MAKE TEST
-#class Test_mach_from_fanno:       
\ No newline at end of file
+class Test_mach_from_fanno:
+    def test_one(self):
+        assert abs(gd.mach_from_fanno(fanno=.3, mach_initial=2.64) - 1.567008305615555) < 1e-9
+
+    def test_two(self):
+        mach_initial = np.array([.2, .5, .9, 1.1, 2, 4])
+        fanno = .9 * gd.fanno_parameter_max(mach_initial)
+        mach_final = gd.mach_from_fanno(fanno, mach_initial)
+        assert np.all((mach_final < 1) == (mach_initial < 1))
+        assert np.allclose(gd.fanno_parameter(mach_initial, mach_final), fanno)
+
+    def test_three(self):
+        mach, choked = gd.mach_from_fanno([.5, 1, 1.5], .5, return_choked=True)
+        assert list(choked) == [False, False, True]
+        assert np.isnan(mach[2])
+
+
+class Test_mach_from_fanno_parameter_max:
+    def test_one(self):
+        assert abs(gd.mach_from_fanno_parameter_max(0.3049965025814798, supersonic=True) - 2) < 1e-12
+
+    def test_two(self):
+        mach = np.array([.05, .5, .99])
+        assert np.allclose(gd.mach_from_fanno_parameter_max(gd.fanno_parameter_max(mach, gas=methane), gas=methane), mach)
+
+    def test_three(self):
+        assert np.isnan(gd.mach_from_fanno_parameter_max(1, supersonic=True))
+
+
+class Test_friction_factor:
+    def test_one(self):
+        #the colebrook friction factor satisfies the colebrook equation
+        reynolds = np.array([1e4, 1e5, 1e7])
+        roughness = np.array([0, 1e-4, 1e-3])
+        f = gd.friction_factor(reynolds, roughness)
+        assert np.allclose(1/f**.5, -2*np.log10(roughness/3.7 + 2.51/(reynolds*f**.5)), rtol=1e-12)
+
+    def test_two(self):
+        #laminar flow and the haaland correlation
+        assert gd.friction_factor(1000) == 0.064
+        assert np.isclose(gd.friction_factor(1e5, 1e-4, correlation='haaland'), gd.friction_factor(1e5, 1e-4), rtol=.02)
+
+
+class Test_fanno_march:
+    def test_one(self):
+        #a single segment with a constant viscosity follows the fanno relations
+        x, mach, p, T = gd.fanno_march(.3, 500000, 300, length=20, diameter=.05, viscosity=1.8e-5, steps=3)
+        mass_flow = 500000 * np.pi/4*.05**2 * .3 * (air.gamma/(air.R*300))**.5
+        f = gd.friction_factor(mass_flow / (np.pi/4*.05) / 1.8e-5)
+        assert np.isclose(mach[-1], gd.mach_from_fanno(f*20/.05, .3), rtol=1e-10)
+        assert np.isclose(p[-1], 500000*gd.fanno_pressure_ratio(.3, mach[-1]), rtol=1e-10)
+        assert np.isclose(T[-1], 300*gd.fanno_temperature_ratio(.3, mach[-1]), rtol=1e-10)
+        assert np.isclose(x[-1], 20)
+
+    def test_two(self):
+        #pipes march in lockstep and match the same pipes marched one by one
+        mach = np.array([.2, .4, 2.5])
+        diameter = np.array([[.1, .08], [.1, .12], [.1, .11]])
+        batch = gd.fanno_march(mach, 500000, 300, length=[1, 1], diameter=diameter, roughness=4.5e-5)
+        for k in range(3):
+            single = gd.fanno_march(mach[k], 500000, 300, length=[1, 1], diameter=diameter[k], roughness=4.5e-5)
+            for a, b in zip(batch, single):
+                assert np.allclose(a[k], b, rtol=1e-12, equal_nan=True)
+
+    def test_three(self):
+        #a pipe too long for its inlet Mach number chokes
+        x, mach, p, T, choked = gd.fanno_march([.3, .05], 500000, 300, length=50, diameter=.05, return_choked=True)
+        assert choked.tolist() == [True, False]
+        assert np.isnan(mach[0, -1]) and np.isfinite(mach[1, -1])
+
+    def test_units(self):
+        #the same pipe in US units marches to the same Mach numbers
+        x, mach, p, T = gd.fanno_march(.3, 500000, 300, length=[5, 5], diameter=[.1, .09], roughness=4.5e-5, steps=2)
+        ft = gd.from_si(1, 'length', 'US')
+        us = gd.fanno_march(.3, gd.from_si(500000, 'pressure', 'US'), 540, length=[5*ft, 5*ft], diameter=[.1*ft, .09*ft],
+            roughness=4.5e-5*ft, steps=2, gas=gd.get_fluid('air', us=True))
+        assert np.allclose(us[1], mach, rtol=1e-5)
+        assert np.allclose(gd.to_si(us[2], 'pressure', 'US'), p, rtol=1e-5)
+        assert np.allclose(gd.to_si(us[0], 'length', 'US'), x)
+
+
+class Test_fanno_tables:
+    def test_one(self):
+        #the table columns match the choked ratio functions
+        table = gd.fanno_tables(range=[.2,3], step=.1, gas=methane)
+        mach = table['mach']
+        assert np.isclose(mach[-1], 3)
+        assert np.allclose(table['p_pstar'], gd.fanno_pressure_star_ratio(mach, gas=methane))
+        assert np.allclose(table['fanno_max'], gd.fanno_parameter_max(mach, gas=methane))
+        assert np.allclose(table['pt_ptstar'], gd.fanno_stagnation_pressure_ratio(1, mach, gas=methane))
+
+    def test_two(self):
+        #reverse lookup returns one Mach number per branch of the fanno parameter
+        table = gd.fanno_tables(range=[.1,5], step=.001)
+        mach = gd.table_lookup(table, 'fanno_max', [.1, .2], output='mach')
+        assert mach.shape == (2, 2)
+        assert np.allclose(mach[0], gd.mach_from_fanno_parameter_max([.1, .2]), rtol=1e-5)
+        assert np.allclose(mach[1], gd.mach_from_fanno_parameter_max([.1, .2], supersonic=True), rtol=1e-5)
+
+    def test_three(self):
+        #values outside a segment are nan and lookups interpolate every column
+        table = gd.fanno_tables(range=[.1,5], step=.01)
+        rows = gd.table_lookup(table, 'T_Tstar', [1.1, 2])
+        assert rows.shape == (1, 2)
+        assert np.isnan(rows['mach'][0, 1])
+        assert np.isclose(rows['T_Tstar'][0, 0], 1.1)
+        assert np.isclose(rows['v_vstar'][0, 0], gd.fanno_velocity_star_ratio(rows['mach'][0, 0]), rtol=1e-4)
+
+    def test_four(self):
+        #the segments of a column are split once per table and dropped with it
+        from gas_dynamics.extra import _segments
+        table = gd.fanno_tables(range=[.1,5], step=.01)
+        first = gd.table_lookup(table, 'fanno_max', .1, output='mach')
+        segments = _segments[(id(table), 'fanno_max')][1]
+        assert np.allclose(gd.table_lookup(table, 'fanno_max', .1, output='mach'), first)
+        assert _segments[(id(table), 'fanno_max')][1] is segments
+        key = (id(table), 'fanno_max')
+        del table
+        assert key not in _segments
+
+
+class Test_energy:
+    def test_inverse(self):
+        h, V = np.linspace(2e5, 4e5, 50), np.linspace(0, 600, 50)
+        ht = gd.stagnation_enthalpy(h, velocity=V)
+        assert np.allclose(gd.static_enthalpy(ht, mass_velocity=1.2*V, rho=1.2), h)
+        Tt = gd.stagnation_temperature_from_velocity(300, velocity=V)
+        assert np.allclose(gd.temperature_from_velocity(Tt, velocity=V), 300)
+        #the temperature rise matches the isentropic relations at the same Mach number
+        mach = V / gd.sonic_velocity(300)
+        assert np.allclose(300 / Tt, gd.stagnation_temperature_ratio(mach), rtol=1e-2)
+
+    def test_threads(self):
+        #no shared state is touched, so threads reduce their own arrays at once
+        from concurrent.futures import ThreadPoolExecutor
+        datasets = [np.full(1000, v) for v in range(0, 800, 100)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda V: gd.stagnation_enthalpy(3e5, velocity=V), datasets))
+        for V, ht in zip(datasets, results):
+            assert np.allclose(ht, 3e5 + V**2/2)
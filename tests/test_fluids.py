@@ -0,0 +1,276 @@
+#########################
+# Test fluids
+#########################
+import gas_dynamics as gd
+from gas_dynamics.fluids import air, air_us
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+import pytest
+
+
+class Test_fluid:
+    def test_immutable(self):
+        with pytest.raises(AttributeError):
+            air.gamma = 1.3
+        assert air.gamma == 1.4
+
+    def test_constants(self):
+        gas = gd.fluid('foobar', 1.3, 500)
+        assert gas.half_gamma_minus_one == (1.3-1)/2
+        assert gas.pressure_exponent == 1.3/(1.3-1)
+        assert gas.area_exponent == (1.3+1)/(2*(1.3-1))
+
+    def test_hash(self):
+        assert air.replace() == air and hash(air.replace()) == hash(air)
+        assert air != air_us
+        assert {air: 1}[air.replace()] == 1
+
+    def test_replace(self):
+        gas = air.replace(gamma=1.3)
+        assert gas.gamma == 1.3 and gas.R == air.R
+        assert gas.pressure_exponent == 1.3/(1.3-1)
+
+    def test_pickle(self):
+        assert pickle.loads(pickle.dumps(air)) is air
+        gas = gd.fluid('foobar', 1.3, 500, cp=2000)
+        assert pickle.loads(pickle.dumps(gas)) == gas
+
+
+class Test_flow_state:
+    def test_one(self):
+        state = gd.FlowState(temperature=300, velocity=400, rho=1.2)
+        state.set_mach()
+        state.set_mass_velocity()
+        assert state.mach == 400 / gd.sonic_velocity(temperature=300)
+        assert state.mass_velocity == 480
+        assert gd.stagnation_enthalpy(300000, state) == 300000 + 400**2/2
+
+    def test_columns(self):
+        T = np.linspace(250, 350, 1000)
+        state = gd.FlowState(temperature=T, velocity=300, pressure=101325)
+        assert np.shares_memory(state.temperature, T)
+        assert state.rho == pytest.approx(101325 / (air.R * T))
+        assert state.stagnation_pressure == pytest.approx(101325 / gd.stagnation_pressure_ratio(state.mach))
+        assert state.stagnation_temperature == pytest.approx(T / gd.stagnation_temperature_ratio(state.mach))
+
+    def test_lazy(self):
+        state = gd.FlowState(temperature=[300, 250], velocity=[100, 600], pressure=101325)
+        assert state._cache == {}
+        state.mach
+        assert set(state._cache) == {'a', 'mach'}
+        #a new velocity keeps the speed of sound and clears the Mach number
+        state.velocity = [200, 600]
+        assert set(state._cache) == {'a'}
+        assert state.mach[0] == pytest.approx(200 / gd.sonic_velocity(300))
+        with pytest.raises(AttributeError):
+            state.mach = 2
+        #writing into a column in place would leave the Mach number stale
+        with pytest.raises(ValueError):
+            state.temperature[0] = 500
+        with pytest.raises(ValueError):
+            state.mach[0] = 2
+
+    def test_units(self):
+        metric = gd.FlowState(temperature=300, velocity=200, pressure=101325)
+        us = gd.FlowState(temperature=540, velocity=200/.3048, pressure=gd.from_si(101325, 'pressure', 'US'), units='US')
+        assert us.mach == pytest.approx(metric.mach)
+        assert us.rho == pytest.approx(gd.from_si(metric.rho, 'density', 'US'))
+        assert us.stagnation_enthalpy == pytest.approx(gd.from_si(metric.stagnation_enthalpy, 'specific_energy', 'US'))
+
+    def test_thermally_perfect(self):
+        #the stagnation state of a thermally perfect gas follows its own stagnation relations
+        gas = gd.thermally_perfect_gas('air', 2000)
+        state = gd.FlowState(gas=gas, temperature=1500, velocity=900, pressure=1e5)
+        assert gas.enthalpy(state.stagnation_temperature) == pytest.approx(gas.enthalpy(1500) + 900**2/2, rel=1e-12)
+        held = gas.at(state.stagnation_temperature)
+        assert 1500 / state.stagnation_temperature == pytest.approx(gd.stagnation_temperature_ratio(state.mach, gas=held), rel=1e-6)
+        assert 1e5 / state.stagnation_pressure == pytest.approx(gd.stagnation_pressure_ratio(state.mach, gas=held), rel=1e-6)
+
+
+class Test_get_fluid:
+    def test_lookup(self):
+        assert gd.get_fluid('air') is air
+        assert gd.get_fluid('N2') is gd.get_fluid('Nitrogen')
+        assert gd.get_fluid('water vapor', us=True) is gd.fluids.water_us
+
+    def test_missing(self):
+        with pytest.raises(KeyError):
+            gd.get_fluid('unobtainium')
+
+
+class Test_mixture:
+    def test_single(self):
+        gas = gd.mixture({'air': 1})
+        assert gas.gamma == pytest.approx(air.gamma) and gas.R == pytest.approx(air.R)
+
+    def test_mole(self):
+        #equal moles of two gasses weigh in by their molar mass, which goes as 1/R
+        mass = gd.mixture({'He': 1/(1 + 2080/260), 'O2': 2080/260/(1 + 2080/260)})
+        mole = gd.mixture({'He': .5, 'O2': .5}, basis='mole')
+        assert mole.R == pytest.approx(mass.R) and mole.gamma == pytest.approx(mass.gamma)
+
+    def test_cached(self):
+        products = {'N2': .72, 'CO2': .15, 'H2O': .13}
+        assert gd.mixture(products) is gd.mixture(products)
+        assert pickle.loads(pickle.dumps(gd.mixture(products))) == gd.mixture(products)
+
+    def test_units(self):
+        with pytest.raises(ValueError):
+            gd.mixture({air: .5, air_us: .5})
+
+
+class Test_thermally_perfect_gas:
+    def test_cold(self):
+        #at room temperature air is very nearly calorically perfect
+        gas = gd.thermally_perfect_gas('air', stagnation_temperature=300)
+        assert gas.gamma == pytest.approx(1.4, abs=1e-3)
+        assert gd.stagnation_temperature_ratio(2, gas=gas) == pytest.approx(gd.stagnation_temperature_ratio(2), rel=2e-3)
+        assert gd.stagnation_pressure_ratio(2, gas=gas) == pytest.approx(gd.stagnation_pressure_ratio(2), rel=2e-3)
+
+    def test_hot(self):
+        #the tables agree with the enthalpy and entropy integrals
+        gas = gd.thermally_perfect_gas('air', stagnation_temperature=1800)
+        T = 1100
+        mach = (2 * (gas.enthalpy(1800) - gas.enthalpy(T)) / (gas.ratio_of_specific_heats(T) * gas.R * T))**.5
+        assert gd.stagnation_temperature_ratio(mach, gas=gas) == pytest.approx(T/1800, rel=1e-6)
+        assert gd.stagnation_pressure_ratio(mach, gas=gas) == pytest.approx(np.exp((gas.entropy(T) - gas.entropy(1800)) / gas.R), rel=1e-5)
+        assert gd.stagnation_temperature_ratio(mach, gas=gas) > gd.stagnation_temperature_ratio(mach)
+
+    def test_area(self):
+        gas = gd.thermally_perfect_gas('N2', stagnation_temperature=2000)
+        assert gd.mach_area_star_ratio(1, gas=gas) == pytest.approx(1, abs=1e-6)
+        subsonic, supersonic = gd.mach_from_area_ratio(3, gas=gas)
+        assert gd.mach_area_star_ratio(np.array([subsonic, supersonic]), gas=gas) == pytest.approx(3, rel=1e-5)
+
+    def test_cached(self):
+        gas = gd.thermally_perfect_gas({'N2': .72, 'CO2': .1, 'H2O': .18}, stagnation_temperature=1800)
+        assert gd.thermally_perfect_gas({'N2': .72, 'CO2': .1, 'H2O': .18}, stagnation_temperature=1800) is gas
+        assert gas.at(1800) is gas and gas.at(1000) != gas
+        assert pickle.loads(pickle.dumps(gas)) == gas
+
+
+class Test_equilibrium_air:
+    def test_cold(self):
+        #below dissociation the tables give air as an ideal gas
+        assert gd.equilibrium_air.density(300, 101325) == pytest.approx(101325 / (287.05 * 300), rel=2e-3)
+        assert gd.equilibrium_air.sound_speed(300, 101325) == pytest.approx(gd.sonic_velocity(300), rel=2e-3)
+
+    def test_dissociated(self):
+        #dissociation lowers the molar mass, more so at low pressure
+        T = 6000
+        assert gd.equilibrium_air.density(T, 1e4) < 1e4 / (287.05 * T) / 1.2
+        assert gd.equilibrium_air.density(T, 1e4) / 1e4 < gd.equilibrium_air.density(T, 1e6) / 1e6
+
+    def test_enthalpy(self):
+        T, p = np.array([500, 3000, 7000]), np.array([1e3, 1e5, 1e7])
+        h = gd.equilibrium_air.enthalpy(T, p)
+        assert gd.equilibrium_air.temperature_from_enthalpy(h, p) == pytest.approx(T, rel=1e-8)
+        assert pickle.loads(pickle.dumps(gd.equilibrium_air)) == gd.equilibrium_air
+
+
+class Test_gas_array:
+    gasses = [gd.fluid('a', 1.4, 287), gd.fluid('b', 1.3, 300), gd.fluid('c', 1.67, 208)]
+    gas = gd.gas_array(gasses)
+
+    def test_relations(self):
+        #every point matches its own fluid
+        for function, args in ((gd.stagnation_pressure_ratio, (2,)), (gd.shock_mach, (2,)), (gd.fanno_parameter_max, (.5,)),
+            (gd.mach_from_fanno, (.5, .3)), (gd.prandtl_meyer_mach_from_angle, (20,)), (gd.rayleigh_mach_from_stagnation_pressure_ratio,
+            (.3, 1, .99))):
+            expected = [function(*args, gas=gas) for gas in self.gasses]
+            assert function(*args, gas=self.gas) == pytest.approx(expected)
+        assert gd.mach_from_area_ratio(2, gas=self.gas)[1] == pytest.approx([gd.mach_from_area_ratio(2, gas=gas)[1] for gas in self.gasses])
+        assert gd.oblique_shock(2, 10, gas=self.gas)['shock_angle'] == pytest.approx(
+            [gd.oblique_shock(2, 10, gas=gas)['shock_angle'] for gas in self.gasses])
+
+    def test_broadcast(self):
+        assert gd.shock_mach(np.array([[2], [3]]), gas=self.gas).shape == (2, 3)
+        assert gd.normal_shock([[2], [3]], gas=self.gas).shape == (2, 3)
+
+    def test_index(self):
+        gas = gd.gas_array([air, gd.get_fluid('argon')], index=[0, 1, 1, 0])
+        assert gas.gamma == pytest.approx([1.4, 1.67, 1.67, 1.4])
+        assert gas[1:3].R == pytest.approx([gd.get_fluid('argon').R] * 2)
+        assert pickle.loads(pickle.dumps(gas)) == gas
+        with pytest.raises(ValueError):
+            gas.gamma[0] = 1.3
+
+    def test_units(self):
+        gas = gd.gas_array([air, air_us])
+        assert gas.si().R == pytest.approx([air.R, air_us.si().R])
+        assert gd.sonic_velocity(300, gas=gas) == pytest.approx([gd.sonic_velocity(300), gd.sonic_velocity(300, gas=air_us)])
+
+
+class Test_fluid_pool:
+    def test_register(self):
+        gas = gd.register_fluid(gd.fluid('Test gas', 1.32, 320))
+        assert pickle.loads(pickle.dumps(gas)) is gas
+        assert gd.register_fluid(gd.fluid('Test gas', 1.32, 320)) is gas
+        #an explicit key can't be taken twice, or be that of a built in fluid
+        gd.register_fluid(gd.fluid('Other gas', 1.3, 320), key='other gas')
+        with pytest.raises(ValueError):
+            gd.register_fluid(gd.fluid('Other gas', 1.35, 320), key='other gas')
+        with pytest.raises(ValueError):
+            gd.register_fluid(gd.fluid('Air', 1.4, 287), key='air')
+
+    def test_same_name(self):
+        #fluids that share a name, or the default name of a gas array, get keys of their own
+        gasses = [gd.fluid('sweep', 1.3, 287), gd.fluid('sweep', 1.35, 287), air.replace(gamma=1.3),
+            gd.GasArray([1.3, 1.4], [287, 300]), gd.GasArray([1.2, 1.25], [287, 300])]
+        with gd.fluid_pool(gasses, max_workers=2) as pool:
+            ratios = list(pool.map(gd.shock_mach, [2]*5, gasses))
+        assert len({gas._key for gas in gasses}) == 5
+        for ratio, gas in zip(ratios, gasses):
+            assert ratio == pytest.approx(gd.shock_mach(2, gas=gas))
+
+    def test_unregistered(self):
+        #a process the fluid was not registered in makes it from its properties
+        gas = gd.register_fluid(gd.fluid('Spawn gas', 1.31, 290))
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            assert pool.submit(gd.shock_mach, 2, gas).result() == pytest.approx(gd.shock_mach(2, gas=gas))
+            assert pool.submit(pickle.loads, pickle.dumps(gas)).result() == gas
+
+    def test_pool(self):
+        gasses = [gd.fluid('Pool gas %d' % i, 1.2 + i/100, 287) for i in range(4)] + [gd.GasArray([1.3, 1.4], [287, 300])]
+        with gd.fluid_pool(gasses, max_workers=2) as pool:
+            ratios = list(pool.map(gd.shock_mach, [2]*5, gasses))
+        for ratio, gas in zip(ratios, gasses):
+            assert ratio == pytest.approx(gd.shock_mach(2, gas=gas))
+
+
+class Test_tabulated_gas:
+    nasa = gd.thermally_perfect_gas('air', stagnation_temperature=1800)
+
+    def test_nasa(self):
+        #a fine table of the NASA specific heat gives the same relations
+        T = np.linspace(100, 3500, 341)
+        gas = gd.TabulatedGas('air', T, cp=self.nasa.specific_heat(T), R=self.nasa.R, stagnation_temperature=1800)
+        assert gas.enthalpy(2500) - gas.enthalpy(300) == pytest.approx(self.nasa.enthalpy(2500) - self.nasa.enthalpy(300), rel=1e-5)
+        assert gd.stagnation_pressure_ratio([.5, 2, 4], gas=gas) == pytest.approx(gd.stagnation_pressure_ratio([.5, 2, 4], gas=self.nasa), rel=1e-5)
+        assert gd.normal_shock(3, gas=gas)['pressure'] == pytest.approx(gd.normal_shock(3, gas=self.nasa)['pressure'], rel=1e-5)
+        assert pickle.loads(pickle.dumps(gas)) == gas
+
+    def test_load(self, tmp_path):
+        T = np.linspace(200, 3000, 57)
+        cp = self.nasa.specific_heat(T)
+        gamma = cp / (cp - self.nasa.R)
+        path = tmp_path / 'air.csv'
+        np.savetxt(path, np.column_stack([T, cp, gamma]), delimiter=',', header='Temperature,cp,gamma', comments='')
+        csv = gd.load_gas_table(str(path), stagnation_temperature=1800)
+        assert csv.R == pytest.approx(self.nasa.R)
+        path = tmp_path / 'air.npy'
+        np.save(path, np.column_stack([T, gamma]))
+        npy = gd.load_gas_table(str(path), columns=['temperature', 'gamma'], R=self.nasa.R, stagnation_temperature=1800)
+        assert npy.name == 'air'
+        assert npy.specific_heat(T) == pytest.approx(cp)
+        assert gd.mach_from_area_ratio(3, gas=npy) == pytest.approx(gd.mach_from_area_ratio(3, gas=csv))
+
+    def test_ends(self):
+        #past both ends of the table cp is held at the value at the end
+        T = np.linspace(200, 1000, 9)
+        gas = gd.TabulatedGas('p', T, cp=1100 + .2*T, R=287)
+        assert gas.specific_heat([100, 1200]) == pytest.approx([1140, 1300])
+        assert gas.enthalpy(100) == pytest.approx(gas.enthalpy(200) - 1140*100)
+        assert gas.entropy(100) == pytest.approx(gas.entropy(200) - 1140*np.log(2))
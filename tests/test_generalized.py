@@ -0,0 +1,52 @@
+#########################
+# Test generalized flow
+#########################
+import gas_dynamics as gd
+from gas_dynamics.fluids import air
+import numpy as np
+
+
+class Test_generalized_flow:
+    def test_friction(self):
+        #constant area with friction alone is Fanno flow
+        diameter = .05
+        flow = gd.generalized_flow(.3, 300, np.linspace(0, 2, 11), np.pi/4*diameter**2, friction=.02)
+        assert np.isclose(flow['mach'][-1], gd.mach_from_fanno(.02*2/diameter, .3))
+        assert np.isclose(flow['pressure_ratio'][-1], gd.fanno_pressure_ratio(.3, flow['mach'][-1]))
+
+    def test_heat(self):
+        #constant area with heat alone is Rayleigh flow
+        flow = gd.generalized_flow(.3, 300, np.linspace(0, 2, 11), 1, heat=1e5)
+        Tt = 300 + 2e5/air.cp
+        assert np.isclose(flow['stagnation_temperature'][-1], Tt)
+        assert np.isclose(flow['mach'][-1], gd.rayleigh_mach_from_stagnation_temperature_ratio(.3, 300, Tt))
+        assert np.isclose(flow['pressure_ratio'][-1], gd.rayleigh_pressure_ratio(.3, flow['mach'][-1]))
+
+    def test_nozzle(self):
+        #a matched nozzle passes through the sonic point at its throat
+        x = np.linspace(0, 2, 201)
+        subsonic, supersonic = gd.mach_from_area_ratio(2)
+        flow, choked = gd.generalized_flow(subsonic, 300, x, 2, area_gradient=2*(x - 1), return_choked=True)
+        assert not choked
+        assert np.isclose(flow['mach'][50], gd.mach_from_area_ratio(1.25)[0])
+        assert np.isclose(flow['mach'][-1], supersonic, rtol=1e-6)
+        assert np.allclose(flow['stagnation_pressure_ratio'], 1, rtol=1e-5)
+
+    def test_choked(self):
+        #more friction than the Fanno limit chokes the duct
+        diameter = .05
+        x = np.linspace(0, 100, 11)
+        flow, choked = gd.generalized_flow(.3, 300, x, np.pi/4*diameter**2, friction=.02, return_choked=True)
+        assert choked
+        limit = gd.fanno_parameter_max(.3) * diameter / .02
+        assert np.all(np.isfinite(flow['mach'][x < limit]))
+        assert np.all(np.isnan(flow['mach'][x > limit]))
+
+    def test_batched(self):
+        x = np.linspace(0, 1, 21)
+        friction = np.array([[0], [.02], [.04]]) * np.ones(21)
+        flow, choked = gd.generalized_flow([.2, .3], 300, x, .01, friction=friction[:, None, :], heat=5e4, mass_addition=.05, return_choked=True)
+        assert flow.shape == (3, 2, 21) and choked.shape == (3, 2)
+        single = gd.generalized_flow(.3, 300, x, .01, friction=.04, heat=5e4, mass_addition=.05)
+        assert np.allclose(flow['mach'][2, 1], single['mach'])
+        assert np.allclose(flow['mass_flow_ratio'][..., -1], 1.05)
@@ -0,0 +1,53 @@
+###########################
+# Test isothermal functions
+###########################
+import gas_dynamics as gd
+from gas_dynamics.fluids import air, methane
+import numpy as np
+
+
+class Test_isothermal_star_ratios:
+    def test_one(self):
+        #every star ratio is one at a Mach number of 1/sqrt(gamma)
+        star = methane.gamma**-.5
+        for ratio in (gd.isothermal_pressure_star_ratio, gd.isothermal_density_star_ratio, gd.isothermal_velocity_star_ratio,
+            gd.isothermal_stagnation_pressure_star_ratio, gd.isothermal_stagnation_temperature_star_ratio):
+            assert np.isclose(ratio(star, gas=methane), 1)
+        assert np.isclose(gd.isothermal_parameter_max(star, gas=methane), 0)
+
+    def test_two(self):
+        #ratios between two states are ratios of the star ratios
+        m1, m2 = np.array([.2, .3, 2]), np.array([.5, .8, 1.2])
+        assert np.allclose(gd.isothermal_pressure_ratio(m1, m2), gd.isothermal_pressure_star_ratio(m2) / gd.isothermal_pressure_star_ratio(m1))
+        assert np.allclose(gd.isothermal_stagnation_pressure_ratio(m1, m2),
+            gd.isothermal_stagnation_pressure_star_ratio(m2) / gd.isothermal_stagnation_pressure_star_ratio(m1))
+
+
+class Test_mach_from_isothermal_parameter:
+    def test_one(self):
+        #the inverse recovers the Mach number on both branches
+        mach = np.array([.01, .2, .8, .9, 2, 10])
+        fanno_max = gd.isothermal_parameter_max(mach)
+        assert np.allclose(gd.mach_from_isothermal_parameter_max(fanno_max, supersonic=mach > air.gamma**-.5), mach, rtol=1e-12)
+
+    def test_two(self):
+        #too long a duct chokes on either branch
+        mach, choked = gd.mach_from_isothermal_parameter([.1, 10, .1, 10], [.5, .5, 2, 2], return_choked=True)
+        assert choked.tolist() == [False, True, False, True]
+        assert np.isclose(gd.isothermal_parameter(.5, mach[0]), .1)
+        assert np.isclose(gd.isothermal_parameter(2, mach[2]), .1)
+        assert np.isnan(mach[1]) and np.isnan(mach[3])
+
+
+class Test_isothermal_pressure:
+    def test_one(self):
+        #the inlet Mach number from the pressures matches the friction parameter
+        mach = gd.isothermal_inlet_mach(gd.isothermal_parameter(.2, .5), 500000, 200000)
+        assert np.isclose(mach, .2)
+
+    def test_two(self):
+        #outlet pressures past the choke are nan, and so are crossings of 1/sqrt(gamma)
+        mach, choked = gd.isothermal_inlet_mach(10, 500000, [400000, 10000], return_choked=True)
+        assert choked.tolist() == [False, True]
+        assert np.isnan(gd.isothermal_mach_from_pressure_ratio(.5, 500000, 100000))
+        assert gd.isothermal_mach_from_density_ratio(.5, 2, 1.5) == 2/3
@@ -0,0 +1,107 @@
+######################
+# Test pipe networks
+######################
+import gas_dynamics as gd
+from gas_dynamics.fluids import air
+import numpy as np
+import pytest
+
+
+def single_pipe(outlet_pressure):
+    network = gd.PipeNetwork()
+    network.add_node('supply', pressure=500000, stagnation_temperature=300)
+    network.add_node('outlet', pressure=outlet_pressure)
+    network.add_pipe('supply', 'outlet', length=10, diameter=.02, friction_factor=.02)
+    network.solve()
+    return network
+
+
+class Test_pipe_network:
+    def test_one(self):
+        #the exit static pressure of a single pipe matches the outlet
+        network = single_pipe(400000)
+        mach = network.mach_inlet[0]
+        mach_exit = gd.mach_from_fanno(fanno=10, mach_initial=mach)
+        pressure = 500000 * gd.stagnation_pressure_ratio(mach) * gd.fanno_pressure_ratio(mach, mach_exit)
+        assert network.converged
+        assert not network.choked[0]
+        assert np.isclose(pressure, 400000, rtol=1e-8)
+
+    def test_two(self):
+        #the mass flow of a single pipe is the isentropic inlet mass flux
+        network = single_pipe(400000)
+        mach = network.mach_inlet[0]
+        temperature = 300 * gd.stagnation_temperature_ratio(mach)
+        density = 500000 * gd.stagnation_pressure_ratio(mach) / (air.R * temperature)
+        velocity = mach * (air.gamma * air.R * temperature)**.5
+        assert np.isclose(network.mass_flow[0], density * velocity * np.pi/4 * .02**2, rtol=1e-10)
+
+    def test_three(self):
+        #below the choking back pressure the mass flow no longer changes
+        choked = single_pipe(10000)
+        lower = single_pipe(5000)
+        assert choked.choked[0]
+        assert np.isclose(choked.mass_flow[0], lower.mass_flow[0], rtol=1e-12)
+        assert np.isclose(gd.mach_from_fanno(fanno=10, mach_initial=choked.mach_inlet[0]), 1, rtol=1e-6)
+
+    def test_four(self):
+        #mass is conserved at every junction of a loop with demands
+        network = gd.PipeNetwork()
+        network.add_node('supply', pressure=600000)
+        for name in 'abcd':
+            network.add_node(name, demand=.1)
+        network.add_node('outlet', pressure=150000)
+        for up, down in (('supply', 'a'), ('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd'), ('c', 'b'), ('d', 'outlet')):
+            network.add_pipe(up, down, length=20, diameter=.05, friction_factor=.02)
+        network.solve()
+        flow = network.mass_flow
+        assert network.converged
+        assert np.isclose(flow[0] - flow[1] - flow[2], .1, rtol=1e-8)
+        assert np.isclose(flow[1] + flow[5] - flow[3], .1, rtol=1e-8)
+        assert np.isclose(flow[0] - flow[6], .4, rtol=1e-8)
+
+    def test_five(self):
+        #a warm solve after a change matches a solve from scratch
+        network = gd.PipeNetwork()
+        network.add_node('supply', pressure=500000, stagnation_temperature=300)
+        network.add_node('junction', demand=.5)
+        network.add_node('outlet', pressure=101325)
+        network.add_pipe('supply', 'junction', length=100, diameter=.1, friction_factor=.02)
+        network.add_pipe('junction', 'outlet', length=50, diameter=.05, friction_factor=.02)
+        network.solve()
+        network.set_pressure('supply', 450000)
+        network.set_demand('junction', .3)
+        network.solve()
+
+        fresh = gd.PipeNetwork()
+        fresh.add_node('supply', pressure=450000, stagnation_temperature=300)
+        fresh.add_node('junction', demand=.3)
+        fresh.add_node('outlet', pressure=101325)
+        fresh.add_pipe('supply', 'junction', length=100, diameter=.1, friction_factor=.02)
+        fresh.add_pipe('junction', 'outlet', length=50, diameter=.05, friction_factor=.02)
+        fresh.solve()
+        assert network.converged
+        assert np.allclose(network.pressure, fresh.pressure, rtol=1e-8)
+
+    def test_six(self):
+        #the stagnation temperature of a junction mixes the flows entering it
+        network = gd.PipeNetwork()
+        network.add_node('hot', pressure=300000, stagnation_temperature=400)
+        network.add_node('cold', pressure=300000, stagnation_temperature=250)
+        network.add_node('junction')
+        network.add_node('outlet', pressure=100000)
+        network.add_pipe('hot', 'junction', length=10, diameter=.05, friction_factor=.02)
+        network.add_pipe('cold', 'junction', length=10, diameter=.05, friction_factor=.02)
+        network.add_pipe('junction', 'outlet', length=10, diameter=.05, friction_factor=.02)
+        network.solve()
+        flow = network.mass_flow
+        expected = (400*flow[0] + 250*flow[1]) / (flow[0] + flow[1])
+        assert network.converged
+        assert np.isclose(network.stagnation_temperature[2], expected, rtol=1e-8)
+        assert np.isclose(network.stagnation_temperature[3], expected, rtol=1e-8)
+
+    def test_units(self):
+        #the network works in SI units, so a fluid in US units is given converted
+        with pytest.raises(ValueError):
+            gd.PipeNetwork(gas=gd.get_fluid('air', us=True))
+        assert gd.PipeNetwork(gas=gd.get_fluid('air', us=True).si()).gas.R == pytest.approx(air.R, rel=2e-3)
@@ -4,6 +4,7 @@
 import gas_dynamics as gd
 from gas_dynamics.fluids import air, methane
 import random
+import numpy as np
 
 class Test_prandtl_meyer_angle_from_mach:
     def test_one(self):
@@ -46,6 +47,14 @@ class Test_prandtl_meyer_mach_from_angle:
         zero = gd.prandtl_meyer_mach_from_angle(45) - 2.764452 
         assert abs(zero) < 1e-5
 
+    def test_six(self):
+        angles = np.linspace(0, 120, 50)
+        machs = gd.prandtl_meyer_mach_from_angle(angles)
+        assert np.allclose(gd.prandtl_meyer_angle_from_mach(machs), angles)
+
+    def test_seven(self):
+        assert np.isnan(gd.prandtl_meyer_mach_from_angle(131))
+
 
 class Test_mach_wave_angle:
     def test_one(self):
@@ -54,4 +63,4 @@ class Test_mach_wave_angle:
 
     def test_two(self):
         zero = gd.mach_wave_angle(2.0) - 30
-        assert abs(zero) < 1e-5
\ No newline at end of file
+        assert abs(zero) < 1e-5
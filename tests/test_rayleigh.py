@@ -4,6 +4,7 @@
 import gas_dynamics as gd
 from gas_dynamics.fluids import air, methane
 import random
+import numpy as np
 
 #TODO: these tests only test for float, not for actual correct values.
 #could use more robust-ness
@@ -79,6 +80,40 @@ class Test_rayleigh_mach_from_temperature_ratio:
         assert float(gd.rayleigh_mach_from_temperature_ratio(m,a,b))
 
 
+class Test_rayleigh_mach_from_temperature_ratio_roots:
+    def test_one(self):
+        #both roots reproduce the temperature ratio, one either side of 1/sqrt(gamma)
+        m1, m2 = np.array([.2, .5, .9, 1.5, 3]), np.array([.4, .3, .95, 2.5, 1.2])
+        T2_T1 = gd.rayleigh_temperature_ratio(m1, m2)
+        lower, upper = gd.rayleigh_mach_from_temperature_ratio(m1, 1, T2_T1, branch='both')
+        assert np.allclose(gd.rayleigh_temperature_ratio(m1, lower), T2_T1)
+        assert np.allclose(gd.rayleigh_temperature_ratio(m1, upper), T2_T1)
+        assert np.all(lower < air.gamma**-.5) and np.all(upper > air.gamma**-.5)
+        assert np.allclose(np.where(m2 < air.gamma**-.5, lower, upper), m2)
+
+    def test_two(self):
+        #temperatures past the maximum of T/T* are masked
+        mach, choked = gd.rayleigh_mach_from_temperature_ratio(.5, 1, [1.1, 1.4], return_choked=True)
+        assert choked.tolist() == [False, True]
+        assert np.isnan(mach[1])
+
+
+class Test_rayleigh_mach_from_stagnation_temperature_ratio_roots:
+    def test_one(self):
+        #the same branch is kept by default
+        m1, m2 = np.array([.2, .5, .9, 1.5, 3]), np.array([.4, .3, .95, 2.5, 1.2])
+        Tt2_Tt1 = gd.rayleigh_stagnation_temperature_ratio(m1, m2)
+        assert np.allclose(gd.rayleigh_mach_from_stagnation_temperature_ratio(m1, 1, Tt2_Tt1), m2)
+
+    def test_two(self):
+        #heating past Tt* chokes, and supersonic flow cannot be cooled below its asymptote
+        Tt_Ttstar = np.array([.3, .9, 1.1])
+        mach, choked = gd.rayleigh_mach_from_stagnation_temperature_ratio(1, 1, Tt_Ttstar, branch='both', return_choked=True)
+        assert choked.tolist() == [False, False, True]
+        assert np.isnan(mach[1, 0]) and np.isnan(mach[:, 2]).all()
+        assert np.allclose(gd.rayleigh_stagnation_temperature_star_ratio(mach[:, 1]), .9)
+
+
 #TODO: this isn't great
 class Test_rayleigh_mach_from_stagnation_temperature_ratio:
     def test_one(self):
@@ -96,6 +131,38 @@ class Test_rayleigh_mach_from_stagnation_pressure_ratio:
         assert float(gd.rayleigh_mach_from_stagnation_pressure_ratio(m,b,a))
 
 
+class Test_rayleigh_mach_from_stagnation_pressure_ratio_branches:
+    def test_one(self):
+        #both branches reproduce the stagnation pressure ratio
+        m1, m2 = np.array([.2, .5, .9, 1.5, 3]), np.array([.4, .3, .95, 2.5, 1.2])
+        pt2_pt1 = gd.rayleigh_stagnation_pressure_ratio(m1, m2)
+        assert np.allclose(gd.rayleigh_mach_from_stagnation_pressure_ratio(m1, 1, pt2_pt1), m2, rtol=1e-10)
+        lower, upper = gd.rayleigh_mach_from_stagnation_pressure_ratio(m1, 1, pt2_pt1, branch='both')
+        assert np.allclose(gd.rayleigh_stagnation_pressure_ratio(m1, upper), pt2_pt1)
+        assert np.allclose(gd.rayleigh_stagnation_pressure_ratio(m1, lower)[[0, 1, 2, 4]], pt2_pt1[[0, 1, 2, 4]])
+        #no subsonic flow has a stagnation pressure that high
+        assert np.isnan(lower[3])
+        assert np.all(upper > 1)
+
+    def test_two(self):
+        #stagnation pressures below pt* are choked
+        mach, choked = gd.rayleigh_mach_from_stagnation_pressure_ratio(.8, 2.3, [2.2, 2.6], return_choked=True)
+        assert choked.tolist() == [True, False]
+        assert np.isnan(mach[0])
+
+    def test_three(self):
+        #a warm start from the solution of the previous time step of a drifting stream takes fewer iterations
+        x = np.linspace(0, 6, 1000)
+        previous = gd.rayleigh_mach_from_stagnation_pressure_ratio(.3, 1, gd.rayleigh_stagnation_pressure_ratio(.3, .5 + .3*np.sin(x)))
+        mach = .5 + .3*np.sin(x + .02)
+        pt2_pt1 = gd.rayleigh_stagnation_pressure_ratio(.3, mach)
+        cold, cold_iterations = gd.rayleigh_mach_from_stagnation_pressure_ratio(.3, 1, pt2_pt1, return_iterations=True)
+        warm, warm_iterations = gd.rayleigh_mach_from_stagnation_pressure_ratio(.3, 1, pt2_pt1, guess=previous,
+            return_iterations=True)
+        assert np.allclose(cold, mach, rtol=1e-10) and np.allclose(warm, mach, rtol=1e-10)
+        assert warm_iterations.sum() < cold_iterations.sum()
+
+
 class Test_rayleigh_pressure_star_ratio:
     def test_one(self):
         a = random.uniform(1.01,10)
@@ -145,4 +212,51 @@ class Test_rayleigh_heat_flux:
     def test_one(self):
         a = random.uniform(1.01,100)
         b = random.uniform(1.01,500)
-        assert float(gd.rayleigh_heat_flux(a,b))
\ No newline at end of file
+        assert float(gd.rayleigh_heat_flux(a,b))
+
+
+class Test_rayleigh_heat_max:
+    def test_one(self):
+        #the heat that raises the stagnation temperature to Tt*
+        Tt_star = 600 / gd.rayleigh_stagnation_temperature_star_ratio(.3)
+        assert np.isclose(gd.rayleigh_heat_max(.3, 600), gd.rayleigh_heat_flux(600, Tt_star))
+
+    def test_two(self):
+        assert gd.rayleigh_heat_max(1, 600) == 0
+
+
+class Test_rayleigh_heat_addition:
+    def test_one(self):
+        state = gd.rayleigh_heat_addition([.3, 2], 600, 5e4)
+        assert not state['choked'].any()
+        Tt2 = 600 + 5e4/air.cp
+        assert np.allclose(state['mach'], gd.rayleigh_mach_from_stagnation_temperature_ratio([.3, 2], 600, Tt2))
+        assert np.allclose(state['pressure_ratio'], gd.rayleigh_pressure_ratio(np.array([.3, 2]), state['mach']))
+        assert np.all(state['mass_flow_ratio'] == 1)
+
+    def test_two(self):
+        #heating to the limit reaches a Mach number of one on either branch
+        q = gd.rayleigh_heat_max([.3, 2], 600)
+        assert np.allclose(gd.rayleigh_heat_addition([.3, 2], 600, q)['mach'], 1)
+
+    def test_three(self):
+        #a subsonic inlet past the limit spills mass flow
+        state = gd.rayleigh_heat_addition(.3, 600, 2*gd.rayleigh_heat_max(.3, 600))
+        assert state['choked'] and not state['shock']
+        assert state['mach_inlet'] < .3 and state['mach'] == 1
+        assert 0 < state['mass_flow_ratio'] < 1
+
+    def test_four(self):
+        #a supersonic inlet past the limit takes a normal shock in the feeding nozzle
+        state = gd.rayleigh_heat_addition(2, 600, 5e5)
+        assert state['shock'] and state['mass_flow_ratio'] == 1
+        assert state['mach_inlet'] < 1
+        assert np.isclose(state['mach_inlet'], gd.rayleigh_mach_from_stagnation_temperature_ratio(1, 600 + 5e5/air.cp, 600, branch='lower'))
+        assert state['stagnation_pressure_ratio'] < 1
+
+    def test_five(self):
+        mach = np.linspace(.2, 3, 20)[:, None]
+        temperature = np.linspace(300, 1500, 10)
+        state = gd.rayleigh_heat_addition(mach, temperature, 2e5)
+        assert state.shape == (20, 10)
+        assert np.array_equal(state['choked'], 2e5 > gd.rayleigh_heat_max(mach, temperature))
@@ -3,6 +3,8 @@
 ######################
 import gas_dynamics as gd
 from gas_dynamics.fluids import air, methane
+import numpy as np
+import pytest
 import random
 
 class Test_shock_mach:
@@ -117,4 +119,50 @@ class Test_shock_flow_deflection_from_machs:
 
     def test_two(self):
         a = gd.shock_flow_deflection_from_machs(mach_initial=2, mach_final=1)
-        assert a < 25 and a > 20
\ No newline at end of file
+        assert a < 25 and a > 20
+
+
+class Test_normal_shock:
+    def test_perfect(self):
+        mach = np.array([1.5, 3, 8])
+        state = gd.normal_shock(mach)
+        assert state['mach'] == pytest.approx(gd.shock_mach(mach), rel=1e-9)
+        assert state['pressure_ratio'] == pytest.approx(gd.shock_pressure_ratio(mach), rel=1e-9)
+        assert state['temperature_ratio'] == pytest.approx(gd.shock_temperature_ratio(mach), rel=1e-9)
+
+    def test_thermally_perfect(self):
+        #cold air is very nearly calorically perfect, hot air takes up more energy in vibration
+        cold = gd.normal_shock(2, temperature=220, gas=gd.thermally_perfect_gas('air', 300))
+        assert cold['temperature_ratio'] == pytest.approx(gd.shock_temperature_ratio(2), rel=2e-3)
+        hot = gd.normal_shock(5, temperature=220, gas=gd.thermally_perfect_gas('air', 300))
+        assert hot['temperature_ratio'] < gd.shock_temperature_ratio(5)
+        assert hot['density_ratio'] > 5
+
+    def test_equilibrium(self):
+        state = gd.normal_shock(mach=[2, 20], pressure=100, temperature=220, gas=gd.equilibrium_air)
+        perfect = gd.normal_shock(mach=[2, 20], pressure=100, temperature=220)
+        assert state['temperature'][0] == pytest.approx(perfect['temperature'][0], rel=2e-3)
+        assert state['density_ratio'][1] > 2 * perfect['density_ratio'][1]
+        assert state['temperature'][1] < perfect['temperature'][1] / 2
+
+    def test_units(self):
+        #a fluid in US units takes and returns psi, Rankine, ft/s and lbm/ft^3
+        us = gd.normal_shock(2, pressure=14.7, temperature=518.67, gas=gd.get_fluid('air', us=True))
+        si = gd.normal_shock(2, pressure=gd.to_si(14.7, 'pressure', 'US'), temperature=288.15, gas=gd.get_fluid('air'))
+        for name in ('velocity', 'pressure', 'temperature', 'density'):
+            assert gd.to_si(us[name], name, 'US') == pytest.approx(si[name], rel=2e-3)
+
+
+class Test_oblique_shock:
+    def test_perfect(self):
+        state = gd.oblique_shock(mach=[2, 3], flow_deflection=10)
+        assert state['shock_angle'] == pytest.approx([gd.shock_angle(2, 10)[0], gd.shock_angle(3, 10)[0]], rel=1e-8)
+
+    def test_detached(self):
+        state = gd.oblique_shock(mach=2, flow_deflection=[20, 30])
+        assert np.isfinite(state['shock_angle'][0]) and np.isnan(state['shock_angle'][1])
+
+    def test_equilibrium(self):
+        #dissociation thins the shock layer, so the shock lies closer to the wall
+        state = gd.oblique_shock(mach=20, flow_deflection=20, pressure=100, temperature=220, gas=gd.equilibrium_air)
+        assert state['shock_angle'] < gd.oblique_shock(mach=20, flow_deflection=20, pressure=100, temperature=220)['shock_angle']
@@ -3,6 +3,8 @@
 ########################
 import gas_dynamics as gd
 from gas_dynamics.fluids import air, methane
+import numpy as np
+import pytest
 
 class Test_sonic_velocity:
     def test_one(self):
@@ -93,6 +95,14 @@ class Test_mach_area_star_ratio:
     def test_one(self):
         assert gd.mach_area_star_ratio(mach=1) == 1
 
+    def test_array(self):
+        #an extract of Mach numbers, with a stagnation point, in one call
+        mach = np.array([0, 1, 3])
+        assert gd.mach_area_star_ratio(mach) == pytest.approx([np.inf, 1, 4.23456790123457])
+        gas = gd.GasArray([1.4, 1.3, 1.4], [287, 287, 300])
+        assert gd.mach_area_star_ratio(mach, gas=gas) == pytest.approx([np.inf, 1, 4.23456790123457])
+        assert gd.mach_area_star_ratio(2, gas=gas)[1] == pytest.approx(gd.mach_area_star_ratio(2, gas=gd.fluid('gas', 1.3, 287)))
+
 
 class Test_mach_area_ratio:
     def test_one(self):
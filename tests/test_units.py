@@ -0,0 +1,54 @@
+#########################
+# Test units
+#########################
+import gas_dynamics as gd
+from gas_dynamics.fluids import air, air_us
+import pickle
+import numpy as np
+import pytest
+
+
+class Test_unit_system:
+    def test_lookup(self):
+        assert gd.get_units('metric') is gd.SI
+        assert gd.get_units(' Imperial ') is gd.US
+        assert gd.get_units(gd.US) is gd.US
+        with pytest.raises(ValueError):
+            gd.get_units('cgs')
+
+    def test_immutable(self):
+        with pytest.raises(AttributeError):
+            gd.US.name = 'SI'
+        assert pickle.loads(pickle.dumps(gd.US)) == gd.US
+        with pytest.raises(ValueError):
+            gd.UnitSystem('odd', {'luminosity': 1})
+
+
+class Test_conversion:
+    def test_round_trip(self):
+        values = np.array([1., 14.7, 500])
+        assert gd.from_si(gd.to_si(values, 'pressure', 'US'), 'pressure', 'US') == pytest.approx(values, rel=1e-14)
+        assert gd.to_si(14.7, 'pressure', 'SI') == 14.7
+
+    def test_mixed(self):
+        units = ['SI', 'US', gd.US, 'metric']
+        assert gd.to_si([300, 540, 540, 300], 'temperature', units) == pytest.approx(300, rel=1e-14)
+
+
+class Test_units_argument:
+    def test_us_fluid(self):
+        #a fluid in US units and the metric fluid with units='US' agree
+        assert gd.sonic_velocity(540, gas=air_us) == pytest.approx(gd.sonic_velocity(540, gas=air, units='US'), rel=1e-3)
+        assert gd.sonic_velocity(540, gas=air, units='US') == pytest.approx(gd.from_si(gd.sonic_velocity(300), 'velocity', 'US'))
+        assert gd.mass_flux_max(500, 500, gas=air_us) == pytest.approx(gd.mass_flux_max(500, 500, units='US'), rel=1e-3)
+
+    def test_mixed(self):
+        flux = gd.mass_flux(.5, [1e6, 500], [300, 500], units=['SI', 'US'])
+        assert flux[0] == gd.mass_flux(.5, 1e6, 300)
+        assert flux[1] == pytest.approx(gd.mass_flux(.5, 500, 500, units='US'), rel=1e-14)
+
+    def test_stagnation_enthalpy(self):
+        state = gd.FlowState(gas=air_us, temperature=540, velocity=1000, rho=.07)
+        state.set_mass_velocity()
+        #a kinetic energy of 1000^2/2 ft^2/s^2 is near 20 Btu/lbm
+        assert gd.stagnation_enthalpy(100, state) == pytest.approx(100 + 1000**2 / 2 / 25037, rel=1e-4)